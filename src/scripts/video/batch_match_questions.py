@@ -7,6 +7,7 @@ from datetime import datetime
 import time
 from pathlib import Path
 from dotenv import load_dotenv
+from near_duplicates import MinHashDeduper, dedupe_report, print_dedupe_report, question_fingerprint_text
 
 # Load environment variables from .env file
 load_dotenv(Path(__file__).parent / '.env')
@@ -115,6 +116,11 @@ def print_match_details(question: Dict, matches: List[Dict]):
         print(f"   Content Preview: {match['relevant_content'][:200]}...")
     print("="*80)
 
+def question_fingerprint(question: Dict) -> str:
+    """Option-order independent text used to spot near-duplicate questions"""
+    options = question.get('options', []) if question.get('type') == 'multiple_choice' else []
+    return question_fingerprint_text(question.get('text', ''), options, question.get('solution', ''))
+
 def process_sample_questions():
     """Process a sample of questions and show detailed results."""
     # Get questions with their full data
@@ -123,35 +129,40 @@ def process_sample_questions():
     
     print(f"Processing {len(questions)} sample questions for evaluation")
     
+    # Group near-duplicates so each group costs one embedding and one match
+    groups = MinHashDeduper.from_config().group([question_fingerprint(q) for q in questions])
+    
     start_time = time.time()
     results = []
     
-    for i, question in enumerate(questions, 1):
+    for i, members in enumerate(groups, 1):
+        representative = questions[members[0]]
         try:
-            print(f"\nProcessing question {i}/{SAMPLE_SIZE}")
-            
-            # Find matching videos
-            matches = find_matching_videos(question)
-            
-            # Store matches in database
-            store_matches(question['id'], matches)
+            print(f"\nProcessing question group {i}/{len(groups)} ({len(members)} questions)")
             
-            # Print detailed results for evaluation
-            print_match_details(question, matches)
+            # Find matching videos once for the representative
+            matches = find_matching_videos(representative)
             
-            # Collect results for summary
-            results.append({
-                'question_id': question['id'],
-                'matches_count': len(matches),
-                'top_similarity': matches[0]['similarity'] if matches else 0,
-                'same_subtopic_count': sum(1 for m in matches if m['subtopic'] == question.get('subtopic_name_he', ''))
-            })
+            for question in (questions[m] for m in members):
+                # Store matches in database
+                store_matches(question['id'], matches)
+                
+                # Print detailed results for evaluation
+                print_match_details(question, matches)
+                
+                # Collect results for summary
+                results.append({
+                    'question_id': question['id'],
+                    'matches_count': len(matches),
+                    'top_similarity': matches[0]['similarity'] if matches else 0,
+                    'same_subtopic_count': sum(1 for m in matches if m['subtopic'] == question.get('subtopic_name_he', ''))
+                })
             
             # Sleep to respect API rate limits
             time.sleep(1)
             
         except Exception as e:
-            print(f"Error processing question {question['id']}: {str(e)}")
+            print(f"Error processing question {representative['id']}: {str(e)}")
             continue
     
     # Print summary statistics
@@ -161,6 +172,7 @@ def process_sample_questions():
     print(f"Average top match similarity: {avg_similarity:.2%}")
     same_subtopic_total = sum(r['same_subtopic_count'] for r in results)
     print(f"Matches from same subtopic: {same_subtopic_total}/{sum(r['matches_count'] for r in results)}")
+    print_dedupe_report(dedupe_report(groups), "questions")
     print(f"\nTotal processing time: {(time.time() - start_time)/60:.1f} minutes")
 
 if __name__ == "__main__":
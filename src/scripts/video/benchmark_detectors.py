@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import difflib
+import argparse
+import contextlib
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from frame_sources import DECODERS
+from synthetic_videos import truth_path, generate_corpus, load_synthetic_config
+
+DETECTORS = ['transitions', 'slides', 'titles']
+
+def match_events(detected: List[float], truth: List[float], tolerance: float) -> List[Tuple[int, int]]:
+    """One-to-one (detected index, truth index) pairs within `tolerance` seconds, closest pairs first"""
+    candidates = sorted((abs(d - t), i, j) for i, d in enumerate(detected) for j, t in enumerate(truth)
+                        if abs(d - t) <= tolerance)
+    used_detected, used_truth = set(), set()
+    matches = []
+    for _, i, j in candidates:
+        if i not in used_detected and j not in used_truth:
+            used_detected.add(i)
+            used_truth.add(j)
+            matches.append((i, j))
+    return sorted(matches)
+
+def score_counts(true_positives: int, detected: int, expected: int) -> Dict:
+    """Precision, recall and F1 from match counts"""
+    precision = true_positives / detected if detected else 1.0
+    recall = true_positives / expected if expected else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        'true_positives': true_positives,
+        'false_positives': detected - true_positives,
+        'false_negatives': expected - true_positives,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1
+    }
+
+def normalize_text(text: str) -> str:
+    return ' '.join(text.split())
+
+def run_timed(function: Callable, *args, verbose: bool = False, **kwargs):
+    """(result, seconds) of a detector call, with its console output hidden unless verbose"""
+    with open(os.devnull, 'w', encoding='utf-8') as devnull:
+        with contextlib.nullcontext() if verbose else contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            return result, time.perf_counter() - start
+
+def benchmark_video(video_path: str, truth: Dict, detector: str, options: Dict,
+                    tolerance: float, verbose: bool = False) -> Dict:
+    """Run one detector on one synthetic video and score it against the video's ground truth"""
+    if detector == 'transitions':
+        from detect_dark_transitions import detect_dark_transitions
+        transitions, seconds = run_timed(
+            detect_dark_transitions, video_path, stride=options['stride'], decoder=options['decoder'],
+            width=options['width'], workers=options['workers'], verbose=verbose)
+        # Chapters start where a transition ends, so that is the time that has to be right
+        detected = [end for _, end in transitions]
+        expected = [end for _, end in truth['dark_transitions']]
+    elif detector == 'slides':
+        from detect_slide_changes import detect_slide_changes
+        detected, seconds = run_timed(detect_slide_changes, video_path, decoder=options['decoder'],
+                                      width=64 if options['decoder'] == 'ffmpeg' else None, verbose=verbose)
+        expected = truth['slide_changes']
+    else:
+        from detect_titles import detect_titles
+        from debug_writer import DebugWriter
+        with DebugWriter(level='off') as debug:
+            titles, seconds = run_timed(
+                detect_titles, video_path, decoder=options['decoder'], width=options['width'],
+                workers=options['workers'], ocr_workers=options['ocr_workers'], debug=debug,
+                slide_changes=options['slide_changes'], verbose=verbose)
+        kinds = {'dark', 'fade', 'cut'} if options['slide_changes'] else {'dark', 'fade'}
+        expected_titles = [title for title in truth['titles'] if title['transition'] in kinds]
+        detected = sorted(titles)
+        expected = [title['time'] for title in expected_titles]
+
+    matches = match_events(detected, expected, tolerance)
+    result = score_counts(len(matches), len(detected), len(expected))
+    result.update({
+        'seconds': seconds,
+        'frames': truth['frame_count'],
+        'fps': truth['frame_count'] / seconds if seconds else 0.0,
+        'timing_error': max((abs(detected[i] - expected[j]) for i, j in matches), default=0.0)
+    })
+    if detector == 'titles':
+        texts = [(normalize_text(titles[detected[i]]), normalize_text(expected_titles[j]['text'])) for i, j in matches]
+        result['text_exact'] = sum(found == wanted for found, wanted in texts)
+        result['text_similarity'] = sum(difflib.SequenceMatcher(None, found, wanted).ratio()
+                                        for found, wanted in texts)
+    return result
+
+def summarize(results: List[Dict]) -> Dict:
+    """Totals over all videos of one detector"""
+    totals = {key: sum(result[key] for result in results)
+              for key in ('true_positives', 'false_positives', 'false_negatives', 'seconds', 'frames')}
+    summary = score_counts(totals['true_positives'], totals['true_positives'] + totals['false_positives'],
+                           totals['true_positives'] + totals['false_negatives'])
+    summary.update({
+        'videos': len(results),
+        'seconds': totals['seconds'],
+        'fps': totals['frames'] / totals['seconds'] if totals['seconds'] else 0.0,
+        'timing_error': max((result['timing_error'] for result in results), default=0.0)
+    })
+    if results and 'text_exact' in results[0]:
+        matched = totals['true_positives']
+        summary['text_accuracy'] = sum(result['text_exact'] for result in results) / matched if matched else 0.0
+        summary['text_similarity'] = sum(result['text_similarity'] for result in results) / matched if matched else 0.0
+    return summary
+
+def benchmark_corpus(video_paths: List[str], detectors: List[str], options: Dict,
+                     tolerance: float = 0.25, verbose: bool = False) -> Dict:
+    """Per-video and total scores of each detector over synthetic videos with ground truth files"""
+    report = {'options': options, 'tolerance': tolerance, 'detectors': {}}
+    for detector in detectors:
+        videos = {}
+        for video_path in video_paths:
+            with open(truth_path(video_path), 'r', encoding='utf-8') as f:
+                truth = json.load(f)
+            print(f"{detector}: {Path(video_path).name}...")
+            videos[video_path] = benchmark_video(video_path, truth, detector, options, tolerance, verbose)
+        report['detectors'][detector] = {'videos': videos, 'total': summarize(list(videos.values()))}
+    return report
+
+def print_report(report: Dict):
+    print("\nDetector benchmark")
+    print("-" * 78)
+    print(f"{'detector':<12} {'videos':>6} {'precision':>9} {'recall':>7} {'f1':>6} {'max err':>8} {'fps':>8}  text")
+    for detector, results in report['detectors'].items():
+        total = results['total']
+        text = (f"{total['text_accuracy']:.0%} exact, {total['text_similarity']:.2f} similarity"
+                if 'text_accuracy' in total else "")
+        print(f"{detector:<12} {total['videos']:>6} {total['precision']:>9.3f} {total['recall']:>7.3f} "
+              f"{total['f1']:>6.3f} {total['timing_error']:>7.2f}s {total['fps']:>8.1f}  {text}")
+
+def main():
+    config = load_synthetic_config()
+    parser = argparse.ArgumentParser(description="Score the video detectors against synthetic videos with known ground truth")
+    parser.add_argument("corpus_dir", nargs="?", default=config.get('output_dir', 'data/videos/synthetic'),
+                      help="Directory of synthetic videos and their .truth.json files")
+    parser.add_argument("--generate", type=int, metavar="N",
+                      help="First generate N videos (640x360 and 1280x720) into the corpus directory")
+    parser.add_argument("--font", default=config.get('font'),
+                      help="Hebrew TrueType font for generated title cards")
+    parser.add_argument("--detectors", nargs="+", choices=DETECTORS, default=DETECTORS)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                      help="Seconds a detection may be off from the truth and still count")
+    parser.add_argument("--decoder", choices=DECODERS, default="opencv")
+    parser.add_argument("--width", type=int, default=320,
+                      help="Frame width for the ffmpeg decoder")
+    parser.add_argument("--stride", type=int, default=1,
+                      help="Frame stride for the transitions detector")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--ocr-workers", type=int, default=4)
+    parser.add_argument("--slide-changes", action="store_true",
+                      help="Titles detector: also OCR titles after direct slide changes")
+    parser.add_argument("--report", help="Write the full report as JSON to this path")
+    parser.add_argument("--verbose", action="store_true", help="Show the detectors' own output")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_corpus(args.corpus_dir, args.generate, [(640, 360), (1280, 720)], font=args.font)
+
+    corpus = Path(args.corpus_dir)
+    video_paths = sorted(str(path) for path in corpus.iterdir() if truth_path(path).exists()) if corpus.is_dir() else []
+    if not video_paths:
+        print(f"No synthetic videos with ground truth in {args.corpus_dir} (use --generate N)")
+        return
+
+    options = {'decoder': args.decoder, 'width': args.width, 'stride': args.stride, 'workers': args.workers,
+               'ocr_workers': args.ocr_workers, 'slide_changes': args.slide_changes}
+    report = benchmark_corpus(video_paths, args.detectors, options, args.tolerance, args.verbose)
+    print_report(report)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nReport saved to {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,59 @@
-def calculate_similarity(question, video, terms_weight=0.2):
-    """Calculate similarity with semantic matching and contextual term boost"""
+import json
+import numpy as np
+from term_vectors import TermIndex
+
+# Score of a video without an embedding: below any cosine similarity, so it never outranks a scored video
+MISSING_EMBEDDING_SCORE = -1.0
+
+def video_embedding_matrix(videos):
+    """Row-normalized matrix of the videos' embeddings, with zero rows for videos that have none"""
+    dimensions = next((len(video['embedding']) for video in videos if video.get('embedding')), 0)
+    embeddings = np.zeros((len(videos), dimensions), dtype=np.float32)
+    for row, video in enumerate(videos):
+        if video.get('embedding'):
+            embeddings[row] = video['embedding']
+    return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+def calculate_similarities(question, videos, terms_weight=0.2, term_index=None, embeddings=None):
+    """Similarity of a question to every video: embeddings in one matrix product, term boosts from the sparse term index.
+
+    Pass a `term_index` and `embeddings` (video_embedding_matrix) built from the
+    same `videos` list to reuse them across questions.
+    """
+    if not videos:
+        return []
+
     # Base similarity from embeddings (primary matching mechanism)
-    base_similarity = cosine_similarity(
-        question['embedding'],
-        video['embedding']
-    )
-    
+    embeddings = embeddings if embeddings is not None else video_embedding_matrix(videos)
+    if not embeddings.shape[1]:
+        return [MISSING_EMBEDDING_SCORE] * len(videos)
+    query = np.asarray(question['embedding'], dtype=np.float32)
+    base_similarity = embeddings @ (query / max(np.linalg.norm(query), 1e-12))
+
     # Term boost (only if base similarity is already high)
-    term_boost = 0
-    if base_similarity > 0.4:  # Only consider term boost for highly relevant content
-        if 'terms' in video and 'terms' in question:
-            # Calculate term overlap as a percentage
-            matched_terms = 0
-            total_terms = 0
-            rare_term_matches = 0
-            
-            # Check each term category
-            for category in ['technical_terms', 'safety_terms', 'job_titles', 'regulatory_terms', 'procedures']:
-                video_terms = set(video['terms'].get(category, []))
-                question_terms = set(question['terms'].get(category, []))
-                
-                # Count matches
-                matches = len(video_terms.intersection(question_terms))
-                matched_terms += matches
-                total_terms += len(question_terms)
-                
-                # Check for rare terms (terms that appear in few videos)
-                for term in question_terms:
-                    if term in video_terms:
-                        # Count how many videos contain this term
-                        term_frequency = sum(1 for v in videos if term in v.get('terms', {}).get(category, []))
-                        if term_frequency <= 3:  # Term appears in 3 or fewer videos
-                            rare_term_matches += 1
-            
-            if total_terms > 0:
-                # Calculate base term boost
-                term_boost = matched_terms / total_terms
-                
-                # Add extra boost for rare terms
-                if rare_term_matches > 0:
-                    rare_term_boost = rare_term_matches / total_terms
-                    # Increased weight for rare terms (60% rare, 40% regular)
-                    term_boost = term_boost * 0.4 + rare_term_boost * 0.6
-                
-                # Only apply boost if we have significant term overlap
-                if term_boost < 0.3:  # Require at least 30% term overlap
-                    term_boost = 0
-    
+    term_boost = np.zeros(len(videos), dtype=np.float32)
+    if question.get('terms'):
+        term_index = term_index or TermIndex(videos)
+        has_terms = np.asarray(['terms' in video for video in videos])
+        term_boost = np.where((base_similarity > 0.4) & has_terms, term_index.term_boosts(question['terms']), 0.0)
+
     # Combine scores with term boost only if base similarity is good
-    final_similarity = base_similarity
-    if term_boost > 0:
-        final_similarity = (1 - terms_weight) * base_similarity + terms_weight * term_boost
-    
-    return final_similarity
+    final_similarity = np.where(
+        term_boost > 0,
+        (1 - terms_weight) * base_similarity + terms_weight * term_boost,
+        base_similarity
+    )
+    # Zero rows stand for videos without an embedding
+    final_similarity = np.where(embeddings.any(axis=1), final_similarity, MISSING_EMBEDDING_SCORE)
+    return final_similarity.tolist()
+
+def calculate_similarity(question, video, terms_weight=0.2):
+    """Calculate similarity with semantic matching and contextual term boost.
+
+    Scoring a single pair knows no other videos, so every matched term counts
+    as rare; use calculate_similarities to score against the whole corpus.
+    """
+    return calculate_similarities(question, [video], terms_weight)[0]
 
 def extract_question_terms(question_text, openai_client):
     """Extract terms from question text using the same categories"""
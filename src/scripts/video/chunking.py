@@ -0,0 +1,86 @@
+import re
+from typing import List, Dict
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")  # Tokenizer used by text-embedding-3 models
+except ImportError:
+    _ENCODING = None
+
+# Without tiktoken, estimate tokens from length. Hebrew averages well under
+# two characters per cl100k token, so this errs towards smaller chunks.
+CHARS_PER_TOKEN_ESTIMATE = 1.5
+
+SENTENCE_BREAK = re.compile(r'(?<=[.!?:;])\s+')
+
+def count_tokens(text: str) -> int:
+    """Count tokens the way the embedding model will, or estimate if tiktoken is missing"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return int(len(text) / CHARS_PER_TOKEN_ESTIMATE) + 1
+
+def chunking_key(max_tokens: int, overlap_paragraphs: int) -> str:
+    """What chunk boundaries depend on besides the text: the budget, the overlap and how tokens are counted"""
+    tokenizer = _ENCODING.name if _ENCODING is not None else f"estimate-{CHARS_PER_TOKEN_ESTIMATE}"
+    return f"{max_tokens}:{overlap_paragraphs}:{tokenizer}"
+
+def split_paragraphs(content: str) -> List[str]:
+    """Split extracted summary content on blank lines"""
+    return [p.strip() for p in re.split(r'\n\s*\n', content) if p.strip()]
+
+def split_oversized(paragraph: str, max_tokens: int) -> List[str]:
+    """Break a paragraph that alone exceeds the budget into sentence groups, hard-splitting as a last resort"""
+    pieces = []
+    current = ""
+    for sentence in SENTENCE_BREAK.split(paragraph):
+        candidate = f"{current} {sentence}".strip()
+        if count_tokens(candidate) <= max_tokens:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        current = sentence
+        while count_tokens(current) > max_tokens:
+            # A single sentence over budget: cut by estimated characters
+            cut = max(1, int(len(current) * max_tokens / count_tokens(current)))
+            pieces.append(current[:cut])
+            current = current[cut:]
+    if current:
+        pieces.append(current)
+    return pieces
+
+def chunk_summary(video_id: str, header: str, content: str, max_tokens: int = 800, overlap_paragraphs: int = 1) -> List[Dict]:
+    """Split a summary into paragraph windows that fit the token budget.
+
+    Every chunk starts with the lesson/title header so it can be embedded and
+    matched on its own. Consecutive windows share `overlap_paragraphs`
+    paragraphs so a passage is never cut off from its context.
+    """
+    budget = max_tokens - count_tokens(header) - 1
+    if budget <= 0:
+        raise ValueError(f"Chunk budget of {max_tokens} tokens does not fit the header")
+
+    paragraphs = []
+    for paragraph in split_paragraphs(content):
+        paragraphs.extend(split_oversized(paragraph, budget) if count_tokens(paragraph) > budget else [paragraph])
+
+    windows = []
+    start = 0
+    while start < len(paragraphs):
+        end = start + 1
+        while end < len(paragraphs) and count_tokens("\n".join(paragraphs[start:end + 1])) <= budget:
+            end += 1
+        windows.append(paragraphs[start:end])
+        if end >= len(paragraphs):
+            break
+        start = max(end - overlap_paragraphs, start + 1)
+
+    return [
+        {
+            'chunk_id': f"{video_id}#{i}",
+            'text': f"{header}\n" + "\n".join(window)
+        }
+        for i, window in enumerate(windows)
+    ]
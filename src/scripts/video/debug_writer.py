@@ -0,0 +1,111 @@
+import cv2
+import json
+import queue
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional
+
+# Each level includes everything from the levels before it
+DEBUG_LEVELS = ['off', 'metadata', 'crops', 'full']
+
+# Debug image name -> (file stem, lowest level that writes it)
+DEBUG_IMAGES = {
+    'full_frame': ('01_full_frame', 'full'),
+    'marked_frame': ('02_marked_frame', 'full'),
+    'title_area': ('03_title_area', 'crops'),
+    'processed': ('04_processed', 'crops')
+}
+
+# Compression flag per image format; png takes 0-9 (higher is smaller, slower), jpg/webp a 0-100 quality
+COMPRESSION_FLAGS = {
+    'png': cv2.IMWRITE_PNG_COMPRESSION,
+    'jpg': cv2.IMWRITE_JPEG_QUALITY,
+    'webp': cv2.IMWRITE_WEBP_QUALITY
+}
+DEFAULT_COMPRESSION = {'png': 1, 'jpg': 90, 'webp': 90}
+
+class DebugWriter:
+    """Writes detect_titles debug artifacts from a background thread.
+
+    Analysis only enqueues arrays (which must not be modified afterwards);
+    encoding and disk writes happen on the writer thread. The queue is
+    bounded, so a slow disk applies backpressure instead of growing memory.
+    """
+
+    def __init__(self, root: Path = Path("debug_frames"), level: str = 'metadata', image_format: str = 'png',
+                 compression: Optional[int] = None, queue_size: int = 32):
+        if level not in DEBUG_LEVELS:
+            raise ValueError(f"Unknown debug level: {level} (expected one of {DEBUG_LEVELS})")
+        if image_format not in COMPRESSION_FLAGS:
+            raise ValueError(f"Unknown debug image format: {image_format} (expected one of {list(COMPRESSION_FLAGS)})")
+        self.root = Path(root)
+        self.level = level
+        self.image_format = image_format
+        self.params = [COMPRESSION_FLAGS[image_format],
+                       compression if compression is not None else DEFAULT_COMPRESSION[image_format]]
+        self.written = 0
+        self.errors = 0
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = None
+        if level != 'off':
+            self.thread = threading.Thread(target=self._run, name="debug-writer", daemon=True)
+            self.thread.start()
+
+    def includes(self, level: str) -> bool:
+        """Whether artifacts of the given level are written"""
+        return DEBUG_LEVELS.index(self.level) >= DEBUG_LEVELS.index(level)
+
+    def frame_dir(self, video_path: str, index: int) -> Path:
+        """Numbered subdirectory for one transition of one video"""
+        return self.root / Path(video_path).stem / f"frame_{index:03d}"
+
+    def save_images(self, video_path: str, index: int, images: Dict[str, np.ndarray]):
+        """Queue the debug images this level keeps (see DEBUG_IMAGES)"""
+        frame_dir = self.frame_dir(video_path, index)
+        for name, image in images.items():
+            stem, level = DEBUG_IMAGES[name]
+            if image is not None and self.includes(level):
+                self.queue.put(('image', frame_dir / f"{stem}.{self.image_format}", image))
+
+    def save_metadata(self, video_path: str, index: int, metadata: Dict):
+        """Queue a transition's metadata.json"""
+        if self.includes('metadata'):
+            self.queue.put(('json', self.frame_dir(video_path, index) / "metadata.json", metadata))
+
+    def _write(self, kind: str, path: Path, payload):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if kind == 'image':
+            if not cv2.imwrite(str(path), payload, self.params):
+                raise IOError(f"Could not write {path}")
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+                self.written += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"Error writing debug file {item[1]}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def close(self):
+        """Wait for queued writes to finish"""
+        if self.thread:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+            print(f"Wrote {self.written} debug files to {self.root}/" + (f" ({self.errors} failed)" if self.errors else ""))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
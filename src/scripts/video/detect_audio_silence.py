@@ -0,0 +1,156 @@
+import time
+import shutil
+import argparse
+import subprocess
+import numpy as np
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+from detect_dark_transitions import FrameProbe, print_transitions
+from frame_sources import video_properties, DECODERS
+
+SAMPLE_RATE = 16000
+# Samples read from ffmpeg per chunk (about 10 seconds of audio)
+CHUNK_SAMPLES = SAMPLE_RATE * 10
+
+def stream_pcm(video_path: str, sample_rate: int = SAMPLE_RATE, chunk_samples: int = CHUNK_SAMPLES,
+               ffmpeg_path: str = 'ffmpeg') -> Iterator[np.ndarray]:
+    """Mono 16-bit PCM chunks of the video's audio, decoded and resampled by ffmpeg.
+
+    Every chunk fills the same preallocated buffer, so it is overwritten by the
+    next one; the last chunk may be shorter.
+    """
+    if not shutil.which(ffmpeg_path):
+        raise RuntimeError(f"ffmpeg not found ({ffmpeg_path})")
+    command = [ffmpeg_path, '-v', 'error', '-nostdin', '-i', str(video_path),
+               '-vn', '-sn', '-ac', '1', '-ar', str(sample_rate), '-f', 's16le', '-']
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+    buffer = bytearray(chunk_samples * 2)
+    view = memoryview(buffer)
+    samples = np.frombuffer(buffer, dtype='<i2')
+    try:
+        while True:
+            filled = 0
+            while filled < len(buffer):
+                count = process.stdout.readinto(view[filled:])
+                if not count:
+                    break
+                filled += count
+            if filled >= 2:
+                yield samples[:filled // 2]
+            if filled < len(buffer):
+                break
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        error = process.stderr.read().decode('utf-8', 'replace').strip()
+        process.stdout.close()
+        process.stderr.close()
+    if process.returncode != 0 and error:
+        raise RuntimeError(f"ffmpeg could not decode the audio of {video_path}: {error}")
+
+def window_levels(video_path: str, window_ms: float = 50, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """RMS level in dBFS of each consecutive window of the audio"""
+    window = max(1, int(sample_rate * window_ms / 1000))
+    levels = []
+    carry = np.empty(0, dtype=np.float32)
+    for chunk in stream_pcm(video_path, sample_rate):
+        samples = np.concatenate((carry, chunk.astype(np.float32)))
+        usable = len(samples) // window * window
+        frames = samples[:usable].reshape(-1, window)
+        levels.append(np.sqrt(np.mean(np.square(frames), axis=1)))
+        carry = samples[usable:]
+    if len(carry):
+        levels.append(np.sqrt(np.mean(np.square(carry), keepdims=True)))
+    rms = np.concatenate(levels) if levels else np.empty(0, dtype=np.float32)
+    # Full scale is 32768; digital silence becomes a very low level instead of -inf
+    return 20 * np.log10(np.maximum(rms, 1e-3) / 32768)
+
+def silence_runs(levels: np.ndarray, threshold_db: float, min_windows: int) -> List[Tuple[int, int]]:
+    """(first window, window after) of every run of at least min_windows windows below the threshold"""
+    quiet = np.concatenate(([False], levels < threshold_db, [False]))
+    edges = np.flatnonzero(np.diff(quiet.astype(np.int8)))
+    starts, ends = edges[::2], edges[1::2]
+    keep = ends - starts >= min_windows
+    return list(zip(starts[keep].tolist(), ends[keep].tolist()))
+
+def detect_audio_silence(video_path: str, threshold_db: float = -40.0, min_duration: float = 0.5,
+                         window_ms: float = 50, confirm: bool = False, dark_threshold: int = 20,
+                         decoder: str = 'opencv', width: Optional[int] = None) -> List[Tuple[float, float]]:
+    """
+    Detect candidate chapter transitions from pauses in the audio, without decoding any video.
+
+    Args:
+        video_path: Path to the video file
+        threshold_db: RMS level (dBFS) below which a window counts as silent
+        min_duration: Minimum duration in seconds of a silence
+        window_ms: RMS window length in milliseconds
+        confirm: Keep only silences whose middle frame is dark (one frame grab per candidate)
+        dark_threshold: Maximum pixel value of a dark frame, for confirmation
+        decoder: Frame source for confirmation
+        width: Frame width for the ffmpeg decoder
+
+    Returns:
+        List of (start_time, end_time) tuples in seconds, like detect_dark_transitions
+    """
+    print(f"Looking for silences (RMS < {threshold_db} dBFS over {window_ms:.0f} ms windows)")
+    print(f"Minimum silence duration: {min_duration} seconds")
+    start_time = time.perf_counter()
+    levels = window_levels(video_path, window_ms)
+    window_seconds = window_ms / 1000
+    runs = silence_runs(levels, threshold_db, max(1, int(round(min_duration / window_seconds))))
+    candidates = [(start * window_seconds, end * window_seconds) for start, end in runs]
+    audio_seconds = len(levels) * window_seconds
+    elapsed = time.perf_counter() - start_time
+    print(f"Scanned {audio_seconds:.1f}s of audio in {elapsed:.2f}s "
+          f"({audio_seconds / max(elapsed, 1e-9):.0f}x real time), {len(candidates)} silences")
+
+    transitions = []
+    probe = FrameProbe(video_path, dark_threshold, decoder, width) if confirm and candidates else None
+    fps = video_properties(video_path)[0] if probe else None
+    for start, end in candidates:
+        if probe:
+            middle = int((start + end) / 2 * fps)
+            if not probe.is_dark(middle):
+                print(f"Rejected silence: {start:.2f}s - {end:.2f}s (frame {middle} is not dark)")
+                continue
+        transitions.append((start, end))
+        print(f"Found transition: {start:.2f}s - {end:.2f}s ({end - start:.2f}s of silence)")
+    if probe:
+        probe.release()
+
+    print(f"\nFound {len(transitions)} transitions")
+    return transitions
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect chapter transitions from silences in a video's audio")
+    parser.add_argument("video_path", help="Path to the video file")
+    parser.add_argument("--threshold-db", type=float, default=-40.0,
+                      help="RMS level in dBFS below which audio counts as silent")
+    parser.add_argument("--min-duration", type=float, default=0.5,
+                      help="Minimum duration in seconds for a silence")
+    parser.add_argument("--window-ms", type=float, default=50,
+                      help="RMS window length in milliseconds")
+    parser.add_argument("--confirm", action="store_true",
+                      help="Keep only silences whose middle frame is dark")
+    parser.add_argument("--dark-threshold", type=int, default=20,
+                      help="Maximum pixel value of a dark frame, for --confirm")
+    parser.add_argument("--decoder", choices=DECODERS, default="opencv",
+                      help="Frame source for --confirm")
+    parser.add_argument("--width", type=int, default=320,
+                      help="Frame width for the ffmpeg decoder")
+    args = parser.parse_args()
+
+    if not Path(args.video_path).exists():
+        print(f"Error: Video file not found: {args.video_path}")
+        return
+
+    try:
+        transitions = detect_audio_silence(args.video_path, args.threshold_db, args.min_duration, args.window_ms,
+                                           args.confirm, args.dark_threshold, args.decoder, args.width)
+        print_transitions(transitions)
+    except Exception as e:
+        print(f"Error processing video: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,229 @@
 import cv2
+import time
 import numpy as np
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 import argparse
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from frame_sources import open_frame_source, SampledFrames, PrefetchedFrames, DECODERS
 
-def detect_dark_transitions(video_path: str, threshold: int = 20, min_duration: float = 0.1) -> List[Tuple[float, float]]:
+def is_dark_frame(frame: np.ndarray, threshold: int) -> bool:
+    """True if no pixel reaches the threshold (frame may be BGR or already grayscale)"""
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return np.max(frame) < threshold
+
+class FrameProbe:
+    """Seeks to single frames to check darkness, for refining run boundaries between samples.
+
+    Pass an open `source` to reuse it (it is then left open by release).
+    """
+
+    def __init__(self, video_path: str, threshold: int, decoder: str = 'opencv', width: Optional[int] = None,
+                 source=None):
+        self.owns_source = source is None
+        self.source = source or open_frame_source(video_path, decoder, width)
+        self.threshold = threshold
+        self.cache = {}
+
+    def is_dark(self, frame_number: int) -> bool:
+        if frame_number not in self.cache:
+            self.source.seek(frame_number)
+            frame = self.source.read()
+            self.cache[frame_number] = bool(frame is not None and is_dark_frame(frame, self.threshold))
+        return self.cache[frame_number]
+
+    def release(self):
+        if self.owns_source:
+            self.source.close()
+
+class DarkRunTracker:
+    """Online dark-run detection for callers that already walk every frame in order"""
+
+    def __init__(self, threshold: int = 20):
+        self.threshold = threshold
+        self.dark_start = None
+        self.frame_count = 0
+
+    def update(self, frame: np.ndarray) -> Optional[Tuple[int, int]]:
+        """Feed the next frame; returns (first dark frame, first frame after) when a dark run ends on it"""
+        frame_number = self.frame_count
+        self.frame_count += 1
+        if is_dark_frame(frame, self.threshold):
+            if self.dark_start is None:
+                self.dark_start = frame_number
+        elif self.dark_start is not None:
+            run = (self.dark_start, frame_number)
+            self.dark_start = None
+            return run
+        return None
+
+    def finish(self) -> Optional[Tuple[int, int]]:
+        """The run the video ended in, if any"""
+        if self.dark_start is None:
+            return None
+        return self.dark_start, self.frame_count
+
+def refine_boundary(probe: FrameProbe, low: int, high: int, dark_at_high: bool) -> int:
+    """First frame in (low, high] that is already in the state of frame `high`.
+
+    Binary search, or a forward scan when the probe's source cannot seek back cheaply.
+    """
+    if probe.source.forward_only:
+        return next((f for f in range(low + 1, high) if probe.is_dark(f) == dark_at_high), high)
+    while high - low > 1:
+        middle = (low + high) // 2
+        if probe.is_dark(middle) == dark_at_high:
+            high = middle
+        else:
+            low = middle
+    return high
+
+def sample_darkness(source, stride: int, threshold: int, fps: float,
+                    start: int = 0, end: Optional[int] = None,
+                    prefetch: int = 0) -> Tuple[List[Tuple[int, bool]], int]:
+    """(frame_number, is_dark) for every stride-th frame of [start, end), and the frame number reading stopped at.
+
+    The source must already be positioned at `start`. Skipped frames are only
+    stepped over, never converted or inspected. With prefetch > 0, frames are
+    decoded on a separate thread into a ring of that many frame buffers.
+    """
+    frames = PrefetchedFrames(source, stride, start, end, prefetch) if prefetch else SampledFrames(source, stride, start, end)
+    samples = []
+    for frame_number, frame in frames:
+        samples.append((frame_number, is_dark_frame(frame, threshold)))
+
+        # Progress indicator every 1000 frames
+        if (frame_number + stride) // 1000 > frame_number // 1000:
+            duration = (frame_number + stride) // 1000 * 1000 / fps
+            print(f"Processed {duration:.1f} seconds...")
+    if prefetch:
+        print(f"Prefetch: {frames.stats()}")
+    return samples, frames.stopped_at
+
+def scan_shard(video_path: str, threshold: int, stride: int, decoder: str, width: Optional[int],
+               start: int, end: Optional[int], prefetch: int = 0) -> Tuple[List[Tuple[int, bool]], int]:
+    """Sample one time range of the video with its own decoder (runs in a worker process)"""
+    with open_frame_source(video_path, decoder, width, exact=True) as source:
+        if start:
+            source.seek(start)
+        return sample_darkness(source, stride, threshold, source.fps, start, end, prefetch)
+
+def plan_shards(frame_count: int, workers: int, stride: int) -> List[Tuple[int, Optional[int]]]:
+    """Split [0, frame_count) into contiguous ranges starting on stride multiples; the last one runs to the end"""
+    length = -(-frame_count // workers)
+    length = max(stride, -(-length // stride) * stride)
+    starts = list(range(0, max(frame_count, 1), length))
+    return [(start, starts[i + 1] if i + 1 < len(starts) else None) for i, start in enumerate(starts)]
+
+def sample_video(source, video_path: str, threshold: int, stride: int, decoder: str, width: Optional[int],
+                 workers: int = 1, prefetch: int = 0) -> Tuple[List[Tuple[int, bool]], int]:
+    """Samples of the whole video and its number of frames, scanned in `workers` time shards.
+
+    `source` is an open source at the first frame, which scans the video
+    itself when there is a single shard. Shards start on stride multiples,
+    so the merged samples are exactly the ones a sequential scan takes.
+    """
+    if workers > 1 and source.forward_only:
+        print("Sharding with the opencv decoder needs the video's keyframe index for exact seeks "
+              "(build it with video_index.py, or use --decoder ffmpeg); scanning in one process")
+        workers = 1
+    frame_count = source.frame_count
+    shards = plan_shards(frame_count, workers, stride) if workers > 1 and frame_count else [(0, None)]
+    if len(shards) == 1:
+        return sample_darkness(source, stride, threshold, source.fps, 0, None, prefetch)
+
+    print(f"Scanning {len(shards)} shards in {workers} processes...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(scan_shard, video_path, threshold, stride, decoder, width, start, end, prefetch)
+                   for start, end in shards]
+        results = [future.result() for future in futures]
+
+    samples = [sample for shard_samples, _ in results for sample in shard_samples]
+    # The metadata frame count can be off; the last shard reads to the real end
+    frame_count = max(stopped_at for _, stopped_at in results)
+    return samples, frame_count
+
+def find_dark_runs(video_path: str, threshold: int = 20, stride: int = 1,
+                   decoder: str = 'opencv', width: Optional[int] = None,
+                   workers: int = 1, prefetch: int = 0, source=None) -> Tuple[List[Tuple[int, int]], float, int]:
+    """
+    Find runs of dark frames as (first dark frame, first frame after the run).
+
+    With stride > 1 only every stride-th frame is checked; where two samples
+    disagree, the exact boundary is found by binary search over the frames in
+    between. This matches a full scan as long as dark runs and the gaps
+    between them are at least `stride` frames long.
+
+    `decoder` picks the frame source (see frame_sources.py); with 'ffmpeg',
+    frames are downscaled to `width` before the darkness check.
+
+    With workers > 1 the video is split into time ranges scanned in parallel
+    by separate processes, each with its own decoder. Runs crossing a shard
+    boundary are merged because runs are built from the combined samples, so
+    the result equals a sequential scan. This needs exact seeks to the shard
+    starts: ffmpeg's are, and so are OpenCV's when the video's keyframe index
+    has been built (video_index.py). OpenCV frame seeks without the index can
+    be off on some codecs, so the opencv decoder then scans in one process.
+
+    Boundary probes are exact for the same reason; without an index the
+    opencv decoder probes by decoding forward, one more pass over the video.
+
+    With prefetch > 0, each scan decodes on its own thread ahead of the
+    darkness checks, into a ring of `prefetch` frame buffers.
+
+    `source` is an open frame source at the first frame to scan and probe
+    with (one is opened if omitted).
+
+    Returns:
+        The runs, the video's FPS and its number of frames
+    """
+    if source is None:
+        with open_frame_source(video_path, decoder, width, exact=True) as source:
+            return find_dark_runs(video_path, threshold, stride, decoder, width, workers, prefetch, source)
+
+    samples, frame_count = sample_video(source, video_path, threshold, stride, decoder, width, workers, prefetch)
+    probe = FrameProbe(video_path, threshold, source=source) if stride > 1 else None
+
+    def all_samples():
+        yield from samples
+        # The last frame may fall between samples; check it so runs end where a full scan ends them.
+        # Checked last, so probes move forward through the video.
+        if probe and samples and samples[-1][0] != frame_count - 1:
+            yield frame_count - 1, probe.is_dark(frame_count - 1)
+
+    runs = []
+    dark_start = None
+    previous = None
+    for frame_number, is_dark in all_samples():
+        if previous is None or is_dark != previous[1]:
+            if previous is None or frame_number - previous[0] == 1:
+                boundary = frame_number
+            else:
+                boundary = refine_boundary(probe, previous[0], frame_number, is_dark)
+            if is_dark:
+                dark_start = boundary
+            elif dark_start is not None:
+                runs.append((dark_start, boundary))
+                dark_start = None
+        previous = (frame_number, is_dark)
+
+    # Handle case where video ends during a dark sequence
+    if dark_start is not None:
+        runs.append((dark_start, frame_count))
+
+    return runs, source.fps, frame_count
+
+def sampling_stride(fps: float, stride: int = 1, sample_ms: Optional[float] = None) -> int:
+    """Frames between samples, from a frame stride or a sampling interval in milliseconds"""
+    if sample_ms:
+        stride = round(sample_ms * fps / 1000)
+    return max(1, stride)
+
+def detect_dark_transitions(video_path: str, threshold: int = 20, min_duration: float = 0.1,
+                            stride: int = 1, sample_ms: Optional[float] = None,
+                            decoder: str = 'opencv', width: Optional[int] = None,
+                            workers: int = 1, prefetch: int = 0) -> List[Tuple[float, float]]:
     """
     Detect dark frame transitions in a video.
     
@@ -12,73 +231,65 @@ def detect_dark_transitions(video_path: str, threshold: int = 20, min_duration:
         video_path: Path to the video file
         threshold: Maximum pixel value to consider as "dark" (0-255)
         min_duration: Minimum duration in seconds for a dark sequence to be considered a transition
+        stride: Check every Nth frame and refine run boundaries by binary search (1 = every frame)
+        sample_ms: Check a frame every this many milliseconds instead of every `stride` frames
+        decoder: 'opencv' (full-resolution frames) or 'ffmpeg' (downscaled gray frames over a pipe)
+        width: Frame width for the ffmpeg decoder
+        workers: Number of processes scanning separate time ranges of the video
+        prefetch: Decode on a separate thread into a ring of this many frame buffers (0 = same thread)
         
     Returns:
         List of (start_time, end_time) tuples in seconds where dark transitions occur
     """
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise ValueError(f"Could not open video file: {video_path}")
-    
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    min_frames = int(min_duration * fps)
-    
+    # One source provides the metadata, the scan and the boundary probes
+    with open_frame_source(video_path, decoder, width, exact=True) as source:
+        fps = source.fps
+
+        min_frames = int(min_duration * fps)
+        stride = sampling_stride(fps, stride, sample_ms)
+
+        print(f"Processing video at {fps} FPS...")
+        print(f"Looking for dark frames (max pixel value < {threshold})")
+        print(f"Minimum transition duration: {min_duration} seconds ({min_frames} frames)")
+        if stride > 1:
+            print(f"Sampling every {stride} frames")
+            if stride > max(min_frames, 1):
+                print(f"Warning: dark runs shorter than {stride} frames may be missed")
+
+        runs, fps, _ = find_dark_runs(video_path, threshold, stride, decoder, width, workers, prefetch, source)
+
     transitions = []
-    dark_start = None
-    dark_frame_count = 0
-    frame_number = 0
-    
-    print(f"Processing video at {fps} FPS...")
-    print(f"Looking for dark frames (max pixel value < {threshold})")
-    print(f"Minimum transition duration: {min_duration} seconds ({min_frames} frames)")
-    
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # Check if frame is dark
-        is_dark = np.max(gray) < threshold
-        
-        # State machine for detecting dark sequences
-        if is_dark:
-            if dark_start is None:
-                dark_start = frame_number
-            dark_frame_count += 1
-        else:
-            if dark_start is not None:
-                # If we had enough dark frames, record the transition
-                if dark_frame_count >= min_frames:
-                    start_time = dark_start / fps
-                    end_time = frame_number / fps
-                    transitions.append((start_time, end_time))
-                    print(f"Found transition: {start_time:.2f}s - {end_time:.2f}s ({dark_frame_count} frames)")
-                
-                dark_start = None
-                dark_frame_count = 0
-        
-        frame_number += 1
-        
-        # Progress indicator every 1000 frames
-        if frame_number % 1000 == 0:
-            duration = frame_number / fps
-            print(f"Processed {duration:.1f} seconds...")
-    
-    # Handle case where video ends during a dark sequence
-    if dark_start is not None and dark_frame_count >= min_frames:
-        start_time = dark_start / fps
-        end_time = frame_number / fps
-        transitions.append((start_time, end_time))
-        print(f"Found transition: {start_time:.2f}s - {end_time:.2f}s ({dark_frame_count} frames)")
-    
-    cap.release()
+    for dark_start, dark_end in runs:
+        # If we had enough dark frames, record the transition
+        dark_frame_count = dark_end - dark_start
+        if dark_frame_count >= min_frames:
+            start_time = dark_start / fps
+            end_time = dark_end / fps
+            transitions.append((start_time, end_time))
+            print(f"Found transition: {start_time:.2f}s - {end_time:.2f}s ({dark_frame_count} frames)")
     
     print(f"\nFound {len(transitions)} transitions")
     return transitions
 
+def benchmark(video_path: str, threshold: int, min_duration: float, stride: int, sample_ms: Optional[float] = None,
+              decoder: str = 'opencv', width: Optional[int] = None, workers: int = 1, prefetch: int = 0):
+    """Time a full scan against a sampled scan of the same video and compare their transitions"""
+    timings = {}
+    results = {}
+    sampled = {'stride': stride, 'sample_ms': sample_ms, 'decoder': decoder, 'width': width, 'workers': workers,
+               'prefetch': prefetch}
+    for name, options in (('full scan', {}), ('sampled', sampled)):
+        start = time.perf_counter()
+        results[name] = detect_dark_transitions(video_path, threshold, min_duration, **options)
+        timings[name] = time.perf_counter() - start
+
+    print("\nBenchmark:")
+    print("-" * 45)
+    for name, seconds in timings.items():
+        print(f"{name:<12} {seconds:8.2f}s  {len(results[name])} transitions")
+    print(f"Speed-up: {timings['full scan'] / max(timings['sampled'], 1e-9):.1f}x")
+    print(f"Identical results: {'yes' if results['full scan'] == results['sampled'] else 'NO'}")
+
 def format_timestamp(seconds: float) -> str:
     """Convert seconds to HH:MM:SS.mmm format"""
     hours = int(seconds // 3600)
@@ -92,6 +303,25 @@ def format_youtube_timestamp(seconds: float) -> str:
     seconds = int(seconds % 60)
     return f"{minutes}:{seconds:02d}"
 
+def print_transitions(transitions: List[Tuple[float, float]]):
+    """Print transitions as a table and as YouTube chapters"""
+    print("\nDetailed transitions:")
+    print("Start Time      End Time        Duration")
+    print("-" * 45)
+    
+    for start, end in transitions:
+        duration = end - start
+        print(f"{format_timestamp(start)}  {format_timestamp(end)}  {duration:.3f}s")
+    
+    # Add YouTube chapters format output
+    print("\nYouTube Chapters Format:")
+    print("------------------------")
+    print("0:00 Introduction")  # Always start with 0:00
+    
+    # Use the end times of transitions as chapter start times
+    for i, (_, end) in enumerate(transitions, 1):
+        print(f"{format_youtube_timestamp(end)} Chapter {i}")
+
 def main():
     parser = argparse.ArgumentParser(description="Detect dark frame transitions in video")
     parser.add_argument("video_path", help="Path to the video file")
@@ -99,6 +329,20 @@ def main():
                       help="Maximum pixel value to consider as dark (0-255)")
     parser.add_argument("--min-duration", type=float, default=0.1,
                       help="Minimum duration in seconds for a transition")
+    parser.add_argument("--stride", type=int, default=1,
+                      help="Check every Nth frame, refining transition edges by binary search")
+    parser.add_argument("--sample-ms", type=float,
+                      help="Check a frame every this many milliseconds (overrides --stride)")
+    parser.add_argument("--decoder", choices=DECODERS, default="opencv",
+                      help="Frame source: full-resolution OpenCV frames, or downscaled gray frames piped from ffmpeg")
+    parser.add_argument("--width", type=int, default=320,
+                      help="Frame width for the ffmpeg decoder")
+    parser.add_argument("--workers", type=int, default=1,
+                      help="Scan this many time ranges of the video in parallel processes")
+    parser.add_argument("--prefetch", type=int, default=0,
+                      help="Decode on a separate thread, this many frames ahead of the analysis (0 = off)")
+    parser.add_argument("--benchmark", action="store_true",
+                      help="Compare the time and results of a full scan with the sampled scan")
     args = parser.parse_args()
     
     video_path = args.video_path
@@ -107,28 +351,23 @@ def main():
         return
     
     try:
+        if args.benchmark:
+            benchmark(video_path, args.threshold, args.min_duration, args.stride, args.sample_ms,
+                      args.decoder, args.width, args.workers, args.prefetch)
+            return
+
         transitions = detect_dark_transitions(
             video_path, 
             threshold=args.threshold,
-            min_duration=args.min_duration
+            min_duration=args.min_duration,
+            stride=args.stride,
+            sample_ms=args.sample_ms,
+            decoder=args.decoder,
+            width=args.width,
+            workers=args.workers,
+            prefetch=args.prefetch
         )
-        
-        print("\nDetailed transitions:")
-        print("Start Time      End Time        Duration")
-        print("-" * 45)
-        
-        for start, end in transitions:
-            duration = end - start
-            print(f"{format_timestamp(start)}  {format_timestamp(end)}  {duration:.3f}s")
-        
-        # Add YouTube chapters format output
-        print("\nYouTube Chapters Format:")
-        print("------------------------")
-        print("0:00 Introduction")  # Always start with 0:00
-        
-        # Use the end times of transitions as chapter start times
-        for i, (_, end) in enumerate(transitions, 1):
-            print(f"{format_youtube_timestamp(end)} Chapter {i}")
+        print_transitions(transitions)
             
     except Exception as e:
         print(f"Error processing video: {e}")
@@ -0,0 +1,147 @@
+import cv2
+import time
+import argparse
+import numpy as np
+from pathlib import Path
+from typing import List, Optional, Tuple
+from frame_sources import open_frame_source, DECODERS
+from detect_dark_transitions import DarkRunTracker, format_timestamp
+
+# Thumbnail the comparison runs on (width, height); 16:9 like the lecture videos
+THUMBNAIL_SIZE = (32, 18)
+
+class SlideChangeDetector:
+    """Streaming slide-change detection on tiny grayscale thumbnails.
+
+    Each frame is area-downsampled to a 32x18 thumbnail and compared with the
+    previous one by mean absolute difference. A jump above `threshold` opens a
+    candidate change, which is confirmed once the new picture holds steady for
+    `settle` seconds, so animations and camera motion do not count. Changes
+    into or out of dark frames are left to the dark-transition detector.
+    """
+
+    def __init__(self, fps: float, threshold: float = 4.0, settle: float = 0.3, min_interval: float = 2.0,
+                 dark_threshold: int = 20, size: Tuple[int, int] = THUMBNAIL_SIZE):
+        self.threshold = threshold
+        self.dark_threshold = dark_threshold
+        self.size = size
+        self.settle_frames = max(1, int(settle * fps))
+        self.min_gap = int(min_interval * fps)
+        self.frame_count = 0
+        self.last_change = -self.min_gap
+        self.candidate = None  # (first frame of the new slide, its thumbnail)
+        # Two preallocated thumbnails: the current frame's and the previous frame's, swapped every frame
+        self.buffers = [np.empty((size[1], size[0]), dtype=np.uint8) for _ in range(2)]
+
+    def thumbnail(self, gray: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """Downsample into a thumbnail buffer"""
+        if gray.shape == out.shape:
+            np.copyto(out, gray)
+        else:
+            cv2.resize(gray, self.size, dst=out, interpolation=cv2.INTER_AREA)
+        return out
+
+    def difference(self, a: np.ndarray, b: np.ndarray) -> float:
+        """Mean absolute pixel difference (0-255)"""
+        return cv2.norm(a, b, cv2.NORM_L1) / a.size
+
+    def is_dark(self, thumb: np.ndarray) -> bool:
+        return thumb.max() < self.dark_threshold
+
+    def suppress(self, frame_number: int):
+        """No change may be reported within min_interval of this frame (e.g. the end of a dark transition)"""
+        self.last_change = max(self.last_change, frame_number)
+        self.candidate = None
+
+    def update(self, gray: np.ndarray) -> Optional[int]:
+        """Feed the next grayscale frame; returns the first frame of a new slide once it is confirmed"""
+        frame_number = self.frame_count
+        self.frame_count += 1
+        thumb = self.thumbnail(gray, self.buffers[frame_number % 2])
+        previous = self.buffers[(frame_number + 1) % 2]
+        change = None
+
+        if frame_number > 0:
+            if self.is_dark(thumb) or self.is_dark(previous):
+                self.candidate = None
+            elif self.candidate is not None:
+                start, reference = self.candidate
+                if self.difference(thumb, reference) > self.threshold:
+                    # Still moving: the new slide starts later, if at all
+                    self.candidate = (frame_number, thumb.copy())
+                elif frame_number - start >= self.settle_frames:
+                    change = start
+                    self.last_change = start
+                    self.candidate = None
+            elif frame_number - self.last_change >= self.min_gap and self.difference(thumb, previous) > self.threshold:
+                self.candidate = (frame_number, thumb.copy())
+        return change
+
+def detect_slide_changes(video_path: str, threshold: float = 4.0, settle: float = 0.3, min_interval: float = 2.0,
+                         dark_threshold: int = 20, decoder: str = 'ffmpeg', width: Optional[int] = 64) -> List[float]:
+    """
+    Detect direct slide changes (cuts without a fade to black) in a video.
+
+    Args:
+        video_path: Path to the video file
+        threshold: Mean absolute thumbnail difference (0-255) that counts as a change
+        settle: Seconds the new slide must stay unchanged to be confirmed
+        min_interval: Minimum seconds between changes, also applied after each dark transition
+        dark_threshold: Maximum pixel value of a dark frame
+        decoder: Frame source; 'ffmpeg' hands over frames already shrunk to `width`
+        width: Frame width for the ffmpeg decoder
+
+    Returns:
+        Start time in seconds of every new slide
+    """
+    changes = []
+    start_time = time.perf_counter()
+    with open_frame_source(video_path, decoder, width) as source:
+        fps = source.fps
+        detector = SlideChangeDetector(fps, threshold, settle, min_interval, dark_threshold)
+        dark_runs = DarkRunTracker(dark_threshold)
+        while True:
+            frame = source.read()
+            if frame is None:
+                break
+            run = dark_runs.update(frame)
+            if run:
+                detector.suppress(run[1])
+            change = detector.update(frame)
+            if change is not None:
+                changes.append(change / fps)
+                print(f"Slide change at {format_timestamp(change / fps)}")
+
+    elapsed = time.perf_counter() - start_time
+    frames = max(detector.frame_count, 1)
+    print(f"\nFound {len(changes)} slide changes in {detector.frame_count} frames "
+          f"({elapsed / frames * 1000:.2f} ms per frame including decode)")
+    return changes
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect slide changes in video")
+    parser.add_argument("video_path", help="Path to the video file")
+    parser.add_argument("--threshold", type=float, default=4.0,
+                      help="Mean absolute thumbnail difference (0-255) that counts as a change")
+    parser.add_argument("--settle", type=float, default=0.3,
+                      help="Seconds a new slide must stay unchanged")
+    parser.add_argument("--min-interval", type=float, default=2.0,
+                      help="Minimum seconds between changes")
+    parser.add_argument("--decoder", choices=DECODERS, default="ffmpeg",
+                      help="Frame source (ffmpeg: frames downscaled before they reach Python)")
+    parser.add_argument("--width", type=int, default=64,
+                      help="Frame width for the ffmpeg decoder")
+    args = parser.parse_args()
+
+    if not Path(args.video_path).exists():
+        print(f"Error: Video file not found: {args.video_path}")
+        return
+
+    try:
+        detect_slide_changes(args.video_path, args.threshold, args.settle, args.min_interval,
+                             decoder=args.decoder, width=args.width)
+    except Exception as e:
+        print(f"Error processing video: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -1,68 +1,68 @@
 import cv2
 import numpy as np
-import pytesseract
 from pathlib import Path
 import json
 import argparse
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
+from detect_dark_transitions import find_dark_runs
+from frame_sources import DECODERS
+from title_ocr import ocr_deduplicated, dhash, HASH_THRESHOLD
+from debug_writer import DebugWriter, DEBUG_LEVELS, COMPRESSION_FLAGS
+from detect_slide_changes import detect_slide_changes
+from frame_bus import FrameBus, DarkRunAnalyzer, SlideChangeAnalyzer, TitleCaptureAnalyzer
 
-def detect_dark_frames(video_path: str, threshold: int = 20, min_duration: float = 0.1) -> List[float]:
+def detect_dark_frames(video_path: str, threshold: int = 20, min_duration: float = 0.1,
+                       decoder: str = 'opencv', width: Optional[int] = None, workers: int = 1,
+                       prefetch: int = 0) -> List[float]:
     """Detect dark frame transitions and return their end times."""
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise ValueError(f"Could not open video file: {video_path}")
-    
-    fps = cap.get(cv2.CAP_PROP_FPS)
+    runs, fps, frame_count = find_dark_runs(video_path, threshold, decoder=decoder, width=width, workers=workers,
+                                            prefetch=prefetch)
     min_frames = int(min_duration * fps)
     
-    transitions = []
-    dark_start = None
-    dark_frame_count = 0
-    frame_number = 0
-    
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        is_dark = np.max(gray) < threshold
-        
-        if is_dark:
-            if dark_start is None:
-                dark_start = frame_number
-            dark_frame_count += 1
-        else:
-            if dark_start is not None and dark_frame_count >= min_frames:
-                # Store the end of dark sequence
-                transitions.append(frame_number)
-                dark_start = None
-                dark_frame_count = 0
-        
-        frame_number += 1
-    
-    cap.release()
+    # Store the end of each long enough dark sequence (one the video ends in has no title after it)
+    transitions = [end for start, end in runs if end - start >= min_frames and end < frame_count]
     return [t / fps for t in transitions]
 
-def capture_title_frame(video_path: str, timestamp: float) -> np.ndarray:
-    """Capture the frame 1 second after the given timestamp."""
+def scan_for_title_frames(video_path: str, threshold: int = 20, min_duration: float = 0.1,
+                          title_delay: float = 1.0, slide_changes: bool = False, slide_delay: float = 0.5,
+                          prefetch: int = 0) -> Tuple[List[Tuple[float, Optional[np.ndarray]]], float]:
+    """Detect dark transitions and grab the frame `title_delay` seconds after each one, in a single decode pass.
+
+    With slide_changes, direct slide cuts are detected on thumbnails of the
+    same frames, and the frame `slide_delay` seconds into each new slide is grabbed too.
+    With prefetch, frames are decoded on a separate thread (see FrameBus).
+    Returns: ([(transition end or slide start time, title frame or None if the video ended first)], fps)
+    """
+    bus = FrameBus(video_path, prefetch=prefetch)
+    dark = bus.register(DarkRunAnalyzer(threshold, min_duration))
+    slides = bus.register(SlideChangeAnalyzer(dark, dark_threshold=threshold)) if slide_changes else None
+    bus.register(TitleCaptureAnalyzer(dark, slides, title_delay=title_delay, slide_delay=slide_delay))
+    return bus.run()['title_frames'], bus.fps
+
+def capture_title_frames(video_path: str, timestamps: List[float], title_delay: float = 1.0,
+                         delays: Optional[List[float]] = None) -> Tuple[List[Optional[np.ndarray]], float]:
+    """Title frames for known transitions (None past the end), grabbed in one forward pass without seeking, and the fps.
+
+    `delays` gives a per-timestamp delay instead of `title_delay`.
+    """
     cap = cv2.VideoCapture(video_path)
     fps = cap.get(cv2.CAP_PROP_FPS)
-    # Wait 1 second after transition
-    frame_number = int(timestamp * fps) + int(fps)
-    
-    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-    ret, frame = cap.read()
+    delays = delays or [title_delay] * len(timestamps)
+    targets = [round(timestamp * fps) + int(delay * fps) for timestamp, delay in zip(timestamps, delays)]
+    frames = {}
+    frame_number = 0
+    for target in sorted(set(targets)):
+        while frame_number <= target and cap.grab():
+            frame_number += 1
+        if frame_number == target + 1:
+            ret, frame = cap.retrieve()
+            frames[target] = frame if ret else None
     cap.release()
-    
-    if not ret:
-        raise ValueError(f"Could not read frame at {timestamp}")
-    
-    return frame
+    return [frames.get(target) for target in targets], fps
 
-def extract_title_area(frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, tuple]:
+def extract_title_area(frame: np.ndarray, mark: bool = True) -> Tuple[np.ndarray, Optional[np.ndarray], tuple]:
     """Extract the top portion of the frame where titles typically appear.
-    Returns: (title_area, marked_frame, (x1,y1,x2,y2))"""
+    Returns: (title_area, marked_frame or None if not mark, (x1,y1,x2,y2))"""
     height, width = frame.shape[:2]
     
     # Define title area (top 20% of frame, focusing on the center 80% width)
@@ -75,8 +75,10 @@ def extract_title_area(frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, tuple
     title_area = frame[y1:y2, x1:x2]
     
     # Create a copy of frame with title area marked
-    marked_frame = frame.copy()
-    cv2.rectangle(marked_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+    marked_frame = None
+    if mark:
+        marked_frame = frame.copy()
+        cv2.rectangle(marked_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
     
     return title_area, marked_frame, (x1, y1, x2, y2)
 
@@ -100,138 +102,190 @@ def preprocess_for_ocr(image: np.ndarray) -> np.ndarray:
     
     return result
 
-def save_debug_images(debug_dir: Path, index: int, frame: np.ndarray, title_area: np.ndarray, 
-                     processed: np.ndarray, marked_frame: np.ndarray, timestamp: float, text: str, video_path: str):
-    """Save debug images and information for analysis."""
-    # Create numbered subdirectory for this transition
-    frame_dir = debug_dir / f"frame_{index:03d}"
-    frame_dir.mkdir(exist_ok=True)
-    
-    # Save original full frame
-    cv2.imwrite(str(frame_dir / "01_full_frame.png"), frame)
-    
-    # Save frame with title area marked
-    cv2.imwrite(str(frame_dir / "02_marked_frame.png"), marked_frame)
-    
-    # Save extracted title area
-    cv2.imwrite(str(frame_dir / "03_title_area.png"), title_area)
-    
-    # Save processed title area
-    cv2.imwrite(str(frame_dir / "04_processed.png"), processed)
-    
-    # Calculate frame number outside of metadata creation
-    cap = cv2.VideoCapture(video_path)
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    cap.release()
-    frame_number = int(timestamp * fps)
-    
-    # Save metadata
-    metadata = {
-        "timestamp": timestamp,
-        "detected_text": text,
-        "frame_number": frame_number
-    }
-    
-    with open(frame_dir / "metadata.json", 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
+VIDEO_EXTENSIONS = {'.mp4', '.mkv', '.mov', '.avi', '.webm', '.m4v'}
+
+def capture_titles(video_path: str, debug: DebugWriter, decoder: str = 'opencv', width: Optional[int] = None,
+                   workers: int = 1, slide_changes: bool = False, prefetch: int = 0) -> Tuple[List[Dict], float]:
+    """Scan one video and prepare an OCR-ready title crop for every transition.
 
-def detect_titles(video_path: str) -> Dict[float, str]:
-    """Detect chapter titles in the video using dark frame detection and OCR."""
+    Debug images are queued here, so full frames are not held until OCR.
+    Returns: ([{index, timestamp, processed}], fps)
+    """
     print(f"\nProcessing video: {video_path}")
     print("="*80)
     
-    # Configure Tesseract for Hebrew
-    pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-    
-    # Custom Tesseract configuration - with exact colors
-    custom_config = (
-        '--oem 3 --psm 7 -l heb+script/Hebrew --dpi 300 '
-        '-c tessedit_write_images=1 '
-        '-c textord_dark_mode_bold=1 '
-        '-c textord_min_linesize=3.0 '
-        '-c tessedit_fg_color=255,255,255 '  # White text
-        '-c tessedit_bg_color=0,0,205 '      # Royal blue background
-        '-c tessedit_preserve_fg_color=1'     # Preserve exact colors
-    )
-    
-    # Detect transitions
-    transitions = detect_dark_frames(video_path)
-    print(f"\nFound {len(transitions)} transitions")
+    # Detect transitions, grabbing each title frame as the decode goes by
+    if decoder == 'opencv' and workers == 1:
+        captures, fps = scan_for_title_frames(video_path, slide_changes=slide_changes, prefetch=prefetch)
+    else:
+        # The alternative scans only see downscaled gray frames; fetch title frames in one more forward pass
+        targets = [(timestamp, 1.0) for timestamp in
+                   detect_dark_frames(video_path, decoder=decoder, width=width, workers=workers, prefetch=prefetch)]
+        if slide_changes:
+            changes = detect_slide_changes(video_path, decoder=decoder, width=64 if decoder == 'ffmpeg' else None)
+            targets = sorted(targets + [(timestamp, 0.5) for timestamp in changes])
+        transitions = [timestamp for timestamp, _ in targets]
+        frames, fps = capture_title_frames(video_path, transitions, delays=[delay for _, delay in targets])
+        captures = list(zip(transitions, frames))
+    print(f"\nFound {len(captures)} transitions")
     print("-"*80)
     
-    # Create output directory for debug images
-    debug_dir = Path("debug_frames") / Path(video_path).stem
-    debug_dir.mkdir(exist_ok=True, parents=True)
-    
-    titles = {}
-    for i, timestamp in enumerate(transitions):
+    crops = []
+    for i, (timestamp, frame) in enumerate(captures):
+        # Frame 1 second after transition, captured during the scan
+        if frame is None:
+            print(f"Error processing transition at {timestamp:.2f}s: Could not read frame at {timestamp}")
+            continue
+        
+        # Extract title area and get marked frame
+        title_area, marked_frame, bbox = extract_title_area(frame, mark=debug.includes('full'))
+        
+        # Preprocess for OCR
+        processed = preprocess_for_ocr(title_area)
+        
+        # Queue debug images for the background writer
+        debug.save_images(video_path, i, {
+            'full_frame': frame,
+            'marked_frame': marked_frame,
+            'title_area': title_area,
+            'processed': processed
+        })
+        crops.append({'index': i, 'timestamp': timestamp, 'processed': processed, 'hash': dhash(title_area)})
+    print(f"Prepared {len(crops)} title crops")
+    return crops, fps
+
+def detect_titles_batch(video_paths: List[str], decoder: str = 'opencv', width: Optional[int] = None,
+                        workers: int = 1, ocr_workers: int = 4, debug: Optional[DebugWriter] = None,
+                        slide_changes: bool = False, hash_threshold: int = HASH_THRESHOLD,
+                        prefetch: int = 0, ocr_engine: Optional[str] = None,
+                        raise_errors: bool = False) -> Dict[str, Dict[float, str]]:
+    """Detect chapter titles in many videos, with one OCR stage over the title crops of all of them.
+
+    Crops whose perceptual hash is within `hash_threshold` bits of an earlier one reuse its text.
+    Debug artifacts go through `debug` (default: metadata only, written in the background).
+    A video that cannot be scanned is reported and left out, or with `raise_errors` stops the batch.
+    """
+    owns_debug = debug is None
+    debug = debug or DebugWriter()
+    try:
+        return _detect_titles_batch(video_paths, decoder, width, workers, ocr_workers, debug, slide_changes,
+                                    hash_threshold, prefetch, ocr_engine, raise_errors)
+    finally:
+        if owns_debug:
+            debug.close()
+
+def _detect_titles_batch(video_paths: List[str], decoder: str, width: Optional[int], workers: int,
+                         ocr_workers: int, debug: DebugWriter, slide_changes: bool,
+                         hash_threshold: int, prefetch: int, ocr_engine: Optional[str],
+                         raise_errors: bool) -> Dict[str, Dict[float, str]]:
+    videos = []
+    for video_path in video_paths:
         try:
-            print(f"\nProcessing transition {i+1}...")
-            
-            # Capture frame after transition
-            frame = capture_title_frame(video_path, timestamp)
-            print("Frame captured")
-            
-            # Extract title area and get marked frame
-            title_area, marked_frame, bbox = extract_title_area(frame)
-            print("Title area extracted")
-            
-            # Preprocess for OCR
-            processed = preprocess_for_ocr(title_area)
-            print("Image preprocessed")
-            
-            # Try OCR with preprocessed image
-            print("Attempting OCR...")
-            text = pytesseract.image_to_string(processed, config=custom_config)
-            text = text.strip()
-            print(f"OCR result: '{text}'")
-            
-            # Save all debug information
-            save_debug_images(debug_dir, i, frame, title_area, processed, 
-                            marked_frame, timestamp, text, video_path)
-            print("Debug images saved")
+            crops, fps = capture_titles(video_path, debug, decoder=decoder, width=width, workers=workers,
+                                        slide_changes=slide_changes, prefetch=prefetch)
+            videos.append((video_path, crops, fps))
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Error processing video {video_path}: {e}")
+    
+    # OCR every distinct crop from every video in one pass over a worker pool
+    all_crops = [crop for _, crops, _ in videos for crop in crops]
+    texts, sources = ocr_deduplicated([crop['processed'] for crop in all_crops], [crop['hash'] for crop in all_crops],
+                                      threshold=hash_threshold, workers=ocr_workers, engine=ocr_engine)
+    for i, (crop, text, source) in enumerate(zip(all_crops, texts, sources)):
+        crop['text'] = text
+        crop['ocr_reused'] = source != i
+    
+    results = {}
+    for video_path, crops, fps in videos:
+        titles = {}
+        for crop in crops:
+            timestamp, text = crop['timestamp'], crop['text']
+            debug.save_metadata(video_path, crop['index'], {
+                "timestamp": timestamp,
+                "detected_text": text,
+                "frame_number": int(timestamp * fps),
+                "title_hash": f"{crop['hash']:x}",
+                "ocr_reused": crop['ocr_reused']
+            })
             
             if text:
                 titles[timestamp] = text
-                print(f"\nTransition {i+1} at {timestamp:.2f}s:")
+                print(f"\nTransition {crop['index']+1} at {timestamp:.2f}s:")
                 print("Detected Text:")
                 print("-"*40)
                 print(text)
                 print("-"*40)
             else:
-                print(f"\nTransition {i+1} at {timestamp:.2f}s: No text detected")
-            
-        except Exception as e:
-            print(f"Error processing transition at {timestamp:.2f}s: {e}")
-            import traceback
-            print(traceback.format_exc())
-    
-    print("\nFinal titles dictionary:", titles)
-    return titles
+                print(f"\nTransition {crop['index']+1} at {timestamp:.2f}s: No text detected")
+        
+        print(f"\nFinal titles dictionary for {video_path}:", titles)
+        results[video_path] = titles
+    return results
+
+def detect_titles(video_path: str, decoder: str = 'opencv', width: Optional[int] = None,
+                  workers: int = 1, ocr_workers: int = 4, debug: Optional[DebugWriter] = None,
+                  slide_changes: bool = False, hash_threshold: int = HASH_THRESHOLD, prefetch: int = 0,
+                  ocr_engine: Optional[str] = None, raise_errors: bool = False) -> Dict[float, str]:
+    """Detect chapter titles in the video using dark frame detection (and optionally slide changes) and OCR."""
+    return detect_titles_batch([video_path], decoder, width, workers, ocr_workers, debug, slide_changes,
+                               hash_threshold, prefetch, ocr_engine, raise_errors).get(video_path, {})
+
+def find_videos(path: Path) -> List[str]:
+    """The video itself, or every video file in a directory"""
+    if path.is_dir():
+        return [str(p) for p in sorted(path.iterdir()) if p.suffix.lower() in VIDEO_EXTENSIONS]
+    return [str(path)]
 
 def main():
     parser = argparse.ArgumentParser(description="Detect chapter titles in video")
-    parser.add_argument("video_path", help="Path to the video file")
-    parser.add_argument("--output", help="Output JSON file path")
+    parser.add_argument("video_path", help="Path to the video file, or a directory of videos")
+    parser.add_argument("--output", help="Output JSON file path (single video only)")
+    parser.add_argument("--decoder", choices=DECODERS, default="opencv",
+                      help="Frame source for the dark frame scan (ffmpeg: downscaled gray frames over a pipe)")
+    parser.add_argument("--width", type=int, default=320,
+                      help="Frame width for the ffmpeg decoder")
+    parser.add_argument("--workers", type=int, default=1,
+                      help="Scan this many time ranges of the video in parallel processes")
+    parser.add_argument("--prefetch", type=int, default=0,
+                      help="Scan for transitions with decoding on a separate thread, this many frames ahead (0 = off)")
+    parser.add_argument("--ocr-workers", type=int, default=4,
+                      help="Parallel OCR engines (or batched tesseract runs) for the title crops")
+    parser.add_argument("--slide-changes", action="store_true",
+                      help="Also look for titles after direct slide changes, not only after fades to black")
+    parser.add_argument("--hash-threshold", type=int, default=HASH_THRESHOLD,
+                      help="Max differing title hash bits for a crop to reuse an earlier crop's OCR text (-1 OCRs every crop)")
+    parser.add_argument("--debug-level", choices=DEBUG_LEVELS, default="metadata",
+                      help="Debug output in debug_frames/: off, metadata (JSON only), crops (+ title crops), full (+ full frames)")
+    parser.add_argument("--debug-format", choices=list(COMPRESSION_FLAGS), default="png",
+                      help="Image format for debug images")
+    parser.add_argument("--debug-compression", type=int,
+                      help="PNG compression level (0-9) or JPEG/WebP quality (0-100)")
     args = parser.parse_args()
     
     try:
-        titles = detect_titles(args.video_path)
-        
-        if args.output:
-            output_path = args.output
-        else:
-            video_path = Path(args.video_path)
-            output_path = video_path.with_suffix('.titles.json')
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(titles, f, ensure_ascii=False, indent=2)
+        video_paths = find_videos(Path(args.video_path))
+        with DebugWriter(level=args.debug_level, image_format=args.debug_format,
+                         compression=args.debug_compression) as debug:
+            results = detect_titles_batch(video_paths, decoder=args.decoder, width=args.width,
+                                          workers=args.workers, ocr_workers=args.ocr_workers, debug=debug,
+                                          slide_changes=args.slide_changes, hash_threshold=args.hash_threshold,
+                                          prefetch=args.prefetch)
         
-        print(f"\nResults saved to {output_path}")
-        print(f"Debug frames saved to debug_frames/")
+        for video_path, titles in results.items():
+            if args.output and len(video_paths) == 1:
+                output_path = args.output
+            else:
+                output_path = Path(video_path).with_suffix('.titles.json')
+            
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(titles, f, ensure_ascii=False, indent=2)
+            
+            print(f"\nResults saved to {output_path}")
         
     except Exception as e:
         print(f"Error processing video: {e}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
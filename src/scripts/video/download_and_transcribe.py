@@ -8,7 +8,7 @@ This script:
 3. Stores transcriptions in a structured format
 
 Requirements:
-    pip install PyVimeo openai-whisper tqdm python-dotenv
+    pip install PyVimeo openai-whisper requests tqdm python-dotenv
     # On Windows, install FFmpeg:
     winget install ffmpeg
     # Or download from https://www.gyan.dev/ffmpeg/builds/ and add to PATH
@@ -20,12 +20,14 @@ import time
 import json
 import vimeo
 import whisper
+import argparse
+import threading
 import subprocess
-from tqdm import tqdm
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional
 from pathlib import Path
-import requests
 from dotenv import load_dotenv
+from http_download import make_session, download_file
 
 # Load environment variables from .env file
 load_dotenv()
@@ -44,7 +46,7 @@ def check_ffmpeg():
         return False
 
 class VideoProcessor:
-    def __init__(self, access_token: str):
+    def __init__(self, access_token: str, download_workers: int = 4):
         """Initialize the Vimeo client and Whisper model."""
         if not check_ffmpeg():
             sys.exit(1)
@@ -68,8 +70,13 @@ class VideoProcessor:
         self.download_dir.mkdir(exist_ok=True)
         self.transcripts_dir.mkdir(exist_ok=True)
         
-        # Load or create progress tracking
+        # Load or create progress tracking; downloads update it from several threads
         self.progress = self.load_progress()
+        self.progress_lock = threading.RLock()
+
+        # One connection pool shared by all downloads
+        self.download_workers = download_workers
+        self.session = make_session(pool_size=download_workers)
         
         # Common Hebrew corrections for safety terms
         self.hebrew_corrections = {
@@ -140,9 +147,15 @@ class VideoProcessor:
         
     def save_progress(self):
         """Save current progress."""
-        with open(self.progress_file, 'w', encoding='utf-8') as f:
+        with self.progress_lock, open(self.progress_file, 'w', encoding='utf-8') as f:
             json.dump(self.progress, f, ensure_ascii=False, indent=2)
 
+    def mark_progress(self, key: str, video_uri: str):
+        """Record a video as downloaded, transcribed or failed, and save."""
+        with self.progress_lock:
+            self.progress[key].append(video_uri)
+            self.save_progress()
+
     def get_all_folders(self) -> List[Dict]:
         """Get all folders from the account."""
         print("\n📁 Fetching all folders...")
@@ -178,25 +191,29 @@ class VideoProcessor:
                 
         return folders
 
-    def get_video_download_link(self, video_uri: str) -> str:
-        """Get the download link for a video."""
+    def get_video_download(self, video_uri: str) -> Optional[Dict]:
+        """Get the best quality download of a video (link, size and md5)."""
         try:
             response = self.client.get(f"{video_uri}")
             data = response.json()
             
-            # Get the best quality download link
             files = data.get('download', [])
             if not files:
                 return None
                 
             # Sort by quality and get the best one
             files.sort(key=lambda x: x.get('width', 0), reverse=True)
-            return files[0].get('link')
+            return files[0]
             
         except Exception as e:
             print(f"Error getting download link: {str(e)}")
             return None
 
+    def get_video_download_link(self, video_uri: str) -> str:
+        """Get the download link for a video."""
+        download = self.get_video_download(video_uri)
+        return download.get('link') if download else None
+
     def download_video(self, video_uri: str, video_name: str) -> str:
         """Download a video from Vimeo."""
         # Use video ID for filename instead of Hebrew name
@@ -209,43 +226,39 @@ class VideoProcessor:
                 return str(output_path.absolute())  # Use absolute path
             else:
                 print(f"  ⚠️ Warning: File marked as downloaded but not found, will download again")
-                self.progress['downloaded'].remove(video_uri)
+                with self.progress_lock:
+                    self.progress['downloaded'].remove(video_uri)
                 
-        download_link = self.get_video_download_link(video_uri)
-        if not download_link:
+        download = self.get_video_download(video_uri)
+        if not download or not download.get('link'):
             print(f"  ❌ No download link found for: {video_name}")
-            self.progress['failed'].append(video_uri)
-            self.save_progress()
+            self.mark_progress('failed', video_uri)
             return None
         
         try:
             print(f"  ⬇️ Downloading: {video_name}")
             print(f"  📂 Saving to: {output_path.absolute()}")
             
-            response = requests.get(download_link, stream=True)
-            total_size = int(response.headers.get('content-length', 0))
+            # Resumes from a .part file left by an interrupted run, and checks Vimeo's size and md5
+            download_file(self.session, download['link'], output_path,
+                          size=download.get('size'), md5=download.get('md5'), desc=video_name)
             
-            with open(output_path, 'wb') as f, tqdm(
-                desc=video_name,
-                total=total_size,
-                unit='iB',
-                unit_scale=True,
-                unit_divisor=1024,
-            ) as pbar:
-                for data in response.iter_content(chunk_size=1024):
-                    size = f.write(data)
-                    pbar.update(size)
-            
-            self.progress['downloaded'].append(video_uri)
-            self.save_progress()
+            self.mark_progress('downloaded', video_uri)
             return str(output_path.absolute())  # Use absolute path
             
         except Exception as e:
             print(f"  ❌ Error downloading {video_name}: {str(e)}")
-            self.progress['failed'].append(video_uri)
-            self.save_progress()
+            self.mark_progress('failed', video_uri)
             return None
 
+    def download_videos(self, videos: List[Dict], workers: int = None) -> Dict[str, str]:
+        """Download several videos at once; returns {video uri: local path or None}."""
+        workers = workers or self.download_workers
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.download_video, video['uri'], video.get('name', 'Untitled')): video['uri']
+                       for video in videos}
+            return {futures[future]: future.result() for future in as_completed(futures)}
+
     def correct_hebrew_text(self, text: str) -> str:
         """Apply corrections to common Hebrew transcription errors."""
         corrected = text
@@ -319,8 +332,7 @@ class VideoProcessor:
             with open(transcript_path, 'w', encoding='utf-8') as f:
                 json.dump(transcript_data, f, ensure_ascii=False, indent=2)
             
-            self.progress['transcribed'].append(video_uri)
-            self.save_progress()
+            self.mark_progress('transcribed', video_uri)
             
             # Optionally remove the video file to save space
             try:
@@ -336,12 +348,15 @@ class VideoProcessor:
             print(f"  📂 Debug - Current working directory: {os.getcwd()}")
             print(f"  📂 Debug - Video path: {video_path.absolute()}")
             print(f"  📂 Debug - Video exists: {video_path.exists()}")
-            self.progress['failed'].append(video_uri)
-            self.save_progress()
+            self.mark_progress('failed', video_uri)
             return None
 
     def process_videos(self, batch_size: int = None):
-        """Process all videos: download and transcribe."""
+        """Process all videos: download and transcribe.
+
+        Up to `download_workers` videos download at once while finished ones
+        are transcribed, and no more than that many wait on disk at a time.
+        """
         # Create directories if they don't exist
         self.download_dir.mkdir(exist_ok=True)
         self.transcripts_dir.mkdir(exist_ok=True)
@@ -377,24 +392,33 @@ class VideoProcessor:
         else:
             videos_to_process = all_videos
         
-        for video in videos_to_process:
-            video_name = video.get('name', 'Untitled')
-            video_uri = video['uri']
-            
-            print(f"\nProcessing: {video_name}")
-            
-            # Download
-            video_path = self.download_video(video_uri, video_name)
+        # A slot is taken before each download and freed once its video is transcribed
+        slots = threading.Semaphore(self.download_workers)
+
+        def download(video: Dict) -> Optional[str]:
+            slots.acquire()
+            video_path = self.download_video(video['uri'], video.get('name', 'Untitled'))
             if not video_path:
-                continue
+                slots.release()
+            return video_path
+
+        with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+            futures = {executor.submit(download, video): video for video in videos_to_process}
+            for future in as_completed(futures):
+                video = futures[future]
+                video_name = video.get('name', 'Untitled')
+                video_path = future.result()
+                if not video_path:
+                    continue
                 
-            # Transcribe
-            transcript = self.transcribe_video(video_path, video_uri, video_name)
-            if transcript:
-                print(f"  ✅ Successfully processed: {video_name}")
-            
-            # Optional: Remove downloaded video to save space
-            # os.remove(video_path)
+                print(f"\nProcessing: {video_name}")
+                try:
+                    # Transcribe (removes the video afterwards)
+                    transcript = self.transcribe_video(video_path, video['uri'], video_name)
+                    if transcript:
+                        print(f"  ✅ Successfully processed: {video_name}")
+                finally:
+                    slots.release()
         
         # Print summary
         print("\n=== Summary ===")
@@ -410,6 +434,11 @@ class VideoProcessor:
 
 def main():
     """Main entry point of the script."""
+    parser = argparse.ArgumentParser(description="Download videos from the Vimeo folders")
+    parser.add_argument("--download-workers", type=int, default=4,
+                      help="Number of videos to download at once")
+    args = parser.parse_args()
+
     access_token = os.getenv('VIMEO_ACCESS_TOKEN')
     
     if not access_token:
@@ -418,7 +447,7 @@ def main():
         print("VIMEO_ACCESS_TOKEN=your_token_here")
         sys.exit(1)
     
-    processor = VideoProcessor(access_token)
+    processor = VideoProcessor(access_token, download_workers=args.download_workers)
     
     # Get all folders
     folders = processor.get_all_folders()
@@ -440,16 +469,14 @@ def main():
                     video_data = item.get('video', {})
                     if video_data and video_data.get('uri'):
                         all_videos.append(video_data)
-                        video_name = video_data.get('name', 'Untitled')
-                        video_uri = video_data['uri']
-                        
-                        print(f"\nDownloading video: {video_name}")
-                        # Only download, don't transcribe
-                        processor.download_video(video_uri, video_name)
                         
         except Exception as e:
             print(f"Error processing folder: {str(e)}")
     
+    # Only download, don't transcribe
+    print(f"\nDownloading {len(all_videos)} videos, {args.download_workers} at a time")
+    processor.download_videos(all_videos)
+    
     print(f"\n=== Download Summary ===")
     print(f"Total videos found: {len(all_videos)}")
     print(f"Successfully downloaded: {len(processor.progress['downloaded'])}")
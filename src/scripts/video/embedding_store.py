@@ -0,0 +1,319 @@
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional, Sequence
+
+import numpy as np
+
+CONFIG_PATH = Path(__file__).parent / 'config.json'
+
+def load_retrieval_config() -> Dict:
+    """Load the retrieval section of config.json"""
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f).get('retrieval', {})
+
+def load_embedding_config() -> Dict:
+    """Embedding model and dimensions from the openai section of config.json, as process_summaries embeds with"""
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        openai_config = json.load(f).get('openai', {})
+    return {'model': openai_config.get('model', 'text-embedding-3-small'),
+            'dimensions': openai_config.get('dimensions')}
+
+def content_hash(text: str) -> str:
+    """Stable hash of a summary's formatted text, used to detect edited summaries"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def summary_hash(summary: Dict) -> str:
+    """Content hash of a summary record, computed for records saved before hashes were stored"""
+    return summary.get('content_hash') or content_hash(summary.get('content', ''))
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale every row to unit length so dot products are cosine similarities"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def normalize_vector(vector) -> np.ndarray:
+    """Convert a single embedding to a unit-length float32 vector"""
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+class EmbeddingStore:
+    """Summary embeddings held as matrices for two-stage retrieval.
+
+    text-embedding-3 models are trained Matryoshka-style: the first N dimensions
+    of a vector, re-normalized, are a usable shorter embedding. The short prefix
+    matrix scores the whole corpus, and only the best candidates are reranked
+    with the full vectors.
+
+    Searches score passage chunks and aggregate them per video (best chunk, or
+    the mean of the best `chunk_top_m`). A summary without chunks counts as a
+    single chunk, which reduces to plain summary-level similarity.
+    """
+
+    def __init__(self, summaries: List[Dict], short_dimensions: int = 256, rerank_candidates: int = 50,
+                 chunk_aggregation: str = 'max', chunk_top_m: int = 2):
+        self.summaries = [s for s in summaries if s.get('embedding')]
+        if not self.summaries:
+            raise ValueError("No summaries with embeddings to index")
+        if chunk_aggregation not in ('max', 'top_m_mean'):
+            raise ValueError(f"Unknown chunk aggregation: {chunk_aggregation}")
+
+        self.full = normalize_rows(np.asarray([s['embedding'] for s in self.summaries], dtype=np.float32))
+        self.short_dimensions = min(short_dimensions, self.full.shape[1])
+        self.rerank_candidates = rerank_candidates
+        self.chunk_aggregation = chunk_aggregation
+        self.chunk_top_m = chunk_top_m
+        self._build_chunks()
+
+    def _build_chunks(self):
+        """Stack chunk embeddings, with a padded (videos x max chunks) table of chunk rows per video"""
+        vectors, self.chunk_ids, self.chunk_texts, rows_per_video = [], [], [], []
+        for summary in self.summaries:
+            chunks = [c for c in summary.get('chunks', []) if c.get('embedding')]
+            if not chunks:
+                chunks = [{'chunk_id': None, 'text': summary.get('content', ''), 'embedding': summary['embedding']}]
+            rows_per_video.append(list(range(len(vectors), len(vectors) + len(chunks))))
+            for chunk in chunks:
+                vectors.append(chunk['embedding'])
+                self.chunk_ids.append(chunk['chunk_id'])
+                self.chunk_texts.append(chunk['text'])
+
+        self.chunk_full = normalize_rows(np.asarray(vectors, dtype=np.float32))
+        self.chunk_short = normalize_rows(np.ascontiguousarray(self.chunk_full[:, :self.short_dimensions]))
+        width = max(len(rows) for rows in rows_per_video)
+        self.chunk_slots = np.full((len(rows_per_video), width), -1, dtype=np.int64)
+        for video, rows in enumerate(rows_per_video):
+            self.chunk_slots[video, :len(rows)] = rows
+        self._chunk_row = {chunk_id: row for row, chunk_id in enumerate(self.chunk_ids) if chunk_id}
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None, **overrides) -> 'EmbeddingStore':
+        """Build a store from a processed_summaries.json file using config.json defaults"""
+        config = load_retrieval_config()
+        path = path or config.get('summaries', 'data/videos/embeddings/processed_summaries.json')
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        options = {
+            'short_dimensions': config.get('short_dimensions', 256),
+            'rerank_candidates': config.get('rerank_candidates', 50),
+            'chunk_aggregation': config.get('chunk_aggregation', 'max'),
+            'chunk_top_m': config.get('chunk_top_m', 2)
+        }
+        options.update(overrides)
+        return cls(data['summaries'], **options)
+
+    def __len__(self) -> int:
+        return len(self.summaries)
+
+    def chunk_text(self, chunk_id: str) -> Optional[str]:
+        """Text of a passage chunk, so callers can show the matching passage"""
+        row = self._chunk_row.get(chunk_id)
+        return self.chunk_texts[row] if row is not None else None
+
+    def _reduce(self, padded: np.ndarray) -> np.ndarray:
+        """Video scores from chunk scores padded with -inf along the last axis"""
+        if self.chunk_aggregation == 'max':
+            return padded.max(axis=-1)
+        top = -np.sort(-padded, axis=-1)[..., :self.chunk_top_m]
+        valid = np.isfinite(top)
+        return np.where(valid, top, 0.0).sum(axis=-1) / valid.sum(axis=-1)
+
+    def _aggregate(self, chunk_scores: np.ndarray, slots: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-video scores from chunk scores, plus the best chunk row of each video"""
+        padded = np.where(slots >= 0, chunk_scores[slots], -np.inf)
+        best_rows = slots[np.arange(len(slots)), np.argmax(padded, axis=1)]
+        return self._reduce(padded), best_rows
+
+    def _results(self, videos: np.ndarray, scores: np.ndarray, best_rows: np.ndarray, top_k: int) -> List[Tuple[int, float, Optional[str]]]:
+        """Top-k (summary index, score, best chunk id) triples from aggregated scores"""
+        order = top_indices(scores, top_k)
+        return [(int(videos[i]), float(scores[i]), self.chunk_ids[best_rows[i]]) for i in order]
+
+    def exhaustive_passages(self, query_embedding, top_k: int = 10) -> List[Tuple[int, float, Optional[str]]]:
+        """Score every chunk with the full vectors. Returns (index, similarity, best chunk id) triples."""
+        chunk_scores = self.chunk_full @ normalize_vector(query_embedding)
+        scores, best_rows = self._aggregate(chunk_scores, self.chunk_slots)
+        return self._results(np.arange(len(self)), scores, best_rows, top_k)
+
+    def search_passages(self, query_embedding, top_k: int = 10) -> List[Tuple[int, float, Optional[str]]]:
+        """Short-prefix pass over all chunks, then full-vector rerank of the candidate videos' chunks.
+
+        Returned similarities are always full-dimension cosine similarities.
+        """
+        query = normalize_vector(query_embedding)
+        n_candidates = max(self.rerank_candidates, top_k)
+        if n_candidates >= len(self) or self.short_dimensions >= self.full.shape[1]:
+            return self.exhaustive_passages(query, top_k)
+
+        coarse, _ = self._aggregate(self.chunk_short @ normalize_vector(query[:self.short_dimensions]), self.chunk_slots)
+        candidates = top_indices(coarse, n_candidates)
+        slots = self.chunk_slots[candidates]
+        rows = slots[slots >= 0]
+        chunk_scores = np.full(len(self.chunk_ids), -np.inf, dtype=np.float32)
+        chunk_scores[rows] = self.chunk_full[rows] @ query
+        scores, best_rows = self._aggregate(chunk_scores, slots)
+        return self._results(candidates, scores, best_rows, top_k)
+
+    def score_passages(self, query_embedding, indices: List[int]) -> List[Tuple[int, float, Optional[str]]]:
+        """Full-vector (index, similarity, best chunk id) of the given summaries, e.g. ones a search may have missed"""
+        if not indices:
+            return []
+        videos = np.asarray(indices, dtype=np.int64)
+        slots = self.chunk_slots[videos]
+        rows = slots[slots >= 0]
+        chunk_scores = np.full(len(self.chunk_ids), -np.inf, dtype=np.float32)
+        chunk_scores[rows] = self.chunk_full[rows] @ normalize_vector(query_embedding)
+        scores, best_rows = self._aggregate(chunk_scores, slots)
+        return [(int(video), float(score), self.chunk_ids[row]) for video, score, row in zip(videos, scores, best_rows)]
+
+    def score_matrix(self, queries: np.ndarray, videos: Optional[Sequence[int]] = None,
+                     batch_size: int = 256) -> np.ndarray:
+        """Full-vector scores of row-normalized queries against videos (all by default), aggregated over
+        chunks exactly as the searches do. Returns a (queries x videos) matrix.
+        """
+        videos = np.arange(len(self)) if videos is None else np.asarray(videos, dtype=np.int64)
+        slots = self.chunk_slots[videos]
+        rows = np.unique(slots[slots >= 0])
+        # Only the chunks of the requested videos are scored; renumber their slots to match
+        local = np.full(len(self.chunk_ids), -1, dtype=np.int64)
+        local[rows] = np.arange(len(rows))
+        local_slots = np.where(slots >= 0, local[slots], -1)
+        chunks = self.chunk_full[rows]
+        scores = np.empty((len(queries), len(videos)), dtype=np.float32)
+        for start in range(0, len(queries), batch_size):
+            chunk_scores = queries[start:start + batch_size] @ chunks.T
+            padded = np.where(local_slots >= 0, chunk_scores[:, local_slots], -np.inf)
+            scores[start:start + batch_size] = self._reduce(padded)
+        return scores
+
+    def exhaustive_search(self, query_embedding, top_k: int = 10) -> List[Tuple[int, float]]:
+        """Score every summary with the full vectors. Returns (index, similarity) pairs."""
+        return [(index, score) for index, score, _ in self.exhaustive_passages(query_embedding, top_k)]
+
+    def search(self, query_embedding, top_k: int = 10) -> List[Tuple[int, float]]:
+        """Two-stage search returning (index, similarity) pairs"""
+        return [(index, score) for index, score, _ in self.search_passages(query_embedding, top_k)]
+
+def load_query_embeddings(path: str) -> List[List[float]]:
+    """Load query vectors from a question embeddings file or a processed summaries file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    records = data.get('questions') or data.get('summaries') or []
+    return [r['embedding'] for r in records if r.get('embedding')]
+
+def time_queries(search, queries: List, top_k: int) -> Tuple[List[List[int]], List[float]]:
+    """Run every query through a search function, collecting result ids and latencies in ms"""
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        matches = search(query, top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([index for index, _ in matches])
+    return results, latencies
+
+def latency_stats(latencies: List[float]) -> Dict:
+    """Mean and tail latency in milliseconds"""
+    values = np.asarray(latencies)
+    return {
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95))
+    }
+
+def retrieval_report(summaries: List[Dict], queries: List, dimensions: List[int],
+                     rerank_candidates: int, top_k: int = 10, chunk_aggregation: str = 'max',
+                     chunk_top_m: int = 2) -> Dict:
+    """Compare two-stage search against exhaustive full-vector search.
+
+    Recall@k is measured against the exhaustive result, so 1.0 means the
+    shortened first pass never dropped a true top-k summary.
+    """
+    options = {'rerank_candidates': rerank_candidates, 'chunk_aggregation': chunk_aggregation,
+               'chunk_top_m': chunk_top_m}
+    baseline_store = EmbeddingStore(summaries, short_dimensions=dimensions[0], **options)
+    exact, exact_latencies = time_queries(baseline_store.exhaustive_search, queries, top_k)
+
+    report = {
+        'corpus_size': len(baseline_store),
+        'full_dimensions': int(baseline_store.full.shape[1]),
+        'queries': len(queries),
+        'top_k': top_k,
+        'rerank_candidates': rerank_candidates,
+        'chunk_aggregation': chunk_aggregation,
+        'exhaustive': latency_stats(exact_latencies),
+        'two_stage': []
+    }
+
+    for short_dimensions in dimensions:
+        store = EmbeddingStore(summaries, short_dimensions=short_dimensions, **options)
+        found, latencies = time_queries(store.search, queries, top_k)
+        recalls = [len(set(f) & set(e)) / len(e) for f, e in zip(found, exact) if e]
+        report['two_stage'].append({
+            'short_dimensions': store.short_dimensions,
+            f'recall@{top_k}': float(np.mean(recalls)) if recalls else 0.0,
+            **latency_stats(latencies)
+        })
+
+    return report
+
+def print_report(report: Dict):
+    """Print the latency/recall report as a table"""
+    top_k = report['top_k']
+    print(f"\nCorpus: {report['corpus_size']} summaries, {report['full_dimensions']} dimensions")
+    print(f"Queries: {report['queries']}, top-{top_k}, rerank candidates: {report['rerank_candidates']}")
+    print("\nMode              Dims   Recall    Mean ms   P95 ms")
+    print("-" * 55)
+    exhaustive = report['exhaustive']
+    print(f"{'exhaustive':<16}  {report['full_dimensions']:>5}   {1.0:.3f}   {exhaustive['mean_ms']:8.3f} {exhaustive['p95_ms']:8.3f}")
+    for row in report['two_stage']:
+        print(f"{'two-stage':<16}  {row['short_dimensions']:>5}   {row[f'recall@{top_k}']:.3f}   {row['mean_ms']:8.3f} {row['p95_ms']:8.3f}")
+
+def main():
+    config = load_retrieval_config()
+    parser = argparse.ArgumentParser(description="Latency/recall report for two-stage embedding retrieval")
+    parser.add_argument("--summaries", default=config.get('summaries', 'data/videos/embeddings/processed_summaries.json'),
+                      help="Processed summaries file with embeddings")
+    parser.add_argument("--queries", help="Question embeddings file (defaults to using the summaries as queries)")
+    parser.add_argument("--dims", type=int, nargs='+', default=[64, 128, 256, 512],
+                      help="Short prefix dimensions to compare")
+    parser.add_argument("--candidates", type=int, default=config.get('rerank_candidates', 50),
+                      help="Number of first-pass candidates reranked with full vectors")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--chunk-aggregation", choices=['max', 'top_m_mean'],
+                      default=config.get('chunk_aggregation', 'max'),
+                      help="How chunk scores combine into a video score")
+    parser.add_argument("--chunk-top-m", type=int, default=config.get('chunk_top_m', 2))
+    parser.add_argument("--output", default=config.get('report', 'data/evaluation_results/retrieval_report.json'))
+    args = parser.parse_args()
+
+    with open(args.summaries, 'r', encoding='utf-8') as f:
+        summaries = json.load(f)['summaries']
+    queries = load_query_embeddings(args.queries or args.summaries)
+    if not queries:
+        print("No query embeddings found")
+        return
+
+    report = retrieval_report(summaries, queries, args.dims, args.candidates, args.top_k,
+                              args.chunk_aggregation, args.chunk_top_m)
+    report['query_source'] = args.queries or args.summaries
+    print_report(report)
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nReport saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 from supabase import create_client, Client
 import sys
 from typing import Optional, Tuple, List, Dict, Any
+from embedding_store import EmbeddingStore, load_embedding_config
+from question_text import create_question_embedding_text, get_hebrew_subtopic_name
 
 # Load environment variables
 load_dotenv()
@@ -27,10 +29,14 @@ def get_embedding(text: str) -> list[float]:
             print(f"Error: Input text must be a non-empty string. Got: {text}")
             return None
             
+        # Same model and dimensions as the summary embeddings, so the vectors are comparable
+        embedding_config = load_embedding_config()
+        options = {'dimensions': embedding_config['dimensions']} if embedding_config.get('dimensions') else {}
         response = client.embeddings.create(
-            model="text-embedding-3-small",
+            model=embedding_config['model'],
             input=text.strip(),  # Ensure text is stripped of whitespace
-            encoding_format="float"
+            encoding_format="float",
+            **options
         )
         return response.data[0].embedding
     except Exception as e:
@@ -90,94 +96,6 @@ def format_video_info(match):
     
     return f"שיעור {lesson_num}.{segment_num} - {lesson_name} - {video_title}"
 
-def get_hebrew_subtopic_name(subtopic_id: str) -> str:
-    """Get Hebrew subtopic name from construction_safety.json"""
-    if not subtopic_id:
-        raise ValueError("No subtopic ID provided")
-        
-    try:
-        with open('data/subjects/construction_safety.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-            # Search through all topics and their subtopics
-            for topic in data['topics']:
-                for subtopic in topic['subTopics']:
-                    if subtopic['id'] == subtopic_id:
-                        return subtopic['name']
-                        
-            # If we get here, we didn't find the subtopic
-            raise ValueError(f"Could not find Hebrew name for subtopic: {subtopic_id}")
-            
-    except FileNotFoundError:
-        raise ValueError("Could not find construction_safety.json")
-    except json.JSONDecodeError:
-        raise ValueError("Error parsing construction_safety.json")
-    except Exception as e:
-        raise ValueError(f"Error loading Hebrew subtopic name: {str(e)}")
-
-def create_question_embedding_text(question_data: dict) -> str:
-    """Single source of truth for creating the embedding text from question data."""
-    
-    try:
-        # Extract all required components
-        metadata = question_data.get('metadata', {})
-        subtopic_id = metadata.get('subtopicId', '')
-        
-        # Try to get Hebrew name - if we can't, log and exit
-        try:
-            subtopic_name = get_hebrew_subtopic_name(subtopic_id)
-            print(f"\nFound subtopic: {subtopic_name} (ID: {subtopic_id})")
-        except ValueError as e:
-            print(f"\nError: לא נמצא שם בעברית לתת-נושא {subtopic_id}")
-            print(f"פרטי השגיאה: {str(e)}")
-            sys.exit(1)
-            
-        # Get the question text
-        question_text = question_data.get('content', {}).get('text', '')
-        
-        # Format options with Hebrew letters if they exist
-        hebrew_letters = ['א', 'ב', 'ג', 'ד', 'ה', 'ו', 'ז', 'ח', 'ט', 'י']
-        content_options = question_data.get('content', {}).get('options', [])
-        options_text = ""
-        if content_options:
-            options_text = "\n\n" + "\n".join(
-                f"{hebrew_letters[i]}. {opt['text'] if isinstance(opt, dict) else str(opt)}"
-                for i, opt in enumerate(content_options)
-            )
-        
-        # Get solution and answer if they exist
-        school_answer = question_data.get('schoolAnswer', {})
-        solution = school_answer.get('solution', '')
-        solution_text = solution['text'] if isinstance(solution, dict) else solution
-        
-        # For multiple choice questions, add the correct answer
-        final_answer = school_answer.get('finalAnswer', {})
-        answer_text = ""
-        if content_options and final_answer:
-            final_answer_value = final_answer.get('value', 1) if isinstance(final_answer, dict) else final_answer
-            try:
-                final_answer_value = int(final_answer_value)
-                correct_letter = hebrew_letters[final_answer_value - 1]
-                correct_text = content_options[final_answer_value - 1]['text']
-                answer_text = f"\n\nהתשובה הנכונה היא {correct_letter}. {correct_text}"
-            except (ValueError, IndexError):
-                pass
-        
-        # Build the final text
-        result = f"""שיעור ב{subtopic_name}
-המיקוד בשאלה:
-{question_text}{options_text}{answer_text}"""
-
-        # Add explanation if it exists
-        if solution_text:
-            result += f"\n\nהסבר:\n{solution_text}"
-            
-        return result
-        
-    except Exception as e:
-        print(f"\nשגיאה ביצירת טקסט לשאלה: {str(e)}")
-        sys.exit(1)
-
 def create_structured_question_text(question_data):
     """Create structured text from question data"""
     return create_question_embedding_text(question_data)
@@ -199,23 +117,36 @@ def calculate_final_score(base_similarity: float, solution_similarity: float, ti
         
     return score
 
-def find_matches(question_embedding: list[float], question_data: dict, top_k: int = 10):
+# Two-stage store over the processed summaries, built on first use and shared by later searches
+_store: Optional[EmbeddingStore] = None
+
+def load_store() -> EmbeddingStore:
+    """The embedding store for processed_summaries.json, loaded once per process"""
+    global _store
+    if _store is None:
+        _store = EmbeddingStore.from_file()
+    return _store
+
+def find_matches(question_embedding: list[float], question_data: dict, top_k: int = 10,
+                 store: Optional[EmbeddingStore] = None):
     """Find top k matches using semantic similarity with small subtopic boost"""
     try:
-        # Load processed summaries
-        with open('data/videos/embeddings/processed_summaries.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        store = store or load_store()
             
         results = []
         manager_video = None
         
-        # Calculate scores for all videos
-        for doc in data['summaries']:
-            if doc['embedding'] is None:
-                continue
-                
-            # Calculate semantic similarity
-            similarity = cosine_similarity(question_embedding, doc['embedding'])
+        # Short-prefix pass over all videos, full-vector similarity for the candidates
+        candidates = store.search_passages(question_embedding, top_k=max(top_k, store.rerank_candidates))
+        
+        # The manager video is always reported, so score it even if the prefix pass missed it
+        found = {index for index, _, _ in candidates}
+        managers = [index for index, doc in enumerate(store.summaries)
+                    if doc.get('isManagerVideo') and index not in found]
+        candidates += store.score_passages(question_embedding, managers)
+        
+        for index, similarity, chunk_id in candidates:
+            doc = store.summaries[index]
             
             # Small boost for same subtopic (2.5%)
             subtopic_boost = 0.025 if doc.get('subtopic_id') == question_data.get('metadata', {}).get('subtopicId') else 0.0
@@ -224,6 +155,8 @@ def find_matches(question_embedding: list[float], question_data: dict, top_k: in
             # Store result with similarity and boost
             match = {
                 **doc,
+                'matched_chunk_id': chunk_id,
+                'matched_passage': store.chunk_text(chunk_id) if chunk_id else None,
                 'score_breakdown': {
                     'base_similarity': similarity,
                     'solution_similarity': 0.0,  # Kept for compatibility
@@ -309,6 +242,10 @@ def write_results(results_file: str, embedding_text: str, results: dict):
             vimeo_url = f"https://vimeo.com/{video_id}"
             f.write(f"Video URL: {vimeo_url}\n")
             
+            if match.get('matched_passage'):
+                f.write(f"\nMatched Passage ({match['matched_chunk_id']}):\n")
+                f.write(f"{match['matched_passage']}\n")
+            
             f.write("\nContent Preview:\n")
             f.write(f"{match.get('content', 'N/A')}\n")
             
@@ -0,0 +1,313 @@
+import cv2
+import time
+import argparse
+import numpy as np
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from detect_dark_transitions import DarkRunTracker, format_timestamp
+from detect_slide_changes import SlideChangeDetector
+from frame_sources import OpenCVFrameSource, PrefetchedFrames
+
+class FrameAnalyzer(ABC):
+    """One consumer of a FrameBus.
+
+    Subclasses declare the frames they need with `width` (None for the source
+    resolution), `color` (BGR instead of grayscale) and `sample_ms` (None for
+    every frame), and implement `process`. Frames are shared with the other
+    analyzers and reused by the bus: never modify one, and copy it to keep it.
+    """
+
+    name = 'analyzer'
+    width: Optional[int] = None
+    color = False
+    sample_ms: Optional[float] = None
+
+    def start(self, fps: float, frame_count: int):
+        """Called once before the first frame"""
+        self.fps = fps
+        self.frame_count = frame_count
+        self.step = max(1, round(self.sample_ms * fps / 1000)) if self.sample_ms else 1
+
+    def wants(self, frame_number: int) -> bool:
+        """Whether this frame should be passed to `process`"""
+        return frame_number % self.step == 0
+
+    @abstractmethod
+    def process(self, frame_number: int, frame: np.ndarray):
+        """Analyze one wanted frame"""
+
+    def finish(self):
+        """Called after the last frame; returns the analyzer's result"""
+        return None
+
+class FrameBus:
+    """Decodes a video once and fans every frame out to the registered analyzers.
+
+    Each frame is only retrieved (decoded to pixels) if some analyzer wants
+    it, and every (width, color) view of it is computed once and shared.
+    Analyzers see a frame in registration order, so one may react to
+    another's events for the same frame (e.g. capture the frame a dark run
+    ends on).
+
+    With `prefetch`, a background thread decodes every frame into a ring of
+    that many color frames while the analyzers work on earlier ones.
+    """
+
+    def __init__(self, video_path: str, prefetch: int = 0):
+        self.video_path = video_path
+        self.prefetch = prefetch
+        self.analyzers: List[FrameAnalyzer] = []
+        self.fps = None
+
+    def register(self, analyzer: FrameAnalyzer) -> FrameAnalyzer:
+        if any(other.name == analyzer.name for other in self.analyzers):
+            raise ValueError(f"An analyzer named {analyzer.name} is already registered")
+        self.analyzers.append(analyzer)
+        return analyzer
+
+    def _view(self, views: Dict, frame: np.ndarray, width: Optional[int], color: bool) -> np.ndarray:
+        """The frame at the given width and color mode, computed once per frame"""
+        key = (width if width and width < frame.shape[1] else None, color)
+        if key not in views:
+            if key[0] is None:
+                views[key] = frame if color else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            else:
+                # Downscale from the full-resolution view of the same color mode
+                full = self._view(views, frame, None, color)
+                height = max(1, round(frame.shape[0] * key[0] / frame.shape[1]))
+                views[key] = cv2.resize(full, (key[0], height), interpolation=cv2.INTER_AREA)
+        return views[key]
+
+    def _dispatch(self, frame_number: int, retrieve: Callable[[], Optional[np.ndarray]]) -> int:
+        """Pass one frame to the analyzers that want it; returns 1 if it had to be retrieved, else 0"""
+        frame = None
+        views = {}
+        for analyzer in self.analyzers:
+            if not analyzer.wants(frame_number):
+                continue
+            if frame is None:
+                frame = retrieve()
+                if frame is None:
+                    return 0
+            analyzer.process(frame_number, self._view(views, frame, analyzer.width, analyzer.color))
+        return int(frame is not None)
+
+    def run(self) -> Dict[str, object]:
+        """Decode the whole video; returns {analyzer name: result}"""
+        source = OpenCVFrameSource(self.video_path, color=True)
+        self.fps = source.fps
+        frame_count = int(source.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        for analyzer in self.analyzers:
+            analyzer.start(self.fps, frame_count)
+
+        start_time = time.perf_counter()
+        frame_number = 0
+        retrieved = 0
+        try:
+            if self.prefetch:
+                # Every frame is decoded ahead, as the thread cannot know which ones will be wanted
+                frames = PrefetchedFrames(source, slots=self.prefetch)
+                for frame_number, frame in frames:
+                    retrieved += self._dispatch(frame_number, lambda: frame)
+                frame_number = frames.stopped_at
+            else:
+                cap = source.cap
+                while cap.grab():
+                    retrieved += self._dispatch(frame_number, lambda: cap.retrieve()[1])
+                    frame_number += 1
+        finally:
+            source.close()
+
+        elapsed = time.perf_counter() - start_time
+        print(f"Frame bus: {frame_number} frames ({retrieved} retrieved) for {len(self.analyzers)} analyzers "
+              f"in {elapsed:.1f}s ({elapsed / max(frame_number, 1) * 1000:.2f} ms per frame)")
+        if self.prefetch:
+            print(f"Prefetch: {frames.stats()}")
+        return {analyzer.name: analyzer.finish() for analyzer in self.analyzers}
+
+class DarkRunAnalyzer(FrameAnalyzer):
+    """Dark runs of at least `min_duration` seconds, as (first dark frame, first frame after).
+
+    Listeners are called with each run as it ends. A run the video ends in
+    is part of the result but not announced, as no title follows it.
+    """
+
+    name = 'dark_runs'
+
+    def __init__(self, threshold: int = 20, min_duration: float = 0.1, width: Optional[int] = None):
+        self.threshold = threshold
+        self.min_duration = min_duration
+        self.width = width
+        self.listeners: List[Callable[[Tuple[int, int]], None]] = []
+        self.runs = []
+
+    def start(self, fps: float, frame_count: int):
+        super().start(fps, frame_count)
+        self.tracker = DarkRunTracker(self.threshold)
+        self.min_frames = int(self.min_duration * fps)
+
+    def process(self, frame_number: int, frame: np.ndarray):
+        run = self.tracker.update(frame)
+        if run and run[1] - run[0] >= self.min_frames:
+            self.runs.append(run)
+            for listener in self.listeners:
+                listener(run)
+
+    def finish(self) -> List[Tuple[int, int]]:
+        run = self.tracker.finish()
+        if run and run[1] - run[0] >= self.min_frames:
+            self.runs.append(run)
+        return self.runs
+
+class SlideChangeAnalyzer(FrameAnalyzer):
+    """First frames of new slides (see SlideChangeDetector); changes right after a dark run are suppressed"""
+
+    name = 'slide_changes'
+
+    def __init__(self, dark: Optional[DarkRunAnalyzer] = None, dark_threshold: int = 20,
+                 width: Optional[int] = None, **detector_options):
+        self.dark_threshold = dark_threshold
+        self.width = width
+        self.detector_options = detector_options
+        self.listeners: List[Callable[[int, int], None]] = []
+        self.changes = []
+        if dark:
+            dark.listeners.append(lambda run: self.detector.suppress(run[1]))
+
+    def start(self, fps: float, frame_count: int):
+        super().start(fps, frame_count)
+        self.detector = SlideChangeDetector(fps, dark_threshold=self.dark_threshold, **self.detector_options)
+
+    def process(self, frame_number: int, frame: np.ndarray):
+        change = self.detector.update(frame)
+        if change is not None:
+            self.changes.append(change)
+            for listener in self.listeners:
+                listener(change, frame_number)
+
+    def finish(self) -> List[int]:
+        return self.changes
+
+class TitleCaptureAnalyzer(FrameAnalyzer):
+    """Full-resolution color frame `title_delay` seconds after each dark run (and `slide_delay` into each new slide).
+
+    Only the scheduled frames are requested from the bus.
+    Result: [(transition end or slide start time, frame or None if the video ended first)] in time order.
+    """
+
+    name = 'title_frames'
+    color = True
+
+    def __init__(self, dark: DarkRunAnalyzer, slides: Optional[SlideChangeAnalyzer] = None,
+                 title_delay: float = 1.0, slide_delay: float = 0.5):
+        self.title_delay = title_delay
+        self.slide_delay = slide_delay
+        self.captures = []
+        self.pending = {}  # title frame number -> indices into captures
+        dark.listeners.append(self.on_dark_run)
+        if slides:
+            slides.listeners.append(self.on_slide_change)
+
+    def _schedule(self, timestamp: float, frame_number: int):
+        self.captures.append([timestamp, None])
+        self.pending.setdefault(frame_number, []).append(len(self.captures) - 1)
+
+    def on_dark_run(self, run: Tuple[int, int]):
+        self._schedule(run[1] / self.fps, run[1] + int(self.title_delay * self.fps))
+
+    def on_slide_change(self, change: int, frame_number: int):
+        # Confirmed only after the slide settled; grab its frame now if that point has already passed
+        self._schedule(change / self.fps, max(change + int(self.slide_delay * self.fps), frame_number))
+
+    def wants(self, frame_number: int) -> bool:
+        return frame_number in self.pending
+
+    def process(self, frame_number: int, frame: np.ndarray):
+        for index in self.pending.pop(frame_number):
+            self.captures[index][1] = frame.copy()
+
+    def finish(self) -> List[Tuple[float, Optional[np.ndarray]]]:
+        self.captures.sort(key=lambda capture: capture[0])
+        return [tuple(capture) for capture in self.captures]
+
+class ThumbnailSheetAnalyzer(FrameAnalyzer):
+    """A sprite sheet of one thumbnail every `interval` seconds, written to `output_path`"""
+
+    name = 'thumbnails'
+    color = True
+
+    def __init__(self, output_path: str, interval: float = 10.0, width: int = 160, columns: int = 10):
+        self.output_path = Path(output_path)
+        self.sample_ms = interval * 1000
+        self.width = width
+        self.columns = columns
+        self.thumbnails = []
+        self.timestamps = []
+
+    def process(self, frame_number: int, frame: np.ndarray):
+        self.thumbnails.append(frame.copy())
+        self.timestamps.append(frame_number / self.fps)
+
+    def finish(self) -> Optional[Dict]:
+        if not self.thumbnails:
+            return None
+        height, width = self.thumbnails[0].shape[:2]
+        columns = min(self.columns, len(self.thumbnails))
+        rows = -(-len(self.thumbnails) // columns)
+        sheet = np.zeros((rows * height, columns * width, 3), dtype=np.uint8)
+        for i, thumbnail in enumerate(self.thumbnails):
+            row, column = divmod(i, columns)
+            sheet[row * height:(row + 1) * height, column * width:(column + 1) * width] = thumbnail
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        if not cv2.imwrite(str(self.output_path), sheet):
+            raise IOError(f"Could not write {self.output_path}")
+        return {
+            'path': str(self.output_path),
+            'tile_size': [width, height],
+            'columns': columns,
+            'timestamps': self.timestamps
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several frame analyzers over one decode of a video")
+    parser.add_argument("video_path", help="Path to the video file")
+    parser.add_argument("--threshold", type=int, default=20,
+                      help="Maximum pixel value of a dark frame")
+    parser.add_argument("--slide-changes", action="store_true",
+                      help="Also detect direct slide changes")
+    parser.add_argument("--sprite-sheet",
+                      help="Write a thumbnail sprite sheet to this image path")
+    parser.add_argument("--sprite-interval", type=float, default=10.0,
+                      help="Seconds between sprite sheet thumbnails")
+    parser.add_argument("--prefetch", type=int, default=0,
+                      help="Decode on a separate thread, this many frames ahead (0 = off)")
+    args = parser.parse_args()
+
+    if not Path(args.video_path).exists():
+        print(f"Error: Video file not found: {args.video_path}")
+        return
+
+    bus = FrameBus(args.video_path, prefetch=args.prefetch)
+    dark = bus.register(DarkRunAnalyzer(args.threshold))
+    if args.slide_changes:
+        bus.register(SlideChangeAnalyzer(dark, dark_threshold=args.threshold))
+    if args.sprite_sheet:
+        bus.register(ThumbnailSheetAnalyzer(args.sprite_sheet, interval=args.sprite_interval))
+
+    try:
+        results = bus.run()
+    except Exception as e:
+        print(f"Error processing video: {e}")
+        return
+
+    for start, end in results['dark_runs']:
+        print(f"Dark run {format_timestamp(start / bus.fps)} - {format_timestamp(end / bus.fps)}")
+    for change in results.get('slide_changes', []):
+        print(f"Slide change at {format_timestamp(change / bus.fps)}")
+    if results.get('thumbnails'):
+        sheet = results['thumbnails']
+        print(f"Sprite sheet with {len(sheet['timestamps'])} thumbnails: {sheet['path']}")
+
+if __name__ == "__main__":
+    main()
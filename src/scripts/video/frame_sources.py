@@ -0,0 +1,339 @@
+import cv2
+import time
+import queue
+import shutil
+import threading
+import subprocess
+import numpy as np
+from typing import Iterator, Optional, Tuple
+from video_index import load_index
+
+DECODERS = ['opencv', 'ffmpeg']
+
+def video_properties(video_path: str) -> Tuple[float, int, int, int]:
+    """(fps, frame count, width, height) from the video's index if it has been built, else from the container metadata"""
+    index = load_index(video_path)
+    if index:
+        return index.fps, index.frame_count, index.width, index.height
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video file: {video_path}")
+    properties = (
+        cap.get(cv2.CAP_PROP_FPS),
+        int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    )
+    cap.release()
+    return properties
+
+class OpenCVFrameSource:
+    """Frames from cv2.VideoCapture, converted to grayscale unless color=True.
+
+    OpenCV's own frame seeks go through timestamps and can land a few frames
+    off on some codecs. With the video's keyframe index (if built with
+    video_index.py), a seek instead restarts decoding at the keyframe before
+    the target and counts frames forward to it, or just decodes forward from
+    the current position when no keyframe lies in between. Without an index,
+    exact=True makes seeks decode forward too (reopening the video to go
+    back), which is exact but costs a decode of every frame on the way.
+    """
+
+    def __init__(self, video_path: str, color: bool = False, exact: bool = False):
+        self.video_path = video_path
+        self.cap = cv2.VideoCapture(video_path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open video file: {video_path}")
+        self.index = load_index(video_path)
+        self.position = 0
+        self.color = color
+        self.exact = exact
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.frame_count = self.index.frame_count if self.index else int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        height, width = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.shape = (height, width, 3) if color else (height, width)
+        self.bgr = None
+
+    def read(self) -> Optional[np.ndarray]:
+        """Next frame, or None at the end of the video"""
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self.position += 1
+        return frame if self.color else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def read_into(self, out: np.ndarray) -> bool:
+        """Decode the next frame into `out` (of `shape`); False at the end of the video"""
+        if self.color:
+            ret = self.cap.read(out)[0]
+        else:
+            ret, self.bgr = self.cap.read(self.bgr)
+            if ret:
+                cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY, dst=out)
+        self.position += ret
+        return ret
+
+    def skip(self) -> bool:
+        """Advance one frame without converting it; False at the end of the video"""
+        ret = self.cap.grab()
+        self.position += ret
+        return ret
+
+    @property
+    def forward_only(self) -> bool:
+        """Whether a seek back decodes again from the first frame (exact mode without an index)"""
+        return self.exact and not self.index
+
+    def seek(self, frame_number: int):
+        """Continue reading from the given frame"""
+        if self.index:
+            if not self.index.decode_forward(self.position, frame_number):
+                keyframe = self.index.keyframe_before(frame_number)
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+                self.position = keyframe
+        elif self.exact:
+            if frame_number < self.position:
+                self.cap.release()
+                self.cap = cv2.VideoCapture(self.video_path)
+                self.position = 0
+        else:
+            # OpenCV seeks to the keyframe before the target and decodes forward to it, by timestamp
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            self.position = frame_number
+            return
+        while self.position < frame_number and self.skip():
+            pass
+
+    def close(self):
+        self.cap.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class FFmpegFrameSource:
+    """Downscaled grayscale (luma) frames decoded by ffmpeg and streamed as rawvideo over a pipe.
+
+    ffmpeg does the decode, scale and gray conversion in native code, and only
+    width x height bytes per frame cross the pipe. Every read fills the same
+    preallocated buffer: the returned array is overwritten by the next read,
+    so copy it to keep it.
+    """
+
+    # Input seeks decode from the keyframe before the target and drop frames up to it
+    forward_only = False
+
+    def __init__(self, video_path: str, width: Optional[int] = 320, ffmpeg_path: str = 'ffmpeg'):
+        if not shutil.which(ffmpeg_path):
+            raise RuntimeError(f"ffmpeg not found ({ffmpeg_path}); install it or use the opencv decoder")
+        self.video_path = video_path
+        self.ffmpeg_path = ffmpeg_path
+        self.index = load_index(video_path, ffmpeg_path=ffmpeg_path)
+        self.position = 0
+        self.fps, self.frame_count, source_width, source_height = video_properties(video_path)
+
+        # Keep the aspect ratio; never upscale. Even dimensions keep every scaler happy.
+        self.width = min(width or source_width, source_width) // 2 * 2
+        self.height = max(2, round(source_height * self.width / source_width) // 2 * 2)
+
+        self.shape = (self.height, self.width)
+        self.buffer = bytearray(self.width * self.height)
+        self.view = memoryview(self.buffer)
+        self.frame = np.frombuffer(self.buffer, dtype=np.uint8).reshape(self.shape)
+        self.process = None
+        self.seek(0)
+
+    def _command(self, start_frame: int):
+        command = [self.ffmpeg_path, '-v', 'error', '-nostdin']
+        if start_frame:
+            # Half a frame early, so the first frame at or after the seek point is start_frame
+            command += ['-ss', f"{(start_frame - 0.5) / self.fps:.6f}"]
+        command += [
+            '-i', self.video_path,
+            '-an', '-sn',
+            '-vf', f"scale={self.width}:{self.height}:flags=area",
+            '-vsync', '0',  # One output frame per decoded frame, so frame numbers line up with OpenCV
+            '-f', 'rawvideo', '-pix_fmt', 'gray', '-'
+        ]
+        return command
+
+    def seek(self, frame_number: int):
+        """Continue reading from the given frame.
+
+        Restarts ffmpeg with an accurate input seek, unless the index shows no
+        keyframe between here and the target: then reading on is cheaper.
+        """
+        if self.process and self.index and self.index.decode_forward(self.position, frame_number):
+            while self.position < frame_number and self.skip():
+                pass
+            return
+        self.close()
+        self.process = subprocess.Popen(self._command(frame_number), stdout=subprocess.PIPE, bufsize=0)
+        self.position = frame_number
+
+    def _fill(self, view: memoryview) -> bool:
+        filled = 0
+        while filled < len(view):
+            count = self.process.stdout.readinto(view[filled:])
+            if not count:
+                return False
+            filled += count
+        self.position += 1
+        return True
+
+    def read(self) -> Optional[np.ndarray]:
+        """Next frame in the shared buffer, or None at the end of the video"""
+        return self.frame if self._fill(self.view) else None
+
+    def read_into(self, out: np.ndarray) -> bool:
+        """Read the next frame straight from the pipe into `out` (contiguous uint8 of `shape`); False at the end"""
+        return self._fill(memoryview(out).cast('B'))
+
+    def skip(self) -> bool:
+        """Advance one frame; False at the end of the video"""
+        return self._fill(self.view)
+
+    def close(self):
+        if self.process:
+            # Stop ffmpeg before closing its pipe, so an early stop is not reported as a broken pipe
+            if self.process.poll() is None:
+                self.process.kill()
+            self.process.wait()
+            self.process.stdout.close()
+            self.process = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class SampledFrames:
+    """(frame_number, frame) for every stride-th frame of [start, end) of a source positioned at `start`.
+
+    Skipped frames are only stepped over, never converted. The yielded array
+    is reused for the next frame. After iteration, `stopped_at` is the frame
+    number reading stopped at.
+    """
+
+    def __init__(self, source, stride: int = 1, start: int = 0, end: Optional[int] = None):
+        self.source = source
+        self.stride = stride
+        self.start = start
+        self.end = end
+        self.stopped_at = start
+
+    def read_sampled(self, out: np.ndarray) -> Iterator[int]:
+        """Decode each sampled frame into `out` (or one from `out()` if callable) and yield its number"""
+        frame_number = self.start
+        while self.end is None or frame_number < self.end:
+            if frame_number % self.stride == 0:
+                if not self.source.read_into(out() if callable(out) else out):
+                    break
+                yield frame_number
+            elif not self.source.skip():
+                break
+            frame_number += 1
+            self.stopped_at = frame_number
+        self.stopped_at = frame_number
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        frame = np.empty(self.source.shape, dtype=np.uint8)
+        for frame_number in self.read_sampled(frame):
+            yield frame_number, frame
+
+class PrefetchedFrames(SampledFrames):
+    """SampledFrames decoded on a background thread into a ring of preallocated frame arrays.
+
+    Decoding (cv2 read and color conversion, or reading the ffmpeg pipe) runs
+    while the caller analyzes earlier frames; both mostly release the GIL. A
+    yielded frame stays valid until the next one is requested, then its slot
+    goes back to the decoder. `stats()` reports throughput and how long each
+    side waited on the other.
+    """
+
+    def __init__(self, source, stride: int = 1, start: int = 0, end: Optional[int] = None, slots: int = 8):
+        super().__init__(source, stride, start, end)
+        self.ring = [np.empty(source.shape, dtype=np.uint8) for _ in range(max(2, slots))]
+        self.free = queue.Queue()
+        for slot in range(len(self.ring)):
+            self.free.put(slot)
+        self.ready = queue.Queue()
+        self.stopping = threading.Event()
+        self.decode_stall = 0.0   # decoder waiting for a free slot: analysis is the bottleneck
+        self.analysis_stall = 0.0  # caller waiting for a decoded frame: decoding is the bottleneck
+        self.frames = 0
+        self.elapsed = 0.0
+        self.thread = None
+
+    def _next_slot(self) -> int:
+        wait_start = time.perf_counter()
+        slot = self.free.get()
+        self.decode_stall += time.perf_counter() - wait_start
+        if slot is None:
+            raise InterruptedError
+        self.current = slot
+        return self.ring[slot]
+
+    def _decode(self):
+        try:
+            for frame_number in self.read_sampled(self._next_slot):
+                if self.stopping.is_set():
+                    break
+                self.ready.put((frame_number, self.current))
+        except InterruptedError:
+            pass
+        except Exception as e:
+            self.ready.put(e)
+        self.ready.put(None)
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        start_time = time.perf_counter()
+        self.thread = threading.Thread(target=self._decode, name="frame-decoder", daemon=True)
+        self.thread.start()
+        previous = None
+        try:
+            while True:
+                if previous is not None:
+                    self.free.put(previous)
+                wait_start = time.perf_counter()
+                item = self.ready.get()
+                self.analysis_stall += time.perf_counter() - wait_start
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                frame_number, previous = item
+                self.frames += 1
+                yield frame_number, self.ring[previous]
+        finally:
+            self.elapsed = time.perf_counter() - start_time
+            self.close()
+
+    def close(self):
+        """Stop the decoder thread (also when the caller stops iterating early)"""
+        if self.thread:
+            self.stopping.set()
+            self.free.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def stats(self) -> str:
+        rate = self.frames / self.elapsed if self.elapsed else 0.0
+        return (f"{self.frames} frames in {self.elapsed:.2f}s ({rate:.0f} fps) with {len(self.ring)} slots; "
+                f"decoder waited {self.decode_stall:.2f}s for free slots, "
+                f"analysis waited {self.analysis_stall:.2f}s for frames")
+
+def open_frame_source(video_path: str, decoder: str = 'opencv', width: Optional[int] = 320, exact: bool = False):
+    """Grayscale frame source: 'opencv' (full resolution) or 'ffmpeg' (downscaled to `width`).
+
+    `exact` makes OpenCV seeks frame-accurate without an index (see OpenCVFrameSource);
+    ffmpeg seeks always are.
+    """
+    if decoder == 'ffmpeg':
+        return FFmpegFrameSource(video_path, width)
+    if decoder == 'opencv':
+        return OpenCVFrameSource(video_path, exact=exact)
+    raise ValueError(f"Unknown decoder: {decoder} (expected one of {DECODERS})")
@@ -0,0 +1,219 @@
+import os
+import hashlib
+import argparse
+from pathlib import Path
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from tqdm import tqdm
+
+# Bytes per read from the socket and per write to disk
+CHUNK_SIZE = 1 << 20
+PART_SUFFIX = '.part'
+
+# Errors after which the partial file is kept and the download resumed
+RESUMABLE_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+def make_session(pool_size: int = 8, retries: int = 3) -> requests.Session:
+    """A session whose connection pool fits `pool_size` concurrent downloads from one host.
+
+    Failed connections and 429/5xx responses are retried with backoff before
+    any data is streamed; errors while streaming are left to download_file,
+    which resumes from what it already has.
+    """
+    retry = Retry(total=retries, backoff_factor=1.0, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset(['GET', 'HEAD']), raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def part_path(output_path: Union[str, Path]) -> Path:
+    """Partial download file of an output path (video.mp4 -> video.mp4.part)"""
+    return Path(str(output_path) + PART_SUFFIX)
+
+def total_size(response: requests.Response, offset: int) -> Optional[int]:
+    """Full size of the resource from Content-Range, or from Content-Length plus the resumed offset"""
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range and not content_range.endswith('/*'):
+        return int(content_range.rsplit('/', 1)[1])
+    length = response.headers.get('Content-Length')
+    return int(length) + offset if length else None
+
+def range_start(response: requests.Response) -> Optional[int]:
+    """First byte of a 206 response ("bytes 100-199/200" -> 100)"""
+    content_range = response.headers.get('Content-Range', '')
+    if not content_range.startswith('bytes ') or '-' not in content_range:
+        return None
+    return int(content_range[6:].split('-', 1)[0])
+
+def hash_file(path: Path, hasher, chunk_size: int = CHUNK_SIZE):
+    """Feed an existing file into a hash, e.g. the part already downloaded before a resume"""
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                return hasher
+            hasher.update(data)
+
+def download_file(session: requests.Session, url: str, output_path: Union[str, Path],
+                  size: Optional[int] = None, md5: Optional[str] = None, chunk_size: int = CHUNK_SIZE,
+                  desc: Optional[str] = None, timeout=(10, 60), attempts: int = 3,
+                  progress: bool = True) -> Path:
+    """
+    Download a URL to a file, resuming from an earlier partial download.
+
+    Data goes to `<output_path>.part`, which is renamed to the output path only
+    once complete and verified. If a part file exists, only the missing bytes
+    are requested (HTTP Range); a server that ignores the range sends the
+    whole file again and the part file is restarted.
+
+    Args:
+        session: Session to download with (see make_session)
+        url: URL of the file
+        output_path: Where to save the file
+        size: Expected size in bytes (else the size the server reports, if any)
+        md5: Expected MD5 hex digest of the whole file
+        chunk_size: Bytes per read and write
+        desc: Progress bar label
+        timeout: (connect, read) timeouts in seconds
+        attempts: Downloads to try, resuming after connection errors and restarting after failed checks
+        progress: Show a progress bar
+
+    Returns:
+        The output path
+    """
+    output_path = Path(output_path)
+    part = part_path(output_path)
+    if output_path.exists() and (size is not None or md5):
+        # Keep an earlier download that still passes the checks instead of fetching it again
+        if ((size is None or output_path.stat().st_size == size)
+                and (not md5 or hash_file(output_path, hashlib.md5(), chunk_size).hexdigest() == md5.lower())):
+            return output_path
+
+    last_error = None
+    for attempt in range(1, attempts + 1):
+        offset = part.stat().st_size if part.exists() else 0
+        if size is not None and offset > size:
+            part.unlink()
+            offset = 0
+        hasher = hashlib.md5() if md5 else None
+        expected = size
+        try:
+            headers = {'Range': f'bytes={offset}-'} if offset else {}
+            with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                if offset and response.status_code == 416:
+                    # Nothing after the offset: the part file is already complete (or too long, caught below)
+                    if expected is None and '/' in response.headers.get('Content-Range', ''):
+                        expected = total_size(response, offset)
+                    if hasher:
+                        hash_file(part, hasher, chunk_size)
+                else:
+                    response.raise_for_status()
+                    if offset and (response.status_code != 206 or range_start(response) != offset):
+                        print(f"  ↩️ Server did not resume at byte {offset}, restarting {output_path.name}")
+                        offset = 0
+                    reported = total_size(response, offset)
+                    if size is not None and reported is not None and reported != size:
+                        raise RuntimeError(f"Server reports {reported} bytes for {url}, expected {size}")
+                    expected = size if size is not None else reported
+                    if hasher and offset:
+                        hash_file(part, hasher, chunk_size)
+                    with open(part, 'ab' if offset else 'wb', buffering=chunk_size) as f, tqdm(
+                        desc=desc or output_path.name,
+                        total=expected,
+                        initial=offset,
+                        unit='iB',
+                        unit_scale=True,
+                        unit_divisor=1024,
+                        disable=not progress,
+                    ) as pbar:
+                        for data in response.iter_content(chunk_size=chunk_size):
+                            f.write(data)
+                            if hasher:
+                                hasher.update(data)
+                            pbar.update(len(data))
+        except RESUMABLE_ERRORS as e:
+            last_error = e
+            print(f"  ⚠️ Download of {output_path.name} interrupted (attempt {attempt}/{attempts}): {e}")
+            continue
+
+        received = part.stat().st_size if part.exists() else 0
+        if expected is not None and received < expected:
+            # The connection closed early without an error; resume from here
+            last_error = RuntimeError(f"Received {received} of {expected} bytes")
+            print(f"  ⚠️ Download of {output_path.name} incomplete (attempt {attempt}/{attempts}): {last_error}")
+            continue
+        if expected is not None and received > expected:
+            last_error = RuntimeError(f"Received {received} bytes, expected {expected}")
+        elif hasher and hasher.hexdigest() != md5.lower():
+            last_error = RuntimeError(f"MD5 {hasher.hexdigest()} does not match {md5.lower()}")
+        else:
+            os.replace(part, output_path)
+            return output_path
+        print(f"  ⚠️ Discarding download of {output_path.name} (attempt {attempt}/{attempts}): {last_error}")
+        part.unlink()
+
+    raise RuntimeError(f"Could not download {url} after {attempts} attempts: {last_error}")
+
+def download_files(jobs: List[Dict], workers: int = 4, session: Optional[requests.Session] = None,
+                   **options) -> Dict[str, Union[Path, Exception]]:
+    """
+    Download several files at once.
+
+    Args:
+        jobs: download_file arguments per file: 'url' and 'output_path', optionally 'size', 'md5' and 'desc'
+        workers: Number of simultaneous downloads
+        session: Shared session (one with a large enough pool is created if omitted)
+        **options: Further download_file arguments for every job
+
+    Returns:
+        {output path: saved path, or the exception that failed it}
+    """
+    session = session or make_session(workers)
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(download_file, session, **job, **options): str(job['output_path'])
+                   for job in jobs}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                results[futures[future]] = e
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Download files with resume, verification and parallel transfers")
+    parser.add_argument("urls", nargs="+", help="URLs to download")
+    parser.add_argument("--output-dir", default=".", help="Directory to save the files in")
+    parser.add_argument("--workers", type=int, default=4, help="Number of simultaneous downloads")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Bytes per read and write")
+    parser.add_argument("--attempts", type=int, default=3, help="Attempts per file")
+    parser.add_argument("--md5", nargs="+", help="Expected MD5 digest of each URL, in order")
+    args = parser.parse_args()
+
+    if args.md5 and len(args.md5) != len(args.urls):
+        print("Error: --md5 needs one digest per URL")
+        return
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    jobs = []
+    for i, url in enumerate(args.urls):
+        name = Path(urlparse(url).path).name or f"download_{i}"
+        jobs.append({'url': url, 'output_path': output_dir / name, 'md5': args.md5[i] if args.md5 else None})
+
+    results = download_files(jobs, args.workers, chunk_size=args.chunk_size, attempts=args.attempts)
+    for path, result in results.items():
+        if isinstance(result, Exception):
+            print(f"❌ {path}: {result}")
+        else:
+            print(f"✓ {path} ({result.stat().st_size} bytes)")
+
+if __name__ == "__main__":
+    main()
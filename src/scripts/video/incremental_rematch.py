@@ -0,0 +1,185 @@
+import json
+import argparse
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from embedding_store import EmbeddingStore, load_retrieval_config, summary_hash, top_indices
+from question_embeddings import load_question_embeddings, question_matrix, record_key
+from reverse_index import load_reverse_index, save_reverse_index, top_questions
+
+def question_matches_path() -> str:
+    """Location of the stored question -> top-k videos lists"""
+    return load_retrieval_config().get('question_matches', 'data/videos/embeddings/question_video_matches.json')
+
+def load_question_matches(path: Optional[str] = None) -> Optional[Dict]:
+    """Load stored question matches, or None if they were never built"""
+    path = path or question_matches_path()
+    if not Path(path).exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_question_matches(matches: Dict, path: Optional[str] = None):
+    """Save question matches"""
+    path = path or question_matches_path()
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(matches, f, ensure_ascii=False, indent=2)
+
+def top_videos(scores: np.ndarray, store: EmbeddingStore, top_k: int) -> List[Dict]:
+    """Turn one question's row of video scores into its top-k entries"""
+    return [
+        {'video_id': store.summaries[i]['video_id'], 'similarity': float(scores[i])}
+        for i in top_indices(scores, top_k)
+    ]
+
+def build_question_matches(store: EmbeddingStore, question_ids: List[str], questions: np.ndarray, top_k: int,
+                           question_keys: Dict[str, str]) -> Dict:
+    """Score every question against every video and keep the top k per question"""
+    scores = store.score_matrix(questions)  # questions x videos
+    return {
+        'top_k': top_k,
+        'video_hashes': {s['video_id']: summary_hash(s) for s in store.summaries},
+        'question_keys': dict(question_keys),
+        'questions': {
+            question_id: top_videos(scores[row], store, top_k)
+            for row, question_id in enumerate(question_ids)
+        }
+    }
+
+def refresh_questions(matches: Dict, store: EmbeddingStore, question_ids: List[str], questions: np.ndarray,
+                      question_keys: Dict[str, str]) -> Tuple[int, int]:
+    """Score new and edited questions against every video and drop removed ones. Returns (scored, removed)."""
+    stored = matches['question_keys']
+    removed = [question_id for question_id in matches['questions'] if question_id not in question_keys]
+    for question_id in removed:
+        del matches['questions'][question_id]
+
+    dirty = [i for i, question_id in enumerate(question_ids)
+             if question_id not in matches['questions'] or stored.get(question_id) != question_keys[question_id]]
+    if dirty:
+        scores = store.score_matrix(questions[dirty])
+        for scores_row, i in enumerate(dirty):
+            matches['questions'][question_ids[i]] = top_videos(scores[scores_row], store, matches['top_k'])
+
+    matches['question_keys'] = dict(question_keys)
+    return len(dirty), len(removed)
+
+def diff_videos(store: EmbeddingStore, video_hashes: Dict[str, str]) -> Dict[str, List[str]]:
+    """Compare current summary hashes with the ones the stored scores were computed from"""
+    current = {s['video_id']: summary_hash(s) for s in store.summaries}
+    return {
+        'added': [v for v in current if v not in video_hashes],
+        'changed': [v for v in current if v in video_hashes and video_hashes[v] != current[v]],
+        'removed': [v for v in video_hashes if v not in current]
+    }
+
+def patch_entry(entries: List[Dict], video_id: str, similarity: Optional[float], top_k: int) -> bool:
+    """Update one top-k list for a single video's new score (None when the video was removed).
+
+    Returns False when the list can no longer be patched in place: the video
+    dropped out of a full list, so the true k-th entry is unknown and the
+    row has to be rescored.
+    """
+    previous = next((e for e in entries if e['video_id'] == video_id), None)
+    was_full = len(entries) >= top_k
+    floor = entries[-1]['similarity'] if entries else float('-inf')
+    if previous is not None:
+        entries.remove(previous)
+
+    if similarity is None:
+        return previous is None or not was_full
+
+    if previous is not None and was_full and similarity < floor:
+        return False
+    if len(entries) < top_k or similarity > entries[-1]['similarity']:
+        entries.append({'video_id': video_id, 'similarity': similarity})
+        entries.sort(key=lambda e: e['similarity'], reverse=True)
+        del entries[top_k:]
+    return True
+
+def patch_question_matches(matches: Dict, store: EmbeddingStore, question_ids: List[str],
+                           questions: np.ndarray, changes: Dict[str, List[str]]) -> int:
+    """Rescore only the changed videos' columns and patch the stored top-k lists. Returns rows fully rescored."""
+    top_k = matches['top_k']
+    rows = {video_id: row for row, video_id in enumerate(s['video_id'] for s in store.summaries)}
+    dirty = set()
+
+    for video_id in changes['added'] + changes['changed']:
+        column = store.score_matrix(questions, [rows[video_id]])[:, 0]
+        for i, question_id in enumerate(question_ids):
+            entries = matches['questions'].setdefault(question_id, [])
+            if not patch_entry(entries, video_id, float(column[i]), top_k):
+                dirty.add(i)
+
+    for video_id in changes['removed']:
+        for i, question_id in enumerate(question_ids):
+            if not patch_entry(matches['questions'].setdefault(question_id, []), video_id, None, top_k):
+                dirty.add(i)
+
+    if dirty:
+        dirty_rows = sorted(dirty)
+        scores = store.score_matrix(questions[dirty_rows])
+        for scores_row, i in enumerate(dirty_rows):
+            matches['questions'][question_ids[i]] = top_videos(scores[scores_row], store, top_k)
+
+    matches['video_hashes'] = {s['video_id']: summary_hash(s) for s in store.summaries}
+    return len(dirty)
+
+def patch_reverse_index(index: Dict, store: EmbeddingStore, question_ids: List[str],
+                        questions: np.ndarray, changes: Dict[str, List[str]]):
+    """Recompute the top questions for changed videos only and drop removed ones"""
+    rows = {video_id: row for row, video_id in enumerate(s['video_id'] for s in store.summaries)}
+    for video_id in changes['added'] + changes['changed']:
+        scores = store.score_matrix(questions, [rows[video_id]])[:, 0]
+        index['videos'][video_id] = top_questions(scores, question_ids, index['top_n'])
+    for video_id in changes['removed']:
+        index['videos'].pop(video_id, None)
+
+def main():
+    config = load_retrieval_config()
+    parser = argparse.ArgumentParser(description="Rescore only the videos whose summaries changed")
+    parser.add_argument("--top-k", type=int, default=config.get('question_matches_top_k', 10),
+                      help="Number of videos kept per question")
+    parser.add_argument("--rebuild", action="store_true", help="Rescore every question against every video")
+    args = parser.parse_args()
+
+    store = EmbeddingStore.from_file()
+    records = load_question_embeddings()
+    if not records:
+        print("No cached question embeddings. Run reverse_index.py first to embed the questions.")
+        return
+    question_ids, questions = question_matrix(records)
+    question_keys = {record['question_id']: record_key(record) for record in records}
+
+    matches = load_question_matches()
+    if (args.rebuild or matches is None or matches['top_k'] != args.top_k
+            or 'question_keys' not in matches):
+        print(f"Scoring {len(question_ids)} questions x {len(store)} videos...")
+        save_question_matches(build_question_matches(store, question_ids, questions, args.top_k, question_keys))
+        print(f"Question matches saved to {question_matches_path()}")
+        return
+
+    # Questions added or edited since the last run get a full row
+    scored, removed = refresh_questions(matches, store, question_ids, questions, question_keys)
+    print(f"Scored {scored} new or edited questions, dropped {removed} removed ones")
+
+    changes = diff_videos(store, matches['video_hashes'])
+    print(f"Videos added: {len(changes['added'])}, changed: {len(changes['changed'])}, removed: {len(changes['removed'])}")
+    if any(changes.values()):
+        rescored = patch_question_matches(matches, store, question_ids, questions, changes)
+        print(f"Patched top-{args.top_k} lists in place ({rescored} questions needed a full rescore)")
+
+        index = load_reverse_index()
+        if index is not None:
+            patch_reverse_index(index, store, question_ids, questions, changes)
+            save_reverse_index(index)
+            print("Reverse index updated for changed videos")
+
+    save_question_matches(matches)
+    print(f"Question matches saved to {question_matches_path()}")
+
+if __name__ == "__main__":
+    main()
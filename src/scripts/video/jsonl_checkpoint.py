@@ -0,0 +1,116 @@
+import os
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+class JsonlCheckpoint:
+    """Append-only JSONL log of finished records, for resumable batch jobs.
+
+    Each finished record is appended as one line instead of rewriting the whole
+    output, so progress costs O(record) I/O. Lines are flushed immediately and
+    fsynced every `fsync_every` records. On resume the log is scanned once into
+    a dict, making the "already done?" check O(1) per record. A line cut short
+    by a crash is ignored. `compact` writes the final JSON artifact.
+    """
+
+    def __init__(self, path: str, key_field: str, fsync_every: int = 20):
+        self.path = Path(path)
+        self.key_field = key_field
+        self.fsync_every = fsync_every
+        self.records: Dict[str, Dict] = {}
+        self._file = None
+        self._unsynced = 0
+        self._load()
+
+    def _load(self):
+        """Read every complete line of an existing log"""
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Warning: skipping incomplete checkpoint line in {self.path}")
+                    continue
+                self.records[record[self.key_field]] = record
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _open(self):
+        """Open the log for appending, terminating a partial last line left by a crash"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        needs_newline = self.path.exists() and self.path.stat().st_size > 0
+        if needs_newline:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b'\n'
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if needs_newline:
+            self._file.write('\n')
+
+    def append(self, record: Dict):
+        """Record one finished item"""
+        if self._file is None:
+            self._open()
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.records[record[self.key_field]] = record
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def extend(self, records: Iterable[Dict]):
+        """Record several finished items, e.g. when seeding the log from an older output file"""
+        for record in records:
+            self.append(record)
+        self.sync()
+
+    def sync(self):
+        """Force appended records to disk"""
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        """Sync and close the log"""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'JsonlCheckpoint':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def compact(self, output_path: str, order: Optional[List[str]] = None, wrapper_key: str = 'summaries',
+                unlogged: Optional[List[Dict]] = None):
+        """Write all records to a single JSON file, replacing it atomically.
+
+        `order` lists keys in the desired output order; records not listed
+        follow in log order. `unlogged` records (e.g. failed items to retry on
+        the next run) are written too, but not added to the log.
+        """
+        order = order or []
+        records = dict(self.records)
+        for record in unlogged or []:
+            records.setdefault(record[self.key_field], record)
+        listed = [records[key] for key in order if key in records]
+        seen = set(order)
+        remaining = [record for key, record in records.items() if key not in seen]
+
+        temp_path = Path(f"{output_path}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({wrapper_key: listed + remaining}, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, output_path)
@@ -0,0 +1,137 @@
+import re
+import json
+import zlib
+from pathlib import Path
+from collections import defaultdict
+from typing import List, Dict, Callable, Optional, Tuple
+
+import numpy as np
+
+CONFIG_PATH = Path(__file__).parent / 'config.json'
+
+NIQQUD = re.compile(r'[\u0591-\u05BD\u05BF-\u05C7]')
+PUNCTUATION = re.compile(r'[^\w\s]|_')
+FINAL_LETTERS = str.maketrans('ךםןףץ', 'כמנפצ')
+MERSENNE_PRIME = (1 << 61) - 1
+
+def load_dedupe_config() -> Dict:
+    """Load the dedupe section of config.json"""
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f).get('dedupe', {})
+
+def normalize_hebrew(text: str) -> str:
+    """Normalize Hebrew text so punctuation, niqqud and final letter forms don't affect matching"""
+    text = (text or '').replace('\u05BE', ' ')  # maqaf joins words like a hyphen
+    text = NIQQUD.sub('', text)
+    text = PUNCTUATION.sub(' ', text)
+    text = text.translate(FINAL_LETTERS).lower()
+    return ' '.join(text.split())
+
+def question_fingerprint_text(question_text: str, options: Optional[List] = None, extra: str = '') -> str:
+    """Canonical text for near-duplicate detection, independent of option order"""
+    option_texts = [opt.get('text', '') if isinstance(opt, dict) else str(opt) for opt in options or []]
+    normalized_options = sorted(normalize_hebrew(opt) for opt in option_texts)
+    return '\n'.join([normalize_hebrew(question_text), *normalized_options, normalize_hebrew(extra)])
+
+def shingles(text: str, size: int) -> np.ndarray:
+    """32-bit hashes of the word n-grams of already normalized text"""
+    words = text.split()
+    if len(words) <= size:
+        grams = [' '.join(words)]
+    else:
+        grams = [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(np.asarray([zlib.crc32(g.encode('utf-8')) for g in grams], dtype=np.uint64))
+
+class MinHashDeduper:
+    """Groups near-duplicate texts with MinHash signatures and LSH banding.
+
+    Texts whose estimated Jaccard similarity over word shingles reaches
+    `threshold` land in the same group. Candidate pairs come from LSH buckets,
+    so the cost stays close to linear in the number of texts.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, bands: int = 16, shingle_size: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    @classmethod
+    def from_config(cls) -> 'MinHashDeduper':
+        """Build a deduper with the settings from config.json"""
+        return cls(**load_dedupe_config())
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a normalized text"""
+        hashes = shingles(text, self.shingle_size)
+        return ((self.a[:, None] * hashes[None, :] + self.b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+    def group(self, texts: List[str]) -> List[List[int]]:
+        """Group indices of near-duplicate texts. The first index of each group is its representative."""
+        signatures = np.asarray([self.signature(normalize_hebrew(t)) for t in texts]) if texts else np.zeros((0, self.num_perm))
+        parent = list(range(len(texts)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        rows = self.num_perm // self.bands
+        checked = set()
+        for band in range(self.bands):
+            buckets = defaultdict(list)
+            for i, sig in enumerate(signatures):
+                buckets[sig[band * rows:(band + 1) * rows].tobytes()].append(i)
+            for members in buckets.values():
+                # Every pair in the bucket: two members can match each other but not its first one
+                for position, i in enumerate(members):
+                    for j in members[position + 1:]:
+                        if (i, j) in checked or find(i) == find(j):
+                            continue
+                        checked.add((i, j))
+                        if np.mean(signatures[i] == signatures[j]) >= self.threshold:
+                            parent[max(find(i), find(j))] = min(find(i), find(j))
+
+        groups = defaultdict(list)
+        for i in range(len(texts)):
+            groups[find(i)].append(i)
+        return sorted(groups.values(), key=lambda members: members[0])
+
+def dedupe_report(groups: List[List[int]]) -> Dict:
+    """Summary of a grouping: how many texts, unique groups and API calls saved"""
+    texts = sum(len(members) for members in groups)
+    return {
+        'texts': texts,
+        'groups': len(groups),
+        'duplicate_groups': sum(1 for members in groups if len(members) > 1),
+        'calls_saved': texts - len(groups)
+    }
+
+def dedupe_and_fan_out(texts: List[str], process: Callable[[List[str]], List], deduper: Optional[MinHashDeduper] = None,
+                       fingerprints: Optional[List[str]] = None) -> Tuple[List, Dict]:
+    """Run `process` on one representative per near-duplicate group and copy the results to every member.
+
+    `fingerprints` can replace the texts for grouping (e.g. option-order independent
+    question text). Returns the per-text results and a report of the calls saved.
+    """
+    deduper = deduper or MinHashDeduper.from_config()
+    groups = deduper.group(fingerprints if fingerprints is not None else texts)
+    representative_results = process([texts[members[0]] for members in groups])
+
+    results = [None] * len(texts)
+    for members, result in zip(groups, representative_results):
+        for i in members:
+            results[i] = result
+
+    return results, dedupe_report(groups)
+
+def print_dedupe_report(report: Dict, label: str = "texts"):
+    """Print how many API calls near-duplicate grouping saved"""
+    print(f"Near-duplicate check: {report['texts']} {label} -> {report['groups']} unique "
+          f"({report['duplicate_groups']} duplicate groups, {report['calls_saved']} API calls saved)")
@@ -6,6 +6,10 @@ import re
 from openai import OpenAI
 from dotenv import load_dotenv
 import time
+import numpy as np
+from embedding_store import content_hash, summary_hash
+from chunking import chunk_summary, chunking_key, count_tokens
+from near_duplicates import dedupe_and_fan_out, print_dedupe_report
 
 # Load environment variables
 load_dotenv()
@@ -36,13 +40,48 @@ def get_embedding(text):
     try:
         response = client.embeddings.create(
             model=CONFIG['openai']['model'],
-            input=text
+            input=text,
+            dimensions=CONFIG['openai']['dimensions']
         )
         return response.data[0].embedding
     except Exception as e:
         print(f"Error getting embedding: {str(e)}")
         return None
 
+def get_embeddings(texts, batch_size=100):
+    """Get embeddings for many texts, one API call per batch. Failed batches yield None."""
+    embeddings = []
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        time.sleep(CONFIG['openai']['rate_limit_delay'])
+        try:
+            response = client.embeddings.create(
+                model=CONFIG['openai']['model'],
+                input=batch,
+                dimensions=CONFIG['openai']['dimensions']
+            )
+            embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        except Exception as e:
+            print(f"Error getting embeddings for batch starting at {start}: {str(e)}")
+            embeddings.extend([None] * len(batch))
+    return embeddings
+
+def embed_chunks(results):
+    """Embed all new chunks in bulk, then fill summaries too long to embed whole with their chunk mean"""
+    pending = [chunk for result in results for chunk in result['chunks'] if not chunk.get('embedding')]
+    if pending:
+        print(f"\nEmbedding {len(pending)} chunks...")
+        embeddings, report = dedupe_and_fan_out([chunk['text'] for chunk in pending], get_embeddings)
+        print_dedupe_report(report, "chunks")
+        for chunk, embedding in zip(pending, embeddings):
+            chunk['embedding'] = embedding
+
+    for result in results:
+        chunk_embeddings = [chunk['embedding'] for chunk in result['chunks'] if chunk.get('embedding')]
+        if result['embedding'] is None and chunk_embeddings:
+            mean = np.mean(np.asarray(chunk_embeddings, dtype=np.float32), axis=0)
+            result['embedding'] = (mean / np.linalg.norm(mean)).tolist()
+
 def load_video_data():
     """Load video data from JSON file"""
     with open(CONFIG['paths']['video_data'], 'r', encoding='utf-8') as f:
@@ -125,11 +164,25 @@ def get_topic_name_for_subtopic(subtopic_id):
         print(f"Error finding topic name: {str(e)}")
         return subtopic_id
 
+def load_existing_summaries():
+    """Load previously processed summaries keyed by video ID, so unchanged summaries keep their embeddings"""
+    output_file = CONFIG['paths']['processed_summaries']
+    if not os.path.exists(output_file):
+        return {}
+    try:
+        with open(output_file, 'r', encoding='utf-8') as f:
+            return {s['video_id']: s for s in json.load(f)['summaries']}
+    except Exception as e:
+        print(f"Warning: could not load existing summaries: {str(e)}")
+        return {}
+
 def process_summaries(docs_dir):
     """Process all Word documents and match with video data"""
     video_data = load_video_data()
     videos = {(v['lessonNumber'], v['segmentNumber']): v for v in video_data['videos']}
+    existing = load_existing_summaries()
     results = []
+    reused_count = 0
     
     # Create verification report file
     with open('process_summaries_verification.txt', 'w', encoding='utf-8') as verification:
@@ -177,9 +230,36 @@ def process_summaries(docs_dir):
                     verification.write(formatted_text)
                     verification.write("\n" + "-" * 40 + "\n\n")
 
-                    # Generate embedding for the full formatted text
-                    embedding = get_embedding(formatted_text)
-                    verification.write(f"Embedding generated: {'Success' if embedding else 'Failed'}\n")
+                    # Split into header-prefixed paragraph windows; chunks are embedded in bulk after the loop
+                    header = f"שיעור ב{topic_name}\nמיקוד ב{video['title']}"
+                    chunks = chunk_summary(
+                        video['id'], header, content,
+                        max_tokens=CONFIG['chunking']['max_tokens'],
+                        overlap_paragraphs=CONFIG['chunking']['overlap_paragraphs']
+                    )
+                    verification.write(f"Chunks: {len(chunks)}\n")
+                    chunking = chunking_key(CONFIG['chunking']['max_tokens'], CONFIG['chunking']['overlap_paragraphs'])
+
+                    # Reuse the stored embeddings when the summary text is unchanged,
+                    # and its chunks too unless they were cut with other chunking settings
+                    text_hash = content_hash(formatted_text)
+                    previous = existing.get(video['id'])
+                    if previous and previous.get('embedding') and summary_hash(previous) == text_hash:
+                        embedding = previous['embedding']
+                        reused_count += 1
+                        if previous.get('chunking') == chunking and previous.get('chunks'):
+                            chunks = previous['chunks']
+                            verification.write("Embedding reused: content unchanged\n")
+                        else:
+                            verification.write("Embedding reused: content unchanged, chunks rebuilt for new chunking settings\n")
+                    elif count_tokens(formatted_text) > CONFIG['chunking']['max_input_tokens']:
+                        # Too long to embed whole; use the mean of the chunk embeddings instead
+                        embedding = None
+                        verification.write("Embedding deferred: summary exceeds input limit, using chunk mean\n")
+                    else:
+                        # Generate embedding for the full formatted text
+                        embedding = get_embedding(formatted_text)
+                        verification.write(f"Embedding generated: {'Success' if embedding else 'Failed'}\n")
                     
                     # Log the formatted content for review
                     separator = CONFIG['templates']['debug_format']['separator'] * 80
@@ -198,7 +278,10 @@ def process_summaries(docs_dir):
                         'segment_number': segment_num,
                         'subtopic_id': video['subtopicId'],
                         'content': formatted_text,
-                        'embedding': embedding
+                        'content_hash': text_hash,
+                        'embedding': embedding,
+                        'chunking': chunking,
+                        'chunks': chunks
                     }
                     
                     results.append(result)
@@ -208,12 +291,14 @@ def process_summaries(docs_dir):
                     verification.write(f"ERROR: Failed to process file: {str(e)}\n")
                     print(f"Error processing {doc_file.name}: {str(e)}")
     
+    embed_chunks(results)
+
     # Save results
     output_file = CONFIG['paths']['processed_summaries']
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump({'summaries': results}, f, ensure_ascii=False, indent=2)
     
-    print(f"\nProcessed {len(results)} documents")
+    print(f"\nProcessed {len(results)} documents ({reused_count} unchanged, embeddings reused)")
     print(f"Results saved to {output_file}")
     print(f"Debug log saved to {CONFIG['paths']['debug_log']}")
     print(f"Verification report saved to process_summaries_verification.txt")
@@ -0,0 +1,141 @@
+import os
+import json
+from pathlib import Path
+from functools import lru_cache
+from typing import List, Dict, Tuple, Optional
+
+import numpy as np
+
+from embedding_store import load_retrieval_config, load_embedding_config, normalize_rows, content_hash
+from question_text import QuestionTextError, create_question_embedding_text
+from near_duplicates import dedupe_and_fan_out, print_dedupe_report, question_fingerprint_text
+
+EMBEDDING_BATCH_SIZE = 100
+
+@lru_cache(maxsize=None)
+def openai_client():
+    """OpenAI client, created on first use so reading cached embeddings needs no credentials"""
+    from openai import OpenAI
+    from dotenv import load_dotenv
+    load_dotenv()
+    return OpenAI(api_key=os.getenv('REACT_APP_OPENAI_API_KEY'))
+
+@lru_cache(maxsize=None)
+def supabase_client():
+    """Supabase client, created on first use"""
+    from supabase import create_client
+    from dotenv import load_dotenv
+    load_dotenv()
+    return create_client(os.getenv('REACT_APP_SUPABASE_URL'), os.getenv('REACT_APP_SUPABASE_ANON_KEY'))
+
+def question_embeddings_path() -> str:
+    """Location of the cached question embeddings, next to the summaries"""
+    return load_retrieval_config().get('question_embeddings', 'data/videos/embeddings/question_embeddings.json')
+
+def load_question_embeddings(path: Optional[str] = None) -> List[Dict]:
+    """Load cached question embedding records, or an empty list if none exist yet"""
+    path = path or question_embeddings_path()
+    if not Path(path).exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['questions']
+
+def save_question_embeddings(records: List[Dict], path: Optional[str] = None):
+    """Save question embedding records"""
+    path = path or question_embeddings_path()
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'questions': records}, f, ensure_ascii=False)
+
+def question_matrix(records: List[Dict]) -> Tuple[List[str], np.ndarray]:
+    """Stack question embeddings into a row-normalized matrix with matching ids"""
+    ids = [r['question_id'] for r in records]
+    matrix = np.asarray([r['embedding'] for r in records], dtype=np.float32)
+    return ids, normalize_rows(matrix)
+
+def embed_texts(texts: List[str], embedding_config: Optional[Dict] = None) -> List[List[float]]:
+    """Embed texts in bulk, EMBEDDING_BATCH_SIZE inputs per API call"""
+    embedding_config = embedding_config or load_embedding_config()
+    options = {'dimensions': embedding_config['dimensions']} if embedding_config.get('dimensions') else {}
+    embeddings = []
+    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        batch = [text.strip() for text in texts[start:start + EMBEDDING_BATCH_SIZE]]
+        response = openai_client().embeddings.create(
+            model=embedding_config['model'],
+            input=batch,
+            encoding_format="float",
+            **options
+        )
+        embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+    return embeddings
+
+def fetch_questions() -> List[Dict]:
+    """Get all questions from Supabase"""
+    response = supabase_client().table('questions').select('*').execute()
+    return response.data
+
+def question_fingerprint(question_data: Dict) -> str:
+    """Option-order independent text used to spot near-duplicate questions before embedding"""
+    content = question_data.get('content', {})
+    solution = question_data.get('schoolAnswer', {}).get('solution', '')
+    solution_text = solution['text'] if isinstance(solution, dict) else solution
+    subtopic_id = question_data.get('metadata', {}).get('subtopicId', '')
+    return question_fingerprint_text(content.get('text', ''), content.get('options', []), f"{subtopic_id} {solution_text}")
+
+def cache_key(text_hash: str, embedding_config: Dict) -> Tuple:
+    """What a cached embedding depends on: the question text, the model and the dimensions"""
+    return (text_hash, embedding_config['model'], embedding_config.get('dimensions'))
+
+def record_key(record: Dict) -> str:
+    """cache_key of a stored record as a string, kept by the indexes scored from it to spot edited questions"""
+    return ':'.join(str(part) for part in (record.get('text_hash'), record.get('model'), record.get('dimensions')))
+
+def embed_new_questions(questions: List[Dict], records: List[Dict],
+                        embedding_config: Optional[Dict] = None) -> List[Dict]:
+    """Embed questions that are new, edited or embedded with another model, and return their records"""
+    embedding_config = embedding_config or load_embedding_config()
+    known = {r['question_id']: cache_key(r.get('text_hash'), r) for r in records if 'model' in r}
+    pending = []
+    for question in questions:
+        try:
+            text = create_question_embedding_text(question['data'])
+        except QuestionTextError as e:
+            print(f"Skipping question {question['id']}: {e}")
+            continue
+        text_hash = content_hash(text)
+        if known.get(question['id']) == cache_key(text_hash, embedding_config):
+            continue
+        pending.append((question, text, text_hash))
+
+    if not pending:
+        return []
+
+    print(f"Embedding {len(pending)} new or changed questions with {embedding_config['model']}...")
+    embeddings, report = dedupe_and_fan_out(
+        [text for _, text, _ in pending],
+        lambda texts: embed_texts(texts, embedding_config),
+        fingerprints=[question_fingerprint(question['data']) for question, _, _ in pending]
+    )
+    print_dedupe_report(report, "questions")
+    return [
+        {
+            'question_id': question['id'],
+            'subtopic_id': question['data'].get('metadata', {}).get('subtopicId'),
+            'text_hash': text_hash,
+            'model': embedding_config['model'],
+            'dimensions': embedding_config.get('dimensions'),
+            'embedding': embedding
+        }
+        for (question, _, text_hash), embedding in zip(pending, embeddings)
+    ]
+
+def update_question_embeddings(path: Optional[str] = None) -> List[Dict]:
+    """Fetch questions, embed the new and changed ones and save the updated cache"""
+    records = load_question_embeddings(path)
+    new_records = embed_new_questions(fetch_questions(), records)
+    if new_records:
+        replaced = {r['question_id'] for r in new_records}
+        records = [r for r in records if r['question_id'] not in replaced] + new_records
+        save_question_embeddings(records, path)
+    print(f"Question embeddings: {len(records)} cached, {len(new_records)} new or re-embedded")
+    return records
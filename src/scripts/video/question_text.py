@@ -0,0 +1,90 @@
+import json
+
+class QuestionTextError(ValueError):
+    """A question's embedding text cannot be built (e.g. its subtopic is unknown)"""
+
+def get_hebrew_subtopic_name(subtopic_id: str) -> str:
+    """Get Hebrew subtopic name from construction_safety.json"""
+    if not subtopic_id:
+        raise ValueError("No subtopic ID provided")
+        
+    try:
+        with open('data/subjects/construction_safety.json', 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            
+            # Search through all topics and their subtopics
+            for topic in data['topics']:
+                for subtopic in topic['subTopics']:
+                    if subtopic['id'] == subtopic_id:
+                        return subtopic['name']
+                        
+            # If we get here, we didn't find the subtopic
+            raise ValueError(f"Could not find Hebrew name for subtopic: {subtopic_id}")
+            
+    except FileNotFoundError:
+        raise ValueError("Could not find construction_safety.json")
+    except json.JSONDecodeError:
+        raise ValueError("Error parsing construction_safety.json")
+    except Exception as e:
+        raise ValueError(f"Error loading Hebrew subtopic name: {str(e)}")
+
+def create_question_embedding_text(question_data: dict) -> str:
+    """Single source of truth for creating the embedding text from question data."""
+    
+    try:
+        # Extract all required components
+        metadata = question_data.get('metadata', {})
+        subtopic_id = metadata.get('subtopicId', '')
+        
+        # Try to get Hebrew name - without it there is no embedding text
+        try:
+            subtopic_name = get_hebrew_subtopic_name(subtopic_id)
+        except ValueError as e:
+            raise QuestionTextError(f"לא נמצא שם בעברית לתת-נושא {subtopic_id} ({e})") from e
+            
+        # Get the question text
+        question_text = question_data.get('content', {}).get('text', '')
+        
+        # Format options with Hebrew letters if they exist
+        hebrew_letters = ['א', 'ב', 'ג', 'ד', 'ה', 'ו', 'ז', 'ח', 'ט', 'י']
+        content_options = question_data.get('content', {}).get('options', [])
+        options_text = ""
+        if content_options:
+            options_text = "\n\n" + "\n".join(
+                f"{hebrew_letters[i]}. {opt['text'] if isinstance(opt, dict) else str(opt)}"
+                for i, opt in enumerate(content_options)
+            )
+        
+        # Get solution and answer if they exist
+        school_answer = question_data.get('schoolAnswer', {})
+        solution = school_answer.get('solution', '')
+        solution_text = solution['text'] if isinstance(solution, dict) else solution
+        
+        # For multiple choice questions, add the correct answer
+        final_answer = school_answer.get('finalAnswer', {})
+        answer_text = ""
+        if content_options and final_answer:
+            final_answer_value = final_answer.get('value', 1) if isinstance(final_answer, dict) else final_answer
+            try:
+                final_answer_value = int(final_answer_value)
+                correct_letter = hebrew_letters[final_answer_value - 1]
+                correct_text = content_options[final_answer_value - 1]['text']
+                answer_text = f"\n\nהתשובה הנכונה היא {correct_letter}. {correct_text}"
+            except (ValueError, IndexError):
+                pass
+        
+        # Build the final text
+        result = f"""שיעור ב{subtopic_name}
+המיקוד בשאלה:
+{question_text}{options_text}{answer_text}"""
+
+        # Add explanation if it exists
+        if solution_text:
+            result += f"\n\nהסבר:\n{solution_text}"
+            
+        return result
+        
+    except QuestionTextError:
+        raise
+    except Exception as e:
+        raise QuestionTextError(f"שגיאה ביצירת טקסט לשאלה: {e}") from e
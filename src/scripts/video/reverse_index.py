@@ -0,0 +1,149 @@
+import json
+import argparse
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from embedding_store import EmbeddingStore, load_retrieval_config, top_indices
+from question_embeddings import load_question_embeddings, update_question_embeddings, question_matrix, record_key
+
+def reverse_index_path() -> str:
+    """Location of the video -> questions index, next to the summaries"""
+    return load_retrieval_config().get('reverse_index', 'data/videos/embeddings/video_question_index.json')
+
+def load_reverse_index(path: Optional[str] = None) -> Optional[Dict]:
+    """Load the persisted reverse index, or None if it was never built"""
+    path = path or reverse_index_path()
+    if not Path(path).exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_reverse_index(index: Dict, path: Optional[str] = None):
+    """Save the reverse index"""
+    path = path or reverse_index_path()
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+
+def top_questions(scores: np.ndarray, question_ids: List[str], top_n: int) -> List[Dict]:
+    """Turn one video's row of question scores into its top-N entries"""
+    return [
+        {'question_id': question_ids[i], 'similarity': float(scores[i])}
+        for i in top_indices(scores, top_n)
+    ]
+
+def build_reverse_index(store: EmbeddingStore, question_ids: List[str], questions: np.ndarray, top_n: int,
+                        question_keys: Dict[str, str]) -> Dict:
+    """Score every video against every question in one matrix product and keep the top N per video"""
+    scores = store.score_matrix(questions).T  # videos x questions
+    return {
+        'top_n': top_n,
+        'question_ids': list(question_ids),
+        'question_keys': dict(question_keys),
+        'videos': {
+            summary['video_id']: top_questions(scores[row], question_ids, top_n)
+            for row, summary in enumerate(store.summaries)
+        }
+    }
+
+def update_questions(index: Dict, store: EmbeddingStore, question_ids: List[str], questions: np.ndarray,
+                     question_keys: Dict[str, str]) -> Tuple[int, int, int]:
+    """
+    Bring an existing index up to date with added, edited and removed questions.
+
+    Entries of edited and removed questions are stripped from every video, then
+    new and edited questions are scored and merged in. A video whose full list
+    lost an entry is rescored against all questions, as its next best one is unknown.
+
+    Returns:
+        (questions scored, questions removed, videos rescored)
+    """
+    stored = index['question_keys']
+    stale = {question_id for question_id, key in stored.items() if question_keys.get(question_id) != key}
+    fresh = [i for i, question_id in enumerate(question_ids) if question_id not in stored or question_id in stale]
+    top_n = index['top_n']
+
+    rescore = []
+    for row, summary in enumerate(store.summaries):
+        entries = index['videos'].get(summary['video_id'], [])
+        kept = [entry for entry in entries if entry['question_id'] not in stale]
+        if len(kept) < len(entries) and len(entries) >= top_n:
+            rescore.append(row)
+        index['videos'][summary['video_id']] = kept
+
+    if fresh:
+        fresh_ids = [question_ids[i] for i in fresh]
+        scores = store.score_matrix(questions[fresh]).T
+        for row, summary in enumerate(store.summaries):
+            merged = index['videos'][summary['video_id']] + top_questions(scores[row], fresh_ids, top_n)
+            merged.sort(key=lambda entry: entry['similarity'], reverse=True)
+            index['videos'][summary['video_id']] = merged[:top_n]
+
+    if rescore:
+        scores = store.score_matrix(questions, rescore).T
+        for scores_row, row in enumerate(rescore):
+            index['videos'][store.summaries[row]['video_id']] = top_questions(scores[scores_row], question_ids, top_n)
+
+    index['question_ids'] = list(question_ids)
+    index['question_keys'] = dict(question_keys)
+    removed = sum(question_id not in question_keys for question_id in stale)
+    return len(fresh), removed, len(rescore)
+
+def update_reverse_index(store: EmbeddingStore, records: List[Dict], top_n: int, rebuild: bool = False) -> Dict:
+    """Bring the persisted index up to date with the current videos and questions"""
+    question_ids, questions = question_matrix(records)
+    question_keys = {record['question_id']: record_key(record) for record in records}
+    index = load_reverse_index()
+
+    video_ids = {summary['video_id'] for summary in store.summaries}
+    if (rebuild or index is None or index['top_n'] != top_n or set(index['videos']) != video_ids
+            or 'question_keys' not in index):
+        # A new or removed video needs every question scored, so start over. So does an index
+        # saved without question keys, as its edited questions cannot be told apart.
+        print(f"Building reverse index for {len(store)} videos x {len(question_ids)} questions...")
+        index = build_reverse_index(store, question_ids, questions, top_n, question_keys)
+    else:
+        scored, removed, rescored = update_questions(index, store, question_ids, questions, question_keys)
+        print(f"Updated reverse index: {scored} new or edited questions scored, {removed} removed, "
+              f"{rescored} videos rescored")
+
+    save_reverse_index(index)
+    return index
+
+def print_video_questions(index: Dict, video_id: str):
+    """Print the top questions stored for one video"""
+    entries = index['videos'].get(video_id)
+    if entries is None:
+        print(f"No entry for video {video_id}")
+        return
+    print(f"\nTop questions for {video_id}:")
+    for i, entry in enumerate(entries, 1):
+        print(f"{i}. {entry['question_id']} (similarity: {entry['similarity']:.3f})")
+
+def main():
+    config = load_retrieval_config()
+    parser = argparse.ArgumentParser(description="Build the video -> top questions index for course authors")
+    parser.add_argument("--top-n", type=int, default=config.get('reverse_index_top_n', 20),
+                      help="Number of questions kept per video")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from scratch")
+    parser.add_argument("--skip-fetch", action="store_true",
+                      help="Use cached question embeddings without fetching new questions")
+    parser.add_argument("--video", help="Print the top questions for this video id")
+    args = parser.parse_args()
+
+    store = EmbeddingStore.from_file()
+    records = load_question_embeddings() if args.skip_fetch else update_question_embeddings()
+    if not records:
+        print("No question embeddings available")
+        return
+
+    index = update_reverse_index(store, records, args.top_n, rebuild=args.rebuild)
+    print(f"Reverse index saved to {reverse_index_path()}")
+
+    if args.video:
+        print_video_questions(index, args.video)
+
+if __name__ == "__main__":
+    main()
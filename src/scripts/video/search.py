@@ -1,5 +1,12 @@
-def calculate_match_score(question_text: str, solution_text: str, doc_content: str, doc_metadata: dict, question_metadata: dict) -> dict:
-    """Calculate match score with all components separated and detailed breakdown"""
+from term_vectors import TermIndex
+
+def calculate_match_score(question_text: str, solution_text: str, doc_content: str, doc_metadata: dict, question_metadata: dict,
+                          term_matches: list = None) -> dict:
+    """Calculate match score with all components separated and detailed breakdown.
+
+    `term_matches` may be precomputed from a TermIndex over all videos; otherwise
+    the document's technical terms are checked here.
+    """
     
     # 1. Question similarity (semantic)
     question_similarity = cosine_similarity(
@@ -14,26 +21,9 @@ def calculate_match_score(question_text: str, solution_text: str, doc_content: s
     )
     
     # 3. Term matching with significance levels
-    term_matches = []
-    term_boost = 0
-    for term in doc_metadata.get('technical_terms', []):
-        # Check both question and solution text
-        if term['term'] in question_text or term['term'] in solution_text:
-            boost = {
-                5: 0.25,  # Critical terms
-                4: 0.15,  # Important terms
-                3: 0.08,  # Moderate terms
-                2: 0.04,  # Minor terms
-                1: 0.02   # Basic terms
-            }.get(term['significance'], 0)
-            
-            term_matches.append({
-                'term': term['term'],
-                'significance': term['significance'],
-                'boost': boost,
-                'found_in': 'question' if term['term'] in question_text else 'solution'
-            })
-            term_boost += boost
+    if term_matches is None:
+        term_matches = TermIndex([doc_metadata]).significance_matches(0, question_text, solution_text)
+    term_boost = sum(match['boost'] for match in term_matches)
 
     # 4. Title similarity (with lesson context)
     full_title = f"{doc_metadata.get('lesson_name', '')} - {doc_metadata.get('title', '')}"
@@ -100,15 +90,21 @@ def search_videos(question: dict, videos: list, top_k: int = 5) -> dict:
     print(f"Solution text: {solution_text[:100]}...")
     print(f"Question subTopicID: {question.get('metadata', {}).get('subTopicID', 'None')}")
     
+    # Find significance-scored term matches for all videos at once
+    term_index = TermIndex(videos)
+    present = term_index.terms_in_text(question_text, solution_text)
+    rows_with_terms = set(term_index.rows_with_terms(present).tolist())
+    
     # Process each video
-    for video in videos:
+    for row, video in enumerate(videos):
         try:
             match_score = calculate_match_score(
                 question_text=question_text,
                 solution_text=solution_text,
                 doc_content=video.get('content', ''),
                 doc_metadata=video,
-                question_metadata=question
+                question_metadata=question,
+                term_matches=term_index.significance_matches(row, question_text, solution_text, present) if row in rows_with_terms else []
             )
             results.append(match_score)
         except Exception as e:
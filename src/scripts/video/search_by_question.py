@@ -1,89 +1,173 @@
+import os
 import sys
 import json
-from openai import OpenAI
-from dotenv import load_dotenv
-from process_matches import get_matches, format_results
 import time
-
-# Load environment variables
-load_dotenv()
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+import socket
+import argparse
+import threading
+import socketserver
+from process_matches import get_matches, format_results
+from term_extraction import get_extractor, question_text_with_answer, QUESTION_TERMS_PROMPT
+from term_dictionary import TermDictionary
+from calculate_similarity import calculate_similarities, video_embedding_matrix
+from term_vectors import TermIndex
 
 def extract_question_terms(question_text, answer_text=None):
-    """Extract terms from question and answer text using GPT-4"""
+    """Extract terms from question and answer text using GPT-4, cached across runs"""
+    return get_extractor().extract(question_text_with_answer(question_text, answer_text), QUESTION_TERMS_PROMPT)
+
+_term_dictionary = None
+
+def extract_local_terms(question_text, answer_text=None):
+    """Extract terms with the local Hebrew dictionary - no API call, milliseconds per question"""
+    global _term_dictionary
+    if _term_dictionary is None:
+        _term_dictionary = TermDictionary.load()
+    return _term_dictionary.extract(question_text_with_answer(question_text, answer_text))
+
+QUESTIONS_PATH = 'data/questions.json'
+VIDEOS_PATH = 'data/processed_summaries.json'
+DEFAULT_PORT = 8765
+
+class SearchCorpus:
+    """Questions indexed by id and videos with their embedding matrix and term index, loaded once.
+
+    Corpora are reloaded when either file's modification time changes, checked
+    on every lookup, so a resident process always answers from current data.
+    """
+
+    def __init__(self, questions_path=QUESTIONS_PATH, videos_path=VIDEOS_PATH):
+        self.paths = [questions_path, videos_path]
+        self._lock = threading.Lock()
+        self._mtimes = None
+        self.reload_if_changed()
+
+    def _current_mtimes(self):
+        return [os.path.getmtime(path) for path in self.paths]
+
+    def reload_if_changed(self):
+        """Reload both corpora if either file changed since the last load"""
+        with self._lock:
+            mtimes = self._current_mtimes()
+            if mtimes == self._mtimes:
+                return False
+
+            start_time = time.time()
+            questions_path, videos_path = self.paths
+            with open(questions_path, 'r', encoding='utf-8') as f:
+                questions = json.load(f)
+            with open(videos_path, 'r', encoding='utf-8') as f:
+                videos = json.load(f)['summaries']
+
+            # Swapped in as one tuple so concurrent lookups never mix old and new data
+            self.state = (
+                {str(q['id']): q for q in questions},
+                videos,
+                video_embedding_matrix(videos),
+                TermIndex(videos)
+            )
+            self._mtimes = mtimes
+            print(f"Loaded {len(questions)} questions and {len(videos)} videos in {time.time() - start_time:.2f}s",
+                  file=sys.stderr)
+            return True
+
+    def search(self, question_id, use_llm_terms=False):
+        """Formatted matches for one question"""
+        self.reload_if_changed()
+        questions, videos, embeddings, term_index = self.state
+        question = questions.get(str(question_id))
+        if not question:
+            return f"Question {question_id} not found"
+        question = dict(question)
+
+        # Extract terms for this question
+        question_text = question.get('text', '')
+        answer_text = question.get('answer', {}).get('text', '')
+        extract_terms = extract_question_terms if use_llm_terms else extract_local_terms
+        question['terms'] = extract_terms(question_text, answer_text)
+
+        # Calculate similarity scores against all videos at once
+        similarity_scores = calculate_similarities(question, videos, term_index=term_index, embeddings=embeddings)
+
+        # Get matches using matching logic
+        matches_data = get_matches(question, videos, similarity_scores)
+
+        # Format results
+        return format_results(matches_data, question)
+
+def search_by_question(question_id, use_llm_terms=False):
+    """One-off search: loads the corpora for this call only"""
+    return SearchCorpus().search(question_id, use_llm_terms)
+
+def serve_stdin(corpus, use_llm_terms=False):
+    """REPL: one question id per line ("llm <id>" for GPT terms), results printed after each"""
+    print("Ready. Enter a question id (prefix with 'llm ' for GPT terms), empty line to quit.", file=sys.stderr)
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            break
+        llm, _, question_id = line.partition(' ') if line.startswith('llm ') else ('', '', line)
+        start_time = time.time()
+        print(corpus.search(question_id.strip(), use_llm_terms or bool(llm)))
+        print(f"[{(time.time() - start_time) * 1000:.1f} ms]", file=sys.stderr)
+        sys.stdout.flush()
+
+class SearchRequestHandler(socketserver.StreamRequestHandler):
+    """One JSON request per line: {"question_id": ..., "llm_terms": false} -> {"result": ...}"""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                result = self.server.corpus.search(request['question_id'], request.get('llm_terms', False))
+                response = {'result': result}
+            except Exception as e:
+                response = {'error': str(e)}
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+class SearchServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, corpus, port=DEFAULT_PORT):
+        super().__init__(('127.0.0.1', port), SearchRequestHandler)
+        self.corpus = corpus
+
+def query_server(question_id, use_llm_terms=False, port=DEFAULT_PORT):
+    """Ask a running server; None if none is listening"""
     try:
-        # Add delay to respect rate limits
-        time.sleep(1)
-        
-        # Combine question and answer for better context
-        full_text = question_text
-        if answer_text:
-            full_text += "\n" + answer_text
-            
-        prompt = f"""
-        Analyze this construction safety question and extract terms into these categories:
-        1. Technical terms (equipment, tools, machinery)
-        2. Safety terms (hazards, safety measures)
-        3. Job titles and roles
-        4. Regulatory terms and standards
-        5. Procedures and processes
-        
-        Return ONLY a JSON object with these categories as keys and arrays of Hebrew terms as values.
-        Keep terms in their original Hebrew form.
-        
-        Question and Answer:
-        {full_text}
-        """
-        
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a construction safety expert specializing in Israeli construction regulations and safety standards. Extract technical terms from Hebrew text and return them ONLY as a JSON object with term categories as keys and arrays of Hebrew terms as values."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={ "type": "json_object" }
-        )
-        
-        terms = json.loads(response.choices[0].message.content)
-        return terms
-    except Exception as e:
-        print(f"Error extracting terms: {e}")
-        return {}
-
-def search_by_question(question_id):
-    # Load questions and videos
-    with open('data/questions.json', 'r', encoding='utf-8') as f:
-        questions = json.load(f)
-    with open('data/processed_summaries.json', 'r', encoding='utf-8') as f:
-        videos = json.load(f)
-    
-    # Find the question
-    question = next((q for q in questions if q['id'] == question_id), None)
-    if not question:
-        return f"Question {question_id} not found"
-    
-    # Extract terms for this question
-    question_text = question.get('text', '')
-    answer_text = question.get('answer', {}).get('text', '')
-    question['terms'] = extract_question_terms(question_text, answer_text)
-    
-    # Calculate similarity scores
-    similarity_scores = []
-    for video in videos:
-        score = calculate_similarity(question, video)
-        similarity_scores.append(score)
-    
-    # Get matches using matching logic
-    matches_data = get_matches(question, videos, similarity_scores)
-    
-    # Format results
-    return format_results(matches_data, question)
+        with socket.create_connection(('127.0.0.1', port), timeout=60) as connection:
+            request = json.dumps({'question_id': question_id, 'llm_terms': use_llm_terms}) + '\n'
+            connection.sendall(request.encode('utf-8'))
+            response = json.loads(connection.makefile('r', encoding='utf-8').readline())
+    except ConnectionRefusedError:
+        return None
+    return response.get('result', response.get('error'))
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python search_by_question.py <question_id>")
-        sys.exit(1)
-    
-    question_id = sys.argv[1]
-    results = search_by_question(question_id)
-    print(results) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Find matching videos for a question")
+    parser.add_argument("question_id", nargs="?", help="ID of the question in data/questions.json")
+    parser.add_argument("--llm-terms", action="store_true",
+                      help="Extract question terms with GPT (cached) instead of the local dictionary")
+    parser.add_argument("--serve", action="store_true",
+                      help="Stay resident: load the corpora once and answer question ids from stdin, or on --port")
+    parser.add_argument("--port", type=int,
+                      help=f"Local TCP port to serve on, or to query a running server on (e.g. {DEFAULT_PORT})")
+    args = parser.parse_args()
+
+    if args.serve:
+        corpus = SearchCorpus()
+        if args.port:
+            with SearchServer(corpus, args.port) as server:
+                print(f"Serving on 127.0.0.1:{args.port}", file=sys.stderr)
+                server.serve_forever()
+        else:
+            serve_stdin(corpus, use_llm_terms=args.llm_terms)
+    elif not args.question_id:
+        parser.error("question_id is required unless --serve is given")
+    else:
+        results = query_server(args.question_id, args.llm_terms, args.port) if args.port else None
+        if results is None:
+            results = search_by_question(args.question_id, use_llm_terms=args.llm_terms)
+        print(results)
@@ -0,0 +1,256 @@
+import cv2
+import json
+import argparse
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageDraw, ImageFont, features
+except ImportError:
+    Image = None
+
+CONFIG_PATH = Path(__file__).parent / 'config.json'
+
+TRANSITION_KINDS = ['dark', 'fade', 'cut']
+
+# Construction safety course chapter titles, as on the real title cards
+DEFAULT_TITLES = [
+    "מבוא לבטיחות בבנייה",
+    "עבודה בגובה",
+    "ציוד מגן אישי",
+    "פיגומים וסולמות",
+    "בטיחות בחשמל",
+    "עגורנים והרמת משאות",
+    "חפירות ועבודות עפר",
+    "גהות תעסוקתית",
+    "ניהול סיכונים באתר",
+    "סיכום ומבחן"
+]
+
+# Title banner colors (BGR), matching the colors title_ocr.py tells tesseract to expect
+BANNER_COLOR = (205, 0, 0)
+TEXT_COLOR = (255, 255, 255)
+SLIDE_BACKGROUND = (235, 235, 235)
+
+def load_synthetic_config() -> Dict:
+    """Load the synthetic_videos section of config.json"""
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f).get('synthetic_videos', {})
+
+class TitleRenderer:
+    """Draws title text: Hebrew through PIL with a TrueType font, or Latin text with OpenCV when none is available"""
+
+    def __init__(self, font_path: Optional[str], size: int):
+        self.font = None
+        if Image is not None and font_path and Path(font_path).exists():
+            self.font = ImageFont.truetype(font_path, size)
+        elif font_path:
+            print(f"Warning: {'Pillow is not installed' if Image is None else f'font not found: {font_path}'}; "
+                  f"rendering Latin titles")
+        # Without libraqm PIL lays text out left to right, so Hebrew is passed in visual order
+        self.rtl = self.font is not None and features.check('raqm')
+        self.size = size
+
+    @property
+    def hebrew(self) -> bool:
+        return self.font is not None
+
+    def draw(self, image: np.ndarray, text: str, box: Tuple[int, int, int, int]):
+        """Draw text centered in box (x1, y1, x2, y2) of a BGR image, in place"""
+        x1, y1, x2, y2 = box
+        if self.font is None:
+            scale = self.size / 30
+            (width, height), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, 2)
+            origin = ((x1 + x2 - width) // 2, (y1 + y2 + height) // 2)
+            cv2.putText(image, text, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, TEXT_COLOR, 2, cv2.LINE_AA)
+            return
+
+        area = Image.fromarray(cv2.cvtColor(image[y1:y2, x1:x2], cv2.COLOR_BGR2RGB))
+        draw = ImageDraw.Draw(area)
+        options = {'direction': 'rtl'} if self.rtl else {}
+        shown = text if self.rtl else text[::-1]
+        left, top, right, bottom = draw.textbbox((0, 0), shown, font=self.font, **options)
+        position = ((x2 - x1 - (right - left)) // 2 - left, (y2 - y1 - (bottom - top)) // 2 - top)
+        draw.text(position, shown, font=self.font, fill=TEXT_COLOR[::-1], **options)
+        image[y1:y2, x1:x2] = cv2.cvtColor(np.asarray(area), cv2.COLOR_RGB2BGR)
+
+def render_slide(width: int, height: int, title: str, renderer: TitleRenderer, rng: np.random.Generator) -> np.ndarray:
+    """A lecture slide: title banner across the top, random bullet lines and a figure below"""
+    slide = np.empty((height, width, 3), dtype=np.uint8)
+    slide[:] = SLIDE_BACKGROUND
+    banner_bottom = int(height * 0.15)
+    slide[:banner_bottom] = BANNER_COLOR
+    renderer.draw(slide, title, (int(width * 0.1), 0, int(width * 0.9), banner_bottom))
+
+    # Bullet lines (right-aligned, as in Hebrew slides) and a figure on the left
+    line_height = max(4, height // 30)
+    y = int(height * 0.25)
+    for _ in range(rng.integers(3, 7)):
+        line_width = int(width * rng.uniform(0.25, 0.55))
+        x2 = int(width * 0.92)
+        cv2.rectangle(slide, (x2 - line_width, y), (x2, y + line_height), (60, 60, 60), -1)
+        cv2.circle(slide, (x2 + line_height, y + line_height // 2), max(2, line_height // 3), (60, 60, 60), -1)
+        y += line_height * 3
+    color = tuple(int(c) for c in rng.integers(40, 200, 3))
+    x, y = int(width * rng.uniform(0.05, 0.15)), int(height * rng.uniform(0.3, 0.45))
+    cv2.rectangle(slide, (x, y), (x + width // 4, y + height // 3), color, -1)
+    return slide
+
+def plan_timeline(titles: List[str], fps: float, chapter_seconds: float, kinds: List[str],
+                  rng: np.random.Generator, fade_seconds: float = 0.5) -> Tuple[List[Dict], Dict]:
+    """Segments to render and the ground truth they produce.
+
+    Each chapter is one slide, entered through a transition of a random kind:
+    'dark' (a black gap), 'fade' (fade out, black gap, fade in) or 'cut'
+    (a direct slide change).
+    """
+    segments = []
+    truth = {'dark_transitions': [], 'slide_changes': [], 'titles': []}
+    frame = 0
+    for chapter, title in enumerate(titles):
+        fade = 0
+        if chapter:
+            kind = kinds[rng.integers(len(kinds))]
+            fade = int(fade_seconds * fps) if kind == 'fade' else 0
+            if fade:
+                segments.append({'kind': 'fade_out', 'start': frame, 'end': frame + fade, 'slide': chapter - 1})
+                frame += fade
+            if kind == 'cut':
+                truth['slide_changes'].append(frame / fps)
+            else:
+                gap = int(rng.uniform(0.3, 1.0) * fps)
+                segments.append({'kind': 'black', 'start': frame, 'end': frame + gap})
+                truth['dark_transitions'].append([frame / fps, (frame + gap) / fps])
+                frame += gap
+            truth['titles'].append({'time': frame / fps, 'text': title, 'transition': kind})
+
+        # The slide's time on screen starts with its fade in
+        length = max(int(rng.uniform(0.7, 1.3) * chapter_seconds * fps), fade + 1)
+        if fade:
+            segments.append({'kind': 'fade_in', 'start': frame, 'end': frame + fade, 'slide': chapter})
+        segments.append({'kind': 'slide', 'start': frame + fade, 'end': frame + length, 'slide': chapter})
+        frame += length
+    return segments, truth
+
+def generate_video(output_path: str, width: int = 1280, height: int = 720, fps: float = 25.0,
+                   chapters: int = 6, chapter_seconds: float = 8.0, kinds: Optional[List[str]] = None,
+                   titles: Optional[List[str]] = None, font: Optional[str] = None, codec: str = 'mp4v',
+                   seed: int = 0) -> Dict:
+    """
+    Render a synthetic lecture video and write its ground truth next to it.
+
+    Args:
+        output_path: Video file to write (its extension should suit the codec)
+        width, height, fps: Video format
+        chapters: Number of chapters (slides), each with its own title card
+        chapter_seconds: Average chapter length; each varies by up to 30%
+        kinds: Transition kinds to draw from (see TRANSITION_KINDS)
+        titles: Chapter titles, cycled as needed (default: Hebrew course titles)
+        font: TrueType font with Hebrew glyphs; without one, titles are Latin "Chapter N"
+        codec: FourCC for cv2.VideoWriter
+        seed: Random seed; the same arguments always produce the same video
+
+    Returns:
+        The ground truth, also saved as <video>.truth.json
+    """
+    rng = np.random.default_rng(seed)
+    renderer = TitleRenderer(font, max(12, int(height * 0.07)))
+    titles = titles or DEFAULT_TITLES
+    if renderer.hebrew:
+        titles = [titles[i % len(titles)] for i in range(chapters)]
+    else:
+        titles = [f"Chapter {i + 1}" for i in range(chapters)]
+
+    segments, truth = plan_timeline(titles, fps, chapter_seconds, kinds or TRANSITION_KINDS, rng)
+    slides = [render_slide(width, height, title, renderer, rng) for title in titles]
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    writer = cv2.VideoWriter(str(output_path), cv2.VideoWriter_fourcc(*codec), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not open a {codec} video writer for {output_path}")
+
+    black = np.zeros((height, width, 3), dtype=np.uint8)
+    frame = np.empty_like(black)
+    pointer_radius = max(3, height // 80)
+    try:
+        for segment in segments:
+            for frame_number in range(segment['start'], segment['end']):
+                if segment['kind'] == 'black':
+                    writer.write(black)
+                    continue
+                np.copyto(frame, slides[segment['slide']])
+                if segment['kind'] == 'slide':
+                    # A laser pointer wandering over the slide, which must not count as a slide change
+                    t = frame_number / fps
+                    center = (int(width * (0.5 + 0.3 * np.sin(t * 0.9))), int(height * (0.6 + 0.2 * np.cos(t * 1.3))))
+                    cv2.circle(frame, center, pointer_radius, (0, 0, 255), -1)
+                else:
+                    progress = (frame_number - segment['start'] + 1) / (segment['end'] - segment['start'] + 1)
+                    alpha = progress if segment['kind'] == 'fade_in' else 1 - progress
+                    cv2.convertScaleAbs(frame, frame, alpha)
+                writer.write(frame)
+    finally:
+        writer.release()
+
+    frame_count = segments[-1]['end'] if segments else 0
+    truth.update({
+        'video': Path(output_path).name,
+        'fps': fps,
+        'frame_count': frame_count,
+        'duration': frame_count / fps,
+        'width': width,
+        'height': height,
+        'seed': seed,
+        'hebrew_titles': renderer.hebrew
+    })
+    with open(truth_path(output_path), 'w', encoding='utf-8') as f:
+        json.dump(truth, f, ensure_ascii=False, indent=2)
+    return truth
+
+def truth_path(video_path: str) -> Path:
+    """Ground truth file of a synthetic video (video.mp4 -> video.mp4.truth.json)"""
+    return Path(str(video_path) + '.truth.json')
+
+def generate_corpus(output_dir: str, count: int, resolutions: List[Tuple[int, int]], codec: str = 'mp4v',
+                    extension: str = '.mp4', seed: int = 0, **options) -> List[str]:
+    """`count` videos per resolution, with consecutive seeds; returns their paths"""
+    paths = []
+    for width, height in resolutions:
+        for i in range(count):
+            path = str(Path(output_dir) / f"synthetic_{width}x{height}_{seed + i:03d}{extension}")
+            truth = generate_video(path, width, height, codec=codec, seed=seed + i, **options)
+            print(f"Wrote {path}: {truth['duration']:.1f}s, {len(truth['dark_transitions'])} dark transitions, "
+                  f"{len(truth['slide_changes'])} slide changes")
+            paths.append(path)
+    return paths
+
+def parse_resolution(value: str) -> Tuple[int, int]:
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+def main():
+    config = load_synthetic_config()
+    parser = argparse.ArgumentParser(description="Generate synthetic lecture videos with known transitions and titles")
+    parser.add_argument("--output-dir", default=config.get('output_dir', 'data/videos/synthetic'))
+    parser.add_argument("--count", type=int, default=3, help="Videos per resolution")
+    parser.add_argument("--resolutions", type=parse_resolution, nargs="+", default=[(1280, 720)],
+                      help="WIDTHxHEIGHT, e.g. 640x360 1920x1080")
+    parser.add_argument("--fps", type=float, default=25.0)
+    parser.add_argument("--chapters", type=int, default=6)
+    parser.add_argument("--chapter-seconds", type=float, default=8.0)
+    parser.add_argument("--transitions", nargs="+", choices=TRANSITION_KINDS, default=TRANSITION_KINDS,
+                      help="Transition kinds to mix")
+    parser.add_argument("--font", default=config.get('font'),
+                      help="TrueType font with Hebrew glyphs for the title cards")
+    parser.add_argument("--codec", default="mp4v", help="FourCC for cv2.VideoWriter (e.g. mp4v, MJPG)")
+    parser.add_argument("--extension", default=".mp4")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate_corpus(args.output_dir, args.count, args.resolutions, codec=args.codec, extension=args.extension,
+                    seed=args.seed, fps=args.fps, chapters=args.chapters, chapter_seconds=args.chapter_seconds,
+                    kinds=args.transitions, font=args.font)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import json
+import argparse
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+from near_duplicates import normalize_hebrew
+
+CONFIG_PATH = Path(__file__).parent / 'config.json'
+VOCAB_PATH = Path(__file__).parent / 'custom_vocab.txt'
+
+CATEGORIES = ['technical_terms', 'safety_terms', 'job_titles', 'regulatory_terms', 'procedures']
+
+# Single-letter prefixes (ו, ה, ב, כ, ל, מ, ש) stack up to three deep, e.g. "ושב", "כשה"
+HEBREW_PREFIX_LETTERS = set('והבכלמש')
+MAX_PREFIX_LENGTH = 3
+MIN_STEM_LENGTH = 2
+DEFAULT_SIGNIFICANCE = 3
+TERMINAL = '$'
+
+# Category names the LLM may return, mapped to the canonical category keys
+CATEGORY_ALIASES = [
+    ('technical', 'technical_terms'),
+    ('safety', 'safety_terms'),
+    ('job', 'job_titles'),
+    ('role', 'job_titles'),
+    ('regulat', 'regulatory_terms'),
+    ('procedure', 'procedures'),
+    ('process', 'procedures')
+]
+
+# Fallback categorization for dictionary terms with no LLM-assigned category
+CATEGORY_KEYWORDS = [
+    ('regulatory_terms', ['תקנ', 'חוק', 'פקוד', 'תקן', 'היתר', 'אישור']),
+    ('procedures', ['הדרכ', 'בדיק', 'תוכנית', 'ניהול', 'נוהל', 'הסמכ']),
+    ('job_titles', ['ממונה', 'מפקח', 'מנהל', 'עובד', 'מעביד', 'קבלן', 'נאמן', 'מהנדס']),
+    ('safety_terms', ['בטיחות', 'סיכונ', 'מפגע', 'תאונ', 'גהות', 'מגנ', 'נפיל'])
+]
+
+def load_dictionary_config() -> Dict:
+    """Load the term_dictionary section of config.json"""
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f).get('term_dictionary', {})
+
+def canonical_category(name: str) -> Optional[str]:
+    """Map an LLM category label to one of CATEGORIES"""
+    name = name.lower()
+    for alias, category in CATEGORY_ALIASES:
+        if alias in name:
+            return category
+    return None
+
+def guess_category(normalized_term: str) -> str:
+    """Keyword-based category for terms that never went through the LLM"""
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(keyword in normalized_term for keyword in keywords):
+            return category
+    return 'technical_terms'
+
+def prefix_variants(token: str) -> List[str]:
+    """The token and every stem left after stripping up to three Hebrew prefix letters"""
+    variants = [token]
+    for length in range(1, MAX_PREFIX_LENGTH + 1):
+        if len(token) - length < MIN_STEM_LENGTH or token[length - 1] not in HEBREW_PREFIX_LETTERS:
+            break
+        variants.append(token[length:])
+    return variants
+
+def article_variants(token: str) -> List[str]:
+    """Inner words of a phrase may take the definite article: "ציוד המגן" matches "ציוד מגן" """
+    if token.startswith('ה') and len(token) - 1 >= MIN_STEM_LENGTH:
+        return [token, token[1:]]
+    return [token]
+
+def load_vocab_terms(path: Path = VOCAB_PATH) -> List[str]:
+    """Terms and phrases from custom_vocab.txt"""
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def load_summary_terms(path: str) -> List[Dict]:
+    """Terms already extracted into processed_summaries_with_terms.json"""
+    if not Path(path).exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [term for summary in data.get('summaries', []) for term in summary.get('technical_terms', [])
+            if isinstance(term, dict) and term.get('term')]
+
+def load_cached_question_terms(path: str) -> List[Tuple[str, str]]:
+    """(category, term) pairs from LLM question extractions in the term extraction cache"""
+    if not Path(path).exists():
+        return []
+    pairs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if ':question-terms-' not in record.get('cache_key', '') or not isinstance(record.get('result'), dict):
+                continue
+            for label, terms in record['result'].items():
+                category = canonical_category(label)
+                if category and isinstance(terms, list):
+                    pairs.extend((category, term) for term in terms if isinstance(term, str))
+    return pairs
+
+def compile_dictionary(vocab_path: Path, summaries_path: str, cache_path: str) -> Dict[str, Dict]:
+    """Merge every term source into {normalized term: {term, category, significance}}"""
+    entries = {}
+
+    def add(term: str, category: Optional[str] = None, significance: Optional[int] = None):
+        key = normalize_hebrew(term)
+        if not key:
+            return
+        entry = entries.setdefault(key, {'term': term.strip(), 'category': None, 'significance': None})
+        if category and not entry['category']:
+            entry['category'] = category
+        if significance and (entry['significance'] or 0) < significance:
+            entry['significance'] = significance
+
+    for category, term in load_cached_question_terms(cache_path):
+        add(term, category=category)
+    for term in load_summary_terms(summaries_path):
+        add(term['term'], significance=term.get('significance'))
+    for term in load_vocab_terms(vocab_path):
+        add(term)
+
+    for key, entry in entries.items():
+        entry['category'] = entry['category'] or guess_category(key)
+        entry['significance'] = entry['significance'] or DEFAULT_SIGNIFICANCE
+    return entries
+
+class TermDictionary:
+    """Deterministic term extractor over a compiled dictionary.
+
+    Terms are stored in a word trie over normalized text. Matching tries each
+    position with and without Hebrew prefixes on the first word (and the
+    article on later words) and keeps the longest match, so "ולממונה הבטיחות"
+    finds "ממונה בטיחות".
+    """
+
+    def __init__(self, entries: Dict[str, Dict]):
+        self.entries = entries
+        self.trie = {}
+        for key in entries:
+            node = self.trie
+            for word in key.split():
+                node = node.setdefault(word, {})
+            node[TERMINAL] = key
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'TermDictionary':
+        """Load the compiled dictionary, compiling it first if it does not exist yet"""
+        config = load_dictionary_config()
+        path = path or config.get('path', 'data/videos/embeddings/term_dictionary.json')
+        if not Path(path).exists():
+            save_dictionary(compile_from_config(config), path)
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f)['terms'])
+
+    def _longest_match(self, tokens: List[str], start: int) -> Tuple[int, Optional[str]]:
+        """Longest dictionary term starting at tokens[start]: (tokens consumed, term key)"""
+        best = (0, None)
+        stack = [(self.trie.get(variant), start + 1) for variant in prefix_variants(tokens[start])]
+        while stack:
+            node, position = stack.pop()
+            if node is None:
+                continue
+            if TERMINAL in node and position - start > best[0]:
+                best = (position - start, node[TERMINAL])
+            if position < len(tokens):
+                stack.extend((node.get(variant), position + 1) for variant in article_variants(tokens[position]))
+        return best
+
+    def find_terms(self, text: str) -> List[Dict]:
+        """All dictionary terms in the text, with category and significance, in order of appearance"""
+        tokens = normalize_hebrew(text).split()
+        found, seen = [], set()
+        position = 0
+        while position < len(tokens):
+            length, key = self._longest_match(tokens, position)
+            if key is None:
+                position += 1
+                continue
+            if key not in seen:
+                seen.add(key)
+                found.append(self.entries[key])
+            position += length
+        return found
+
+    def extract(self, text: str) -> Dict[str, List[str]]:
+        """Terms grouped by category, in the same shape as the LLM question extraction"""
+        terms = {category: [] for category in CATEGORIES}
+        for entry in self.find_terms(text):
+            terms[entry['category']].append(entry['term'])
+        return terms
+
+def compile_from_config(config: Dict) -> Dict[str, Dict]:
+    """Compile the dictionary from the sources named in config.json"""
+    return compile_dictionary(
+        VOCAB_PATH,
+        config.get('summaries_with_terms', 'processed_summaries_with_terms.json'),
+        config.get('extraction_cache', 'data/videos/embeddings/term_extraction_cache.jsonl')
+    )
+
+def save_dictionary(entries: Dict[str, Dict], path: str):
+    """Save a compiled dictionary"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'terms': entries}, f, ensure_ascii=False, indent=2)
+
+def main():
+    config = load_dictionary_config()
+    parser = argparse.ArgumentParser(description="Compile the local Hebrew term dictionary")
+    parser.add_argument("--output", default=config.get('path', 'data/videos/embeddings/term_dictionary.json'))
+    parser.add_argument("--test", help="Extract terms from this text with the compiled dictionary")
+    args = parser.parse_args()
+
+    entries = compile_from_config(config)
+    save_dictionary(entries, args.output)
+    counts = {category: sum(1 for e in entries.values() if e['category'] == category) for category in CATEGORIES}
+    print(f"Compiled {len(entries)} terms to {args.output}")
+    for category, count in counts.items():
+        print(f"  {category}: {count}")
+
+    if args.test:
+        print(json.dumps(TermDictionary(entries).extract(args.test), ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Callable, Optional, Any
+
+import openai
+from openai import OpenAI
+from dotenv import load_dotenv
+
+from jsonl_checkpoint import JsonlCheckpoint
+
+# Load environment variables
+load_dotenv()
+
+CONFIG_PATH = Path(__file__).parent / 'config.json'
+
+# Bump a prompt's version whenever its wording changes, so cached results are not reused
+SUMMARY_TERMS_PROMPT = {
+    'version': 'summary-terms-v1',
+    'model': 'gpt-4-0125-preview',
+    'system': "You are a construction safety expert specializing in Israeli construction regulations and standards. Extract ONLY the 10 most significant technical terms, focusing on terms that are specific to construction safety, regulations, and formal procedures. Return ONLY a JSON object with a 'terms' array containing term objects.",
+    'user': """
+        Analyze this Hebrew construction safety text and extract ONLY the 10 most significant terms that are:
+        1. Unique to construction safety domain
+        2. Central to understanding the topic
+        3. Frequently used in regulations/standards
+        4. Critical for safety procedures
+        5. Specific technical terms (not general safety concepts)
+
+        For each term, provide:
+        - The term in Hebrew
+        - Significance score (1-5):
+          5 = Critical technical/regulatory term specific to construction safety
+          4 = Important domain-specific term
+          3 = Relevant but more general term
+          2 = Common term with technical usage
+          1 = General term with some relevance
+
+        Return a JSON object in this exact format:
+        {{
+            "terms": [
+                {{"term": "term in hebrew", "significance": 5}},
+                {{"term": "another term", "significance": 4}}
+            ]
+        }}
+
+        Text to analyze:
+        {content}
+        """,
+    'result_key': 'terms',
+    'default': []
+}
+
+QUESTION_TERMS_PROMPT = {
+    'version': 'question-terms-v1',
+    'model': 'gpt-4o',
+    'system': "You are a construction safety expert specializing in Israeli construction regulations and safety standards. Extract technical terms from Hebrew text and return them ONLY as a JSON object with term categories as keys and arrays of Hebrew terms as values.",
+    'user': """
+        Analyze this construction safety question and extract terms into these categories:
+        1. Technical terms (equipment, tools, machinery)
+        2. Safety terms (hazards, safety measures)
+        3. Job titles and roles
+        4. Regulatory terms and standards
+        5. Procedures and processes
+
+        Return ONLY a JSON object with these categories as keys and arrays of Hebrew terms as values.
+        Keep terms in their original Hebrew form.
+
+        Question and Answer:
+        {content}
+        """,
+    'result_key': None,
+    'default': {}
+}
+
+def load_extraction_config() -> Dict:
+    """Load the term_extraction section of config.json"""
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f).get('term_extraction', {})
+
+def cache_key(content: str, prompt: Dict) -> str:
+    """Cache key from the content hash, prompt version and model"""
+    content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    return f"{content_hash}:{prompt['version']}:{prompt['model']}"
+
+class RateLimiter:
+    """Shared cooldown: when one worker is rate limited, every worker waits it out"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def wait(self):
+        """Block until any active cooldown has passed"""
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def cool_down(self, seconds: float):
+        """Pause all workers for at least `seconds`"""
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the server's Retry-After hint from a rate limit error, if present"""
+    response = getattr(error, 'response', None)
+    value = response.headers.get('retry-after') if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+class TermExtractor:
+    """LLM term extraction with a bounded worker pool and a persistent response cache.
+
+    Results are cached by (content hash, prompt version, model) in an
+    append-only JSONL file, so re-runs over unchanged content make no API
+    calls. Failed extractions are not cached.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, max_workers: Optional[int] = None, max_retries: Optional[int] = None):
+        config = load_extraction_config()
+        self.client = OpenAI(api_key=os.getenv('REACT_APP_OPENAI_API_KEY') or os.getenv('OPENAI_API_KEY'))
+        self.cache = JsonlCheckpoint(
+            cache_path or config.get('cache', 'data/videos/embeddings/term_extraction_cache.jsonl'),
+            key_field='cache_key'
+        )
+        self.max_workers = max_workers or config.get('max_workers', 4)
+        self.max_retries = max_retries or config.get('max_retries', 5)
+        self.rate_limiter = RateLimiter()
+        self._cache_lock = threading.Lock()
+
+    def _call(self, content: str, prompt: Dict) -> Any:
+        """One extraction request, retried with backoff on rate limits and transient errors"""
+        for attempt in range(self.max_retries):
+            self.rate_limiter.wait()
+            try:
+                response = self.client.chat.completions.create(
+                    model=prompt['model'],
+                    messages=[
+                        {"role": "system", "content": prompt['system']},
+                        {"role": "user", "content": prompt['user'].format(content=content)}
+                    ],
+                    response_format={ "type": "json_object" }
+                )
+                result = json.loads(response.choices[0].message.content)
+                if prompt['result_key']:
+                    if prompt['result_key'] not in result:
+                        print(f"Warning: Expected '{prompt['result_key']}' key not found in response: {result}")
+                        return None
+                    result = result[prompt['result_key']]
+                return result
+            except (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError) as e:
+                if attempt == self.max_retries - 1:
+                    print(f"Error extracting terms after {self.max_retries} attempts: {str(e)}")
+                    return None
+                delay = retry_after_seconds(e) or (2 ** attempt + random.random())
+                if isinstance(e, openai.RateLimitError):
+                    self.rate_limiter.cool_down(delay)
+                else:
+                    time.sleep(delay)
+            except Exception as e:
+                print(f"Error extracting terms: {str(e)}")
+                return None
+
+    def _store(self, key: str, result: Any):
+        with self._cache_lock:
+            self.cache.append({'cache_key': key, 'result': result})
+
+    def extract(self, content: str, prompt: Dict) -> Any:
+        """Extract terms from one text, using the cache when possible"""
+        return self.extract_many([content], prompt)[0]
+
+    def extract_many(self, contents: List[str], prompt: Dict,
+                     on_result: Optional[Callable[[int, Any], None]] = None) -> List[Any]:
+        """Extract terms from many texts concurrently.
+
+        `on_result(index, result)` is called from the calling thread as each
+        text finishes, cached ones first, so callers can checkpoint progress.
+        A failed extraction is reported to it as None, so it is not checkpointed
+        and gets retried on the next run; the returned list holds the prompt's
+        default for it.
+        """
+        results = [None] * len(contents)
+        pending = {}
+        for i, content in enumerate(contents):
+            key = cache_key(content, prompt)
+            if key in self.cache:
+                results[i] = self.cache.records[key]['result']
+                if on_result:
+                    on_result(i, results[i])
+            else:
+                pending.setdefault(key, []).append(i)
+
+        if pending:
+            print(f"Extracting terms for {len(pending)} texts ({len(contents) - sum(map(len, pending.values()))} cached)")
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {pool.submit(self._call, contents[indices[0]], prompt): key for key, indices in pending.items()}
+                for future in as_completed(futures):
+                    key = futures[future]
+                    result = future.result()
+                    if result is not None:
+                        self._store(key, result)
+                    for i in pending[key]:
+                        results[i] = result if result is not None else prompt['default']
+                        if on_result:
+                            on_result(i, result)
+            self.cache.sync()
+
+        return results
+
+    def close(self):
+        """Flush the cache to disk"""
+        self.cache.close()
+
+_shared_extractor = None
+
+def get_extractor() -> TermExtractor:
+    """Process-wide extractor, so every script shares one pool and cache"""
+    global _shared_extractor
+    if _shared_extractor is None:
+        _shared_extractor = TermExtractor()
+    return _shared_extractor
+
+def question_text_with_answer(question_text: str, answer_text: Optional[str] = None) -> str:
+    """Combine question and answer for better context"""
+    return f"{question_text}\n{answer_text}" if answer_text else question_text
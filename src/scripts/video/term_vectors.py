@@ -0,0 +1,187 @@
+from typing import List, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+CATEGORIES = ['technical_terms', 'safety_terms', 'job_titles', 'regulatory_terms', 'procedures']
+
+# A term found in this many videos or fewer counts as rare
+RARE_TERM_MAX_VIDEOS = 3
+
+# Boost per matched technical term, by significance (1-5)
+SIGNIFICANCE_BOOSTS = {
+    5: 0.25,  # Critical terms
+    4: 0.15,  # Important terms
+    3: 0.08,  # Moderate terms
+    2: 0.04,  # Minor terms
+    1: 0.02   # Basic terms
+}
+
+# Significance-scored terms from extract_terms.py live apart from the categorized
+# terms, so they never count towards category overlap or rarity
+SCORED_TERMS = 'scored_terms'
+
+# Columns of the per-video score matrix
+OVERLAP, RARE_OVERLAP, SIGNIFICANCE = range(3)
+
+class TermVocabulary:
+    """Interns (category, term) pairs to integer ids"""
+
+    def __init__(self):
+        self.ids: Dict[Tuple[str, str], int] = {}
+        self.terms: List[str] = []
+        self.categories: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def intern(self, category: str, term: str) -> int:
+        """Id of a term, assigning a new one on first sight"""
+        key = (category, term.strip())
+        term_id = self.ids.get(key)
+        if term_id is None:
+            term_id = len(self.terms)
+            self.ids[key] = term_id
+            self.terms.append(key[1])
+            self.categories.append(category)
+        return term_id
+
+    def lookup(self, category: str, term: str) -> Optional[int]:
+        """Id of a known term, or None"""
+        return self.ids.get((category, term.strip()))
+
+def iter_video_terms(video: Dict) -> Iterable[Tuple[str, str, int]]:
+    """(category, term, significance) for a video's categorized terms and its significance-scored technical terms"""
+    for category in CATEGORIES:
+        for term in video.get('terms', {}).get(category, []):
+            yield category, term, 0
+    for term in video.get('technical_terms', []):
+        if isinstance(term, dict) and term.get('term'):
+            yield SCORED_TERMS, term['term'], term.get('significance', 0)
+
+def iter_question_terms(question_terms: Dict) -> Iterable[Tuple[str, str]]:
+    """(category, term) for every distinct term in a question's extracted terms"""
+    for category in CATEGORIES:
+        for term in set(question_terms.get(category, [])):
+            yield category, term
+
+class TermIndex:
+    """Sparse video x term matrix over an interned vocabulary.
+
+    Every per-query term signal is one column of a dense query matrix, so
+    overlap, rare-term overlap and significance boosts for all videos come
+    from a single sparse-dense product instead of per-pair Python sets.
+    """
+
+    def __init__(self, videos: List[Dict]):
+        self.vocabulary = TermVocabulary()
+        rows, columns = [], []
+        scored_rows, scored_columns, scored_significance = [], [], []
+        for row, video in enumerate(videos):
+            seen = set()
+            for category, term, significance in iter_video_terms(video):
+                term_id = self.vocabulary.intern(category, term)
+                if category == SCORED_TERMS:
+                    if term_id in seen:
+                        continue
+                    seen.add(term_id)
+                    scored_rows.append(row)
+                    scored_columns.append(term_id)
+                    scored_significance.append(significance or 0)
+                else:
+                    rows.append(row)
+                    columns.append(term_id)
+
+        shape = (len(videos), len(self.vocabulary))
+        matrix = sparse.csr_matrix((np.ones(len(rows)), (rows, columns)), shape=shape)
+        matrix.sum_duplicates()
+        matrix.data[:] = 1.0  # presence, not counts
+        self.matrix = matrix
+
+        # Per-video significance of each scored term (the same term may differ between videos),
+        # and the same sparsity pattern holding the boost it earns
+        self.significance = sparse.csr_matrix(
+            (np.asarray(scored_significance, dtype=np.int64), (scored_rows, scored_columns)), shape=shape
+        )
+        self.boosts = self.significance.astype(np.float64)
+        self.boosts.data = np.asarray([SIGNIFICANCE_BOOSTS.get(s, 0.0) for s in self.significance.data])
+
+        self.document_frequency = np.diff(matrix.tocsc().indptr)
+        self.rare = self.document_frequency <= RARE_TERM_MAX_VIDEOS
+        self.scored = np.asarray([category == SCORED_TERMS for category in self.vocabulary.categories])
+
+    def question_vector(self, question_terms: Dict) -> Tuple[sparse.csr_matrix, int]:
+        """Sparse 1 x vocabulary vector of a question's known terms, plus its total term count"""
+        ids, total = [], 0
+        for category, term in iter_question_terms(question_terms):
+            total += 1
+            term_id = self.vocabulary.lookup(category, term)
+            if term_id is not None:
+                ids.append(term_id)
+        vector = sparse.csr_matrix(
+            (np.ones(len(ids), dtype=np.float32), ([0] * len(ids), ids)), shape=(1, len(self.vocabulary))
+        )
+        return vector, total
+
+    def terms_in_text(self, *texts: str) -> np.ndarray:
+        """Indicator over the vocabulary of scored terms that appear verbatim in any of the texts"""
+        present = np.zeros(len(self.vocabulary))
+        for term_id in np.flatnonzero(self.scored):
+            term = self.vocabulary.terms[term_id]
+            if any(term in text for text in texts if text):
+                present[term_id] = 1.0
+        return present
+
+    def score(self, question_terms: Optional[Dict] = None, texts: Tuple[str, ...] = ()) -> Tuple[np.ndarray, int]:
+        """Per-video (matched, rare matched, significance boost) columns, plus the question's term count"""
+        query = np.zeros((len(self.vocabulary), 2))
+        total = 0
+        if question_terms:
+            vector, total = self.question_vector(question_terms)
+            query[vector.indices, OVERLAP] = 1.0
+            query[:, RARE_OVERLAP] = query[:, OVERLAP] * self.rare
+        scores = np.zeros((self.matrix.shape[0], 3))
+        scores[:, [OVERLAP, RARE_OVERLAP]] = self.matrix @ query
+        if texts:
+            scores[:, SIGNIFICANCE] = self.boosts @ self.terms_in_text(*texts)
+        return scores, total
+
+    def term_boosts(self, question_terms: Dict) -> np.ndarray:
+        """Term overlap boost per video, weighting rare terms more; 0 below 30% overlap"""
+        scores, total = self.score(question_terms)
+        if total == 0:
+            return np.zeros(self.matrix.shape[0], dtype=np.float32)
+
+        boost = scores[:, OVERLAP] / total
+        rare = scores[:, RARE_OVERLAP] / total
+        # Increased weight for rare terms (60% rare, 40% regular)
+        boost = np.where(rare > 0, boost * 0.4 + rare * 0.6, boost)
+        # Only apply boost if we have significant term overlap
+        return np.where(boost < 0.3, 0.0, boost)
+
+    def significance_matches(self, row: int, question_text: str, solution_text: str,
+                             present: Optional[np.ndarray] = None) -> List[Dict]:
+        """Details of the significance-scored terms of one video found in the question or solution.
+
+        `present` is terms_in_text(question_text, solution_text), computed once per question.
+        """
+        start, end = self.significance.indptr[row], self.significance.indptr[row + 1]
+        matches = []
+        for term_id, significance, boost in zip(self.significance.indices[start:end],
+                                                self.significance.data[start:end], self.boosts.data[start:end]):
+            term = self.vocabulary.terms[term_id]
+            found = present[term_id] if present is not None else term in question_text or term in solution_text
+            if found:
+                matches.append({
+                    'term': term,
+                    'significance': int(significance),
+                    'boost': float(boost),
+                    'found_in': 'question' if term in question_text else 'solution'
+                })
+        return matches
+
+    def rows_with_terms(self, present: np.ndarray) -> np.ndarray:
+        """Videos with at least one scored term marked present"""
+        pattern = self.significance.copy()
+        pattern.data = np.ones_like(pattern.data)
+        return np.flatnonzero(pattern @ present)
@@ -0,0 +1,20 @@
+from benchmark_detectors import match_events, score_counts
+
+def test_events_match_within_tolerance():
+    assert match_events([1.0, 5.2, 9.0], [1.1, 5.0], tolerance=0.5) == [(0, 0), (1, 1)]
+
+def test_matching_is_one_to_one_and_closest_first():
+    # Detection 1 is closest to truth 0 and takes it, which leaves truth 1 to detection 0
+    assert match_events([10.0, 10.35], [10.3, 10.45], tolerance=0.5) == [(0, 1), (1, 0)]
+    assert match_events([10.0, 10.1], [10.08], tolerance=0.5) == [(1, 0)]
+
+def test_nothing_matches_outside_tolerance():
+    assert match_events([1.0], [2.0], tolerance=0.5) == []
+    assert match_events([], [1.0], tolerance=0.5) == []
+
+def test_score_counts():
+    scores = score_counts(true_positives=2, detected=4, expected=2)
+    assert scores['precision'] == 0.5
+    assert scores['recall'] == 1.0
+    assert scores['false_positives'] == 2
+    assert abs(scores['f1'] - 2 / 3) < 1e-9
@@ -0,0 +1,45 @@
+import pytest
+
+from chunking import chunk_summary, chunking_key, count_tokens, split_paragraphs
+
+HEADER = "שיעור בעבודה בגובה\nמיקוד בפיגומים"
+
+def paragraphs(count: int, words: int = 30):
+    return [' '.join(f"מילה{p}_{w}" for w in range(words)) for p in range(count)]
+
+def test_split_paragraphs_on_blank_lines():
+    assert split_paragraphs("א\n\nב\n  \nג\n") == ['א', 'ב', 'ג']
+
+def test_chunks_fit_budget_and_start_with_header():
+    chunks = chunk_summary('v1', HEADER, '\n\n'.join(paragraphs(12)), max_tokens=300)
+    assert len(chunks) > 1
+    for i, chunk in enumerate(chunks):
+        assert chunk['chunk_id'] == f"v1#{i}"
+        assert chunk['text'].startswith(HEADER + '\n')
+        assert count_tokens(chunk['text']) <= 300
+
+def test_consecutive_chunks_share_overlap_paragraphs():
+    texts = paragraphs(12, words=10)
+    chunks = chunk_summary('v1', HEADER, '\n\n'.join(texts), max_tokens=300, overlap_paragraphs=1)
+    assert len(chunks) > 1
+    for previous, current in zip(chunks, chunks[1:]):
+        last_paragraph = previous['text'].split('\n')[-1]
+        assert current['text'].split('\n')[2] == last_paragraph
+
+    # Every paragraph lands in some chunk
+    assert all(any(text in chunk['text'] for chunk in chunks) for text in texts)
+
+def test_oversized_paragraph_is_split():
+    paragraph = '. '.join(' '.join(f"מילה{s}_{w}" for w in range(20)) for s in range(30)) + '.'
+    chunks = chunk_summary('v1', HEADER, paragraph, max_tokens=200)
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk['text']) <= 200 for chunk in chunks)
+
+def test_header_larger_than_budget_is_rejected():
+    with pytest.raises(ValueError):
+        chunk_summary('v1', HEADER * 50, 'תוכן', max_tokens=20)
+
+def test_chunking_key_changes_with_settings():
+    assert chunking_key(800, 1) == chunking_key(800, 1)
+    assert chunking_key(800, 1) != chunking_key(600, 1)
+    assert chunking_key(800, 1) != chunking_key(800, 2)
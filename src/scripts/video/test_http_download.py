@@ -0,0 +1,111 @@
+import re
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from http_download import make_session, download_file, part_path
+
+DATA = bytes(range(256)) * 1200  # 300 KiB
+MD5 = hashlib.md5(DATA).hexdigest()
+CUT_AT = 100_000
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves DATA on any path. /norange/ ignores Range headers; /cut/ drops the first response early."""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('Range')))
+        start = 0
+        match = re.match(r'bytes=(\d+)-', self.headers.get('Range') or '')
+        if match and not self.path.startswith('/norange/'):
+            start = int(match.group(1))
+            if start >= len(DATA):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(DATA)}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(DATA) - 1}/{len(DATA)}')
+        else:
+            self.send_response(200)
+        body = DATA[start:]
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        if self.path.startswith('/cut/') and not self.server.cut:
+            self.server.cut = True
+            self.wfile.write(body[:CUT_AT])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    httpd.requests = []
+    httpd.cut = False
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def download(server, path, output_path, **options):
+    options.setdefault('progress', False)
+    return download_file(make_session(retries=0), server.url + path, output_path, **options)
+
+def test_plain_download(server, tmp_path):
+    output = download(server, '/file.bin', tmp_path / 'file.bin', size=len(DATA), md5=MD5)
+    assert output.read_bytes() == DATA
+    assert not part_path(output).exists()
+    assert server.requests == [('/file.bin', None)]
+
+def test_resumes_after_connection_cut(server, tmp_path):
+    output = download(server, '/cut/file.bin', tmp_path / 'file.bin', md5=MD5, chunk_size=4096)
+    assert output.read_bytes() == DATA
+    assert server.requests[0] == ('/cut/file.bin', None)
+    # Resumed from the last whole chunk written before the cut, not from the start
+    path, range_header = server.requests[-1]
+    assert 0 < int(range_header[len('bytes='):-1]) <= CUT_AT
+
+def test_restarts_when_server_ignores_range(server, tmp_path):
+    output = tmp_path / 'file.bin'
+    part_path(output).write_bytes(b'x' * 1000)
+    download(server, '/norange/file.bin', output, size=len(DATA), md5=MD5)
+    assert output.read_bytes() == DATA
+    assert server.requests == [('/norange/file.bin', 'bytes=1000-')]
+
+def test_complete_part_file_is_kept(server, tmp_path):
+    output = tmp_path / 'file.bin'
+    part_path(output).write_bytes(DATA)
+    download(server, '/file.bin', output, md5=MD5)
+    assert output.read_bytes() == DATA
+    assert not part_path(output).exists()
+    assert server.requests == [('/file.bin', f'bytes={len(DATA)}-')]
+
+def test_md5_mismatch_fails_without_output(server, tmp_path):
+    output = tmp_path / 'file.bin'
+    with pytest.raises(RuntimeError, match='MD5'):
+        download(server, '/file.bin', output, md5='0' * 32, attempts=2)
+    assert not output.exists()
+    assert not part_path(output).exists()
+    assert len(server.requests) == 2
+
+def test_existing_output_is_verified_not_downloaded(server, tmp_path):
+    output = tmp_path / 'file.bin'
+    output.write_bytes(DATA)
+    download(server, '/file.bin', output, md5=MD5)
+    assert server.requests == []
+
+    output.write_bytes(b'y' * len(DATA))
+    download(server, '/file.bin', output, md5=MD5)
+    assert output.read_bytes() == DATA
+    assert len(server.requests) == 1
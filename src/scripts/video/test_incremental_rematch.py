@@ -0,0 +1,37 @@
+from incremental_rematch import patch_entry
+
+def entries(*pairs):
+    return [{'video_id': video_id, 'similarity': similarity} for video_id, similarity in pairs]
+
+def test_new_video_enters_a_full_list():
+    top = entries(('a', 0.9), ('b', 0.8), ('c', 0.7))
+    assert patch_entry(top, 'd', 0.85, 3)
+    assert top == entries(('a', 0.9), ('d', 0.85), ('b', 0.8))
+
+def test_new_video_below_the_floor_is_ignored():
+    top = entries(('a', 0.9), ('b', 0.8), ('c', 0.7))
+    assert patch_entry(top, 'd', 0.5, 3)
+    assert top == entries(('a', 0.9), ('b', 0.8), ('c', 0.7))
+
+def test_short_list_takes_any_score():
+    top = entries(('a', 0.9))
+    assert patch_entry(top, 'b', 0.1, 3)
+    assert top == entries(('a', 0.9), ('b', 0.1))
+
+def test_changed_video_moves_within_the_list():
+    top = entries(('a', 0.9), ('b', 0.8), ('c', 0.7))
+    assert patch_entry(top, 'c', 0.95, 3)
+    assert top == entries(('c', 0.95), ('a', 0.9), ('b', 0.8))
+
+def test_changed_video_falling_out_of_a_full_list_needs_a_rescore():
+    top = entries(('a', 0.9), ('b', 0.8), ('c', 0.7))
+    assert not patch_entry(top, 'b', 0.6, 3)
+
+def test_removed_video():
+    top = entries(('a', 0.9), ('b', 0.8), ('c', 0.7))
+    assert patch_entry(top, 'x', None, 3)
+    assert not patch_entry(top, 'b', None, 3)
+
+    top = entries(('a', 0.9), ('b', 0.8))
+    assert patch_entry(top, 'b', None, 3)
+    assert top == entries(('a', 0.9))
@@ -0,0 +1,36 @@
+import json
+
+from jsonl_checkpoint import JsonlCheckpoint
+
+def test_records_survive_a_restart(tmp_path):
+    path = tmp_path / 'progress.jsonl'
+    with JsonlCheckpoint(path, key_field='id') as checkpoint:
+        checkpoint.append({'id': 'a', 'value': 1})
+        checkpoint.extend([{'id': 'b', 'value': 2}, {'id': 'a', 'value': 3}])
+
+    checkpoint = JsonlCheckpoint(path, key_field='id')
+    assert len(checkpoint) == 2
+    assert 'b' in checkpoint
+    assert checkpoint.records['a'] == {'id': 'a', 'value': 3}
+
+def test_line_cut_short_by_a_crash_is_skipped(tmp_path):
+    path = tmp_path / 'progress.jsonl'
+    path.write_text('{"id": "a"}\n{"id": "b", "val', encoding='utf-8')
+
+    with JsonlCheckpoint(path, key_field='id') as checkpoint:
+        assert list(checkpoint.records) == ['a']
+        checkpoint.append({'id': 'c'})
+
+    assert list(JsonlCheckpoint(path, key_field='id').records) == ['a', 'c']
+
+def test_compact_orders_records_and_adds_unlogged_ones(tmp_path):
+    path = tmp_path / 'progress.jsonl'
+    output = tmp_path / 'output.json'
+    with JsonlCheckpoint(path, key_field='id') as checkpoint:
+        for key in ('a', 'b', 'extra'):
+            checkpoint.append({'id': key})
+        checkpoint.compact(output, order=['b', 'failed', 'a'], unlogged=[{'id': 'failed', 'retry': True}])
+
+    with open(output, 'r', encoding='utf-8') as f:
+        assert [record['id'] for record in json.load(f)['summaries']] == ['b', 'failed', 'a', 'extra']
+    assert 'failed' not in JsonlCheckpoint(path, key_field='id')
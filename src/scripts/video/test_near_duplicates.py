@@ -0,0 +1,43 @@
+import numpy as np
+
+from near_duplicates import MinHashDeduper, dedupe_and_fan_out, normalize_hebrew, question_fingerprint_text
+
+BASE = ' '.join(f"מילה{i}" for i in range(40))
+
+def test_normalize_hebrew_ignores_niqqud_punctuation_and_final_letters():
+    assert normalize_hebrew("שָׁלוֹם, עולם!") == normalize_hebrew("שלומ עולמ")
+    assert normalize_hebrew("בית־ספר") == "בית ספר"
+
+def test_fingerprint_ignores_option_order():
+    first = question_fingerprint_text("מה נכון?", [{'text': 'א'}, {'text': 'ב'}])
+    second = question_fingerprint_text("מה נכון?", [{'text': 'ב'}, {'text': 'א'}])
+    assert first == second
+
+def test_group_joins_near_duplicates_only():
+    texts = [BASE, 'טקסט אחר לגמרי ' + ' '.join(f"x{i}" for i in range(40)), BASE + ' סוף', BASE]
+    groups = MinHashDeduper(threshold=0.8).group(texts)
+    assert groups == [[0, 2, 3], [1]]
+
+def test_group_compares_every_pair_in_a_bucket():
+    # All three share the first band; only texts 1 and 2 are similar, and never share a bucket without text 0
+    signatures = {'a': [1, 1, 9, 9], 'b': [1, 1, 2, 3], 'c': [1, 1, 2, 4]}
+
+    class FixedSignatures(MinHashDeduper):
+        def signature(self, text):
+            return np.asarray(signatures[text], dtype=np.uint64)
+
+    deduper = FixedSignatures(threshold=0.7, num_perm=4, bands=2)
+    assert deduper.group(['a', 'b', 'c']) == [[0], [1, 2]]
+
+def test_dedupe_and_fan_out_processes_one_text_per_group():
+    calls = []
+
+    def process(texts):
+        calls.append(list(texts))
+        return [len(text) for text in texts]
+
+    texts = [BASE, 'שונה ' + ' '.join(f"y{i}" for i in range(40)), BASE]
+    results, report = dedupe_and_fan_out(texts, process, MinHashDeduper(threshold=0.8))
+    assert calls == [[texts[0], texts[1]]]
+    assert results == [len(texts[0]), len(texts[1]), len(texts[0])]
+    assert report == {'texts': 3, 'groups': 2, 'duplicate_groups': 1, 'calls_saved': 1}
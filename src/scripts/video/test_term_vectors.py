@@ -0,0 +1,50 @@
+import numpy as np
+
+from term_vectors import TermIndex, TermVocabulary, OVERLAP, RARE_OVERLAP, SIGNIFICANCE
+
+VIDEOS = [
+    {'terms': {'technical_terms': ['פיגום', 'רתמה'], 'safety_terms': ['נפילה']},
+     'technical_terms': [{'term': 'פיגום', 'significance': 5}, {'term': 'קסדה', 'significance': 3}]},
+    {'terms': {'technical_terms': ['פיגום']}},
+    {'terms': {}},
+]
+
+def test_vocabulary_interns_per_category():
+    vocabulary = TermVocabulary()
+    first = vocabulary.intern('technical_terms', ' פיגום ')
+    assert vocabulary.intern('technical_terms', 'פיגום') == first
+    assert vocabulary.intern('safety_terms', 'פיגום') != first
+    assert vocabulary.lookup('job_titles', 'פיגום') is None
+    assert len(vocabulary) == 2
+
+def test_score_counts_overlap_and_rare_terms():
+    index = TermIndex(VIDEOS)
+    scores, total = index.score({'technical_terms': ['פיגום', 'רתמה', 'לא קיים']})
+    assert total == 3
+    assert scores[:, OVERLAP].tolist() == [2, 1, 0]
+    assert scores[:, RARE_OVERLAP].tolist() == [2, 1, 0]
+
+def test_common_terms_are_not_rare():
+    videos = [{'terms': {'technical_terms': ['פיגום']}} for _ in range(4)]
+    scores, _ = TermIndex(videos).score({'technical_terms': ['פיגום']})
+    assert scores[:, OVERLAP].tolist() == [1] * 4
+    assert scores[:, RARE_OVERLAP].tolist() == [0] * 4
+
+def test_term_boosts_weight_rare_terms_and_drop_small_overlap():
+    index = TermIndex(VIDEOS)
+    boosts = index.term_boosts({'technical_terms': ['פיגום', 'רתמה']})
+    np.testing.assert_allclose(boosts, [1.0, 0.5, 0.0])
+
+    # One matched term out of four is below the 30% overlap floor
+    boosts = index.term_boosts({'technical_terms': ['פיגום', 'א', 'ב', 'ג']})
+    np.testing.assert_allclose(boosts, [0.0, 0.0, 0.0])
+
+def test_significance_boosts_from_text():
+    index = TermIndex(VIDEOS)
+    scores, _ = index.score(texts=("מה מחזיק את הפיגום?", "חובה לחבוש קסדה"))
+    np.testing.assert_allclose(scores[:, SIGNIFICANCE], [0.25 + 0.08, 0.0, 0.0])
+
+    matches = index.significance_matches(0, "מה מחזיק את הפיגום?", "חובה לחבוש קסדה")
+    assert {m['term']: m['found_in'] for m in matches} == {'פיגום': 'question', 'קסדה': 'solution'}
+    present = index.terms_in_text("קסדה")
+    assert index.rows_with_terms(present).tolist() == [0]
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+import video_batch
+from video_batch import VideoBatch, cache_key, file_hash
+
+PARAMS = {'threshold': 20, 'min_duration': 0.1}
+
+def fake_detector(video_path, detector, params, options, log_path):
+    """Stands in for run_detector: videos named broken* fail"""
+    if 'broken' in video_path:
+        raise RuntimeError('could not decode')
+    return {'transitions': [[1.0, 2.0]], 'chapters': [{'time': 0.0, 'title': 'Introduction'},
+                                                       {'time': 2.0, 'title': 'Chapter 1'}]}
+
+def test_cache_key_covers_video_detector_and_params():
+    key = cache_key('hash', 'transitions', PARAMS)
+    assert key == cache_key('hash', 'transitions', dict(reversed(list(PARAMS.items()))))
+    assert key != cache_key('other', 'transitions', PARAMS)
+    assert key != cache_key('hash', 'titles', PARAMS)
+    assert key != cache_key('hash', 'transitions', dict(PARAMS, threshold=30))
+
+@pytest.fixture
+def videos(tmp_path):
+    paths = []
+    for name in ('good.mp4', 'broken.mp4'):
+        path = tmp_path / name
+        path.write_bytes(name.encode('utf-8') * 100)
+        paths.append(str(path))
+    return paths
+
+def test_results_are_cached_and_failures_retried(tmp_path, videos, monkeypatch):
+    monkeypatch.setattr(video_batch, 'run_detector', fake_detector)
+    output_dir = tmp_path / 'out'
+    manifest = VideoBatch(str(output_dir), 'transitions', PARAMS, workers=1).run(videos)
+    assert manifest['videos'][videos[0]]['status'] == 'done'
+    assert manifest['videos'][videos[1]]['status'] == 'failed'
+    assert len(list((output_dir / 'cache').glob('*.json'))) == 1
+
+    # A resumed run reuses the manifest's hashes and the cached result, and retries the failure
+    calls = []
+    monkeypatch.setattr(video_batch, 'file_hash', lambda path: calls.append(path) or file_hash(path))
+    manifest = VideoBatch(str(output_dir), 'transitions', PARAMS, workers=1).run(videos)
+    assert calls == []
+    assert manifest['videos'][videos[0]]['status'] == 'cached'
+    assert manifest['videos'][videos[0]]['chapters'][1] == {'time': 2.0, 'title': 'Chapter 1'}
+    assert manifest['videos'][videos[1]]['status'] == 'failed'
+
+    with open(output_dir / 'manifest_transitions.json', 'r', encoding='utf-8') as f:
+        assert json.load(f) == manifest
+
+def test_changed_parameters_miss_the_cache(tmp_path, videos, monkeypatch):
+    monkeypatch.setattr(video_batch, 'run_detector', fake_detector)
+    output_dir = tmp_path / 'out'
+    VideoBatch(str(output_dir), 'transitions', PARAMS, workers=1).run(videos[:1])
+    manifest = VideoBatch(str(output_dir), 'transitions', dict(PARAMS, threshold=30), workers=1).run(videos[:1])
+    assert manifest['videos'][videos[0]]['status'] == 'done'
+    assert len(list((output_dir / 'cache').glob('*.json'))) == 2
@@ -0,0 +1,187 @@
+import os
+import shlex
+import shutil
+import tempfile
+import threading
+import subprocess
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import tesserocr
+    from PIL import Image
+except ImportError:
+    tesserocr = None
+
+WINDOWS_TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+LANGUAGE = 'heb+script/Hebrew'
+
+# Custom Tesseract configuration - with exact colors
+TESSERACT_VARIABLES = {
+    'tessedit_write_images': '1',
+    'textord_dark_mode_bold': '1',
+    'textord_min_linesize': '3.0',
+    'tessedit_fg_color': '255,255,255',  # White text
+    'tessedit_bg_color': '0,0,205',      # Royal blue background
+    'tessedit_preserve_fg_color': '1'    # Preserve exact colors
+}
+CUSTOM_CONFIG = f'--oem 3 --psm 7 -l {LANGUAGE} --dpi 300 ' + ' '.join(
+    f'-c {name}={value}' for name, value in TESSERACT_VARIABLES.items()
+)
+
+# Separates the pages of one batched tesseract run, so texts map back to their images
+PAGE_SEPARATOR = '<<<TITLE-OCR-PAGE>>>'
+
+# Title crops are hashed on a 64x16 grid of cells: wide enough that a changed word flips several bits
+HASH_SIZE = (64, 16)
+# Gray levels a cell must exceed its left neighbour by to set a bit, so flat backgrounds hash stably under noise
+HASH_MARGIN = 2
+# Most differing bits for two crops to count as the same title; a single changed character flips about 4-9
+HASH_THRESHOLD = 3
+
+OCR_ENGINES = ['tesserocr', 'tesseract']
+
+def default_engine() -> str:
+    """tesserocr when installed, otherwise the tesseract command"""
+    return 'tesserocr' if tesserocr else 'tesseract'
+
+def tesseract_cmd() -> str:
+    """The Windows install path used so far, else tesseract from PATH"""
+    if os.path.exists(WINDOWS_TESSERACT_CMD):
+        return WINDOWS_TESSERACT_CMD
+    return shutil.which('tesseract') or 'tesseract'
+
+def chunk(items: List, count: int) -> List[List]:
+    """Split items into at most `count` contiguous, nearly equal chunks"""
+    size = -(-len(items) // max(count, 1))
+    return [items[i:i + size] for i in range(0, len(items), size)] if items else []
+
+class TesseractBatchOCR:
+    """One tesseract process per batch of images instead of one per image.
+
+    Images are written to a temp directory and passed as a list file, so the
+    Hebrew model loads once per batch; batches run in parallel.
+    """
+
+    def __init__(self, workers: int = 4, config: str = CUSTOM_CONFIG):
+        self.workers = workers
+        self.config = config
+        self.cmd = tesseract_cmd()
+
+    def _run_batch(self, images: List[np.ndarray]) -> List[str]:
+        with tempfile.TemporaryDirectory(prefix='title_ocr_') as temp_dir:
+            paths = []
+            for i, image in enumerate(images):
+                path = Path(temp_dir) / f"{i:05d}.png"
+                cv2.imwrite(str(path), image)
+                paths.append(str(path))
+            list_path = Path(temp_dir) / 'images.txt'
+            list_path.write_text('\n'.join(paths) + '\n', encoding='utf-8')
+
+            command = [self.cmd, str(list_path), 'stdout', *shlex.split(self.config),
+                       '-c', f'page_separator={PAGE_SEPARATOR}']
+            # tessedit_write_images drops its debug image in the working directory; keep it in the temp dir
+            result = subprocess.run(command, capture_output=True, cwd=temp_dir)
+            if result.returncode != 0:
+                raise RuntimeError(f"tesseract failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+
+        pages = result.stdout.decode('utf-8').split(PAGE_SEPARATOR)
+        if len(pages) < len(images):
+            raise RuntimeError(f"tesseract returned {len(pages)} pages for {len(images)} images")
+        return [page.strip() for page in pages[:len(images)]]
+
+    def recognize(self, images: List[np.ndarray]) -> List[str]:
+        """Text of each image, in order"""
+        batches = chunk(images, self.workers)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(self._run_batch, batches))
+        return [text for batch in results for text in batch]
+
+class TesserocrOCR:
+    """Persistent in-process tesseract engines (tesserocr), one per worker thread.
+
+    Each engine loads the Hebrew model once and is reused for every image;
+    tesserocr releases the GIL while recognizing, so threads run in parallel.
+    """
+
+    def __init__(self, workers: int = 4):
+        self.workers = workers
+        self.local = threading.local()
+        self.engines = []
+        self.lock = threading.Lock()
+
+    def _engine(self):
+        if not hasattr(self.local, 'api'):
+            api = tesserocr.PyTessBaseAPI(lang=LANGUAGE, psm=tesserocr.PSM.SINGLE_LINE, oem=tesserocr.OEM.DEFAULT)
+            for name, value in TESSERACT_VARIABLES.items():
+                api.SetVariable(name, value)
+            api.SetVariable('user_defined_dpi', '300')
+            self.local.api = api
+            with self.lock:
+                self.engines.append(api)
+        return self.local.api
+
+    def _recognize_one(self, image: np.ndarray) -> str:
+        api = self._engine()
+        api.SetImage(Image.fromarray(image))
+        return api.GetUTF8Text().strip()
+
+    def recognize(self, images: List[np.ndarray]) -> List[str]:
+        """Text of each image, in order"""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(self._recognize_one, images))
+
+    def close(self):
+        for api in self.engines:
+            api.End()
+        self.engines = []
+
+def dhash(image: np.ndarray, size: Tuple[int, int] = HASH_SIZE, margin: int = HASH_MARGIN) -> int:
+    """Difference hash: one bit per pair of horizontally neighbouring cells of the downscaled gray image"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    cells = cv2.resize(gray, (size[0] + 1, size[1]), interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = cells[:, 1:] > cells[:, :-1] + margin
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+def ocr_deduplicated(images: List[np.ndarray], hashes: List[int], threshold: int = HASH_THRESHOLD,
+                     workers: int = 4, engine: Optional[str] = None) -> Tuple[List[str], List[int]]:
+    """OCR each distinct title once, reusing its text for crops whose hash is within `threshold` bits.
+
+    A negative threshold OCRs every crop.
+    Returns: (text of each image, index of the image whose OCR produced it)
+    """
+    recognized = []  # (hash, image index) of every crop that gets OCRed
+    sources = []
+    for i, image_hash in enumerate(hashes):
+        source = next((index for known_hash, index in recognized
+                       if hamming_distance(image_hash, known_hash) <= threshold), None) if threshold >= 0 else None
+        if source is None:
+            source = i
+            recognized.append((image_hash, i))
+        sources.append(source)
+
+    texts = dict(zip([i for _, i in recognized], ocr_images([images[i] for _, i in recognized], workers, engine)))
+    if images:
+        print(f"OCR calls avoided by title hashing: {len(images) - len(recognized)} of {len(images)}")
+    return [texts[source] for source in sources], sources
+
+def ocr_images(images: List[np.ndarray], workers: int = 4, engine: Optional[str] = None) -> List[str]:
+    """OCR many title crops at once: tesserocr when installed, otherwise batched tesseract runs"""
+    if not images:
+        return []
+    engine = engine or default_engine()
+    print(f"Running OCR on {len(images)} title crops ({engine}, {workers} workers)...")
+    if engine == 'tesserocr':
+        ocr = TesserocrOCR(workers)
+        try:
+            return ocr.recognize(images)
+        finally:
+            ocr.close()
+    return TesseractBatchOCR(workers).recognize(images)
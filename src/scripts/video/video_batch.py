@@ -0,0 +1,238 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import contextlib
+from pathlib import Path
+from typing import List, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from detect_titles import find_videos
+from title_ocr import HASH_THRESHOLD, OCR_ENGINES, default_engine
+from debug_writer import DEBUG_LEVELS
+from frame_sources import DECODERS
+
+CONFIG_PATH = Path(__file__).parent / 'config.json'
+
+# Parameters that change a detector's output, and so belong in its cache key
+DETECTOR_PARAMS = {
+    'transitions': ['threshold', 'min_duration', 'stride', 'sample_ms', 'decoder', 'width'],
+    'titles': ['decoder', 'width', 'slide_changes', 'hash_threshold', 'ocr_engine'],
+    'silence': ['threshold_db', 'min_silence', 'window_ms', 'confirm']
+}
+
+def load_batch_config() -> Dict:
+    """Load the video_batch section of config.json"""
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f).get('video_batch', {})
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """sha256 of the file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cache_key(video_hash: str, detector: str, params: Dict) -> str:
+    """Key of one detector run: the video's content hash plus the detector and its parameters"""
+    payload = json.dumps({'video': video_hash, 'detector': detector, 'params': params}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def write_json_atomic(path: Path, data):
+    """Write JSON through a temp file and rename, so a crash never leaves a truncated file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def transitions_to_chapters(transitions: List) -> List[Dict]:
+    """YouTube-style chapters: an introduction, then one chapter from the end of each transition"""
+    chapters = [{'time': 0.0, 'title': 'Introduction'}]
+    chapters += [{'time': end, 'title': f"Chapter {i}"} for i, (_, end) in enumerate(transitions, 1)]
+    return chapters
+
+def titles_to_chapters(titles: Dict[float, str]) -> List[Dict]:
+    """Chapters from detected title texts, in time order"""
+    return [{'time': timestamp, 'title': text} for timestamp, text in sorted(titles.items())]
+
+def run_detector(video_path: str, detector: str, params: Dict, options: Dict, log_path: str) -> Dict:
+    """Run one detector on one video (in a worker process), logging its output to a file.
+
+    `options` are run settings that do not change the result (e.g. the debug level).
+    """
+    Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        if detector == 'transitions':
+            from detect_dark_transitions import detect_dark_transitions
+            transitions = detect_dark_transitions(video_path, **params)
+            return {'transitions': transitions, 'chapters': transitions_to_chapters(transitions)}
+        if detector == 'silence':
+            from detect_audio_silence import detect_audio_silence
+            transitions = detect_audio_silence(video_path, params['threshold_db'], params['min_silence'],
+                                               params['window_ms'], params['confirm'])
+            return {'transitions': transitions, 'chapters': transitions_to_chapters(transitions)}
+
+        from detect_titles import detect_titles
+        from debug_writer import DebugWriter
+        with DebugWriter(level=options.get('debug_level', 'off')) as debug:
+            # A video that fails must fail the run, not be cached as having no titles
+            titles = detect_titles(video_path, decoder=params['decoder'], width=params['width'],
+                                   ocr_workers=options.get('ocr_workers', 1), debug=debug,
+                                   slide_changes=params['slide_changes'], hash_threshold=params['hash_threshold'],
+                                   ocr_engine=params['ocr_engine'], raise_errors=True)
+        return {'titles': {str(k): v for k, v in titles.items()}, 'chapters': titles_to_chapters(titles)}
+
+class VideoBatch:
+    """Runs a detector over a directory of videos with a result cache and a resumable manifest.
+
+    Results are cached per (file hash, detector, parameters) in
+    `<output>/cache/`, so unchanged videos are skipped. The manifest is
+    rewritten atomically after every finished video, so an interrupted run
+    resumes where it stopped. File hashes are reused while a file's size and
+    modification time are unchanged.
+    """
+
+    def __init__(self, output_dir: str, detector: str, params: Dict, workers: int = 2, options: Optional[Dict] = None):
+        self.output_dir = Path(output_dir)
+        self.detector = detector
+        self.params = params
+        self.options = options or {}
+        self.workers = workers
+        self.cache_dir = self.output_dir / 'cache'
+        self.manifest_path = self.output_dir / f"manifest_{detector}.json"
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict:
+        if self.manifest_path.exists():
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'detector': self.detector, 'videos': {}}
+
+    def _save_manifest(self):
+        write_json_atomic(self.manifest_path, self.manifest)
+
+    def _video_hash(self, video_path: str) -> str:
+        """Content hash, reused from the manifest while size and mtime are unchanged"""
+        stat = os.stat(video_path)
+        entry = self.manifest['videos'].get(video_path, {})
+        if entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime and entry.get('file_hash'):
+            return entry['file_hash']
+        return file_hash(video_path)
+
+    def _cache_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _record(self, video_path: str, video_hash: str, key: str, status: str,
+                result: Optional[Dict] = None, error: Optional[str] = None):
+        stat = os.stat(video_path)
+        entry = {
+            'file_hash': video_hash,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'params': self.params,
+            'cache_key': key,
+            'status': status,
+            'chapters': result['chapters'] if result else [],
+        }
+        if error:
+            entry['error'] = error
+        self.manifest['videos'][video_path] = entry
+        self._save_manifest()
+
+    def run(self, video_paths: List[str]) -> Dict:
+        """Process every video not already cached; returns the manifest"""
+        print(f"Hashing {len(video_paths)} videos...")
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            hashes = dict(zip(video_paths, pool.map(self._video_hash, video_paths)))
+
+        pending = []
+        for video_path in video_paths:
+            key = cache_key(hashes[video_path], self.detector, self.params)
+            cache_path = self._cache_path(key)
+            if cache_path.exists():
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    result = json.load(f)
+                self._record(video_path, hashes[video_path], key, 'cached', result)
+                print(f"Cached: {video_path}")
+            else:
+                pending.append((video_path, key))
+
+        print(f"\n{len(video_paths) - len(pending)} cached, {len(pending)} to process with {self.workers} workers")
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                pool.submit(run_detector, video_path, self.detector, self.params, self.options,
+                            str(self.output_dir / 'logs' / f"{Path(video_path).stem}.{self.detector}.log")): (video_path, key)
+                for video_path, key in pending
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                video_path, key = futures[future]
+                try:
+                    result = future.result()
+                    write_json_atomic(self._cache_path(key), result)
+                    self._record(video_path, hashes[video_path], key, 'done', result)
+                    print(f"[{done}/{len(pending)}] Done: {video_path} ({len(result['chapters'])} chapters)")
+                except Exception as e:
+                    self._record(video_path, hashes[video_path], key, 'failed', error=str(e))
+                    print(f"[{done}/{len(pending)}] Failed: {video_path}: {e}")
+
+        return self.manifest
+
+def main():
+    config = load_batch_config()
+    parser = argparse.ArgumentParser(description="Run a video detector over a directory of videos, skipping unchanged ones")
+    parser.add_argument("input_dir", nargs="?", default=config.get('input_dir', 'data/videos/raw'),
+                      help="Directory of videos (or a single video)")
+    parser.add_argument("--detector", choices=list(DETECTOR_PARAMS), default="titles")
+    parser.add_argument("--output-dir", default=config.get('output_dir', 'data/videos/batch'),
+                      help="Where the manifest, result cache and per-video logs go")
+    parser.add_argument("--workers", type=int, default=config.get('workers', 2),
+                      help="Videos processed in parallel")
+    parser.add_argument("--threshold", type=int, default=20)
+    parser.add_argument("--min-duration", type=float, default=0.1)
+    parser.add_argument("--stride", type=int, default=1)
+    parser.add_argument("--sample-ms", type=float)
+    parser.add_argument("--decoder", choices=DECODERS, default="opencv")
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--slide-changes", action="store_true",
+                      help="Titles detector: also OCR titles after direct slide changes")
+    parser.add_argument("--threshold-db", type=float, default=-40.0,
+                      help="Silence detector: RMS level in dBFS below which audio counts as silent")
+    parser.add_argument("--min-silence", type=float, default=0.5,
+                      help="Silence detector: minimum silence in seconds")
+    parser.add_argument("--window-ms", type=float, default=50)
+    parser.add_argument("--confirm", action="store_true",
+                      help="Silence detector: keep only silences whose middle frame is dark")
+    parser.add_argument("--hash-threshold", type=int, default=HASH_THRESHOLD,
+                      help="Titles detector: max differing title hash bits for a crop to reuse an earlier crop's OCR text")
+    parser.add_argument("--ocr-engine", choices=OCR_ENGINES,
+                      help="Titles detector: OCR engine (default: tesserocr when installed, else tesseract)")
+    parser.add_argument("--ocr-workers", type=int, default=1,
+                      help="OCR workers per video for the titles detector")
+    parser.add_argument("--debug-level", choices=DEBUG_LEVELS, default="off",
+                      help="detect_titles debug output level")
+    args = parser.parse_args()
+    # Resolve the engine so results from different engines are cached apart
+    args.ocr_engine = args.ocr_engine or default_engine()
+
+    # Only parameters that change the result go into the cache key
+    params = {name: getattr(args, name) for name in DETECTOR_PARAMS[args.detector]}
+    video_paths = find_videos(Path(args.input_dir))
+    if not video_paths:
+        print(f"No videos found in {args.input_dir}")
+        sys.exit(1)
+
+    options = {'ocr_workers': args.ocr_workers, 'debug_level': args.debug_level}
+    batch = VideoBatch(args.output_dir, args.detector, params, workers=args.workers, options=options)
+    manifest = batch.run(video_paths)
+
+    statuses = [entry['status'] for path, entry in manifest['videos'].items() if path in video_paths]
+    print(f"\nManifest: {batch.manifest_path}")
+    print(f"Done: {statuses.count('done')}, cached: {statuses.count('cached')}, failed: {statuses.count('failed')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import os
+import cv2
+import json
+import shutil
+import bisect
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Bump when the sidecar layout changes, so old index files are rebuilt
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.index.json'
+
+# AV_NOPTS_VALUE as framecrc prints it
+NO_PTS = -(1 << 63)
+
+# Indexes already loaded by this process, by (path, size, mtime)
+_loaded: Dict = {}
+
+class VideoIndex:
+    """Container metadata and keyframe positions of one video, kept in a sidecar file next to it.
+
+    Frame numbers are in presentation order, as OpenCV and ffmpeg number
+    decoded frames. `keyframes` is sorted, so the keyframe at or before any
+    frame is a binary search away.
+    """
+
+    def __init__(self, fps: float, frame_count: int, duration: float, width: int, height: int,
+                 keyframes: List[int], size: int = 0, mtime: float = 0.0):
+        self.fps = fps
+        self.frame_count = frame_count
+        self.duration = duration
+        self.width = width
+        self.height = height
+        self.keyframes = keyframes
+        self.size = size
+        self.mtime = mtime
+
+    def keyframe_before(self, frame_number: int) -> int:
+        """The last keyframe at or before the frame (0 if the index lists none)"""
+        i = bisect.bisect_right(self.keyframes, frame_number)
+        return self.keyframes[i - 1] if i else 0
+
+    def decode_forward(self, position: int, target: int) -> bool:
+        """Whether reading on from `position` reaches `target` without passing a keyframe a seek could start from"""
+        return position <= target and self.keyframe_before(target) <= position
+
+    def to_dict(self) -> Dict:
+        return {
+            'version': INDEX_VERSION,
+            'size': self.size,
+            'mtime': self.mtime,
+            'fps': self.fps,
+            'frame_count': self.frame_count,
+            'duration': self.duration,
+            'width': self.width,
+            'height': self.height,
+            'keyframes': self.keyframes
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'VideoIndex':
+        return cls(data['fps'], data['frame_count'], data['duration'], data['width'], data['height'],
+                   data['keyframes'], data['size'], data['mtime'])
+
+def index_path(video_path: str) -> Path:
+    """Sidecar index file of a video (video.mp4 -> video.mp4.index.json)"""
+    return Path(str(video_path) + INDEX_SUFFIX)
+
+def probe_packets(video_path: str, ffmpeg_path: str = 'ffmpeg') -> Dict:
+    """Timestamps and key flags of every video packet, read by remuxing to framecrc (no decoding)"""
+    command = [ffmpeg_path, '-v', 'error', '-nostdin', '-i', str(video_path),
+               '-map', '0:v:0', '-c', 'copy', '-f', 'framecrc', '-']
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not read {video_path}: {result.stderr.decode('utf-8', 'replace').strip()}")
+
+    time_base = None
+    dimensions = (0, 0)
+    packets = []  # (pts, duration, is keyframe)
+    for line in result.stdout.decode('utf-8').splitlines():
+        if line.startswith('#tb 0:'):
+            numerator, denominator = line.split(':', 1)[1].strip().split('/')
+            time_base = int(numerator) / int(denominator)
+        elif line.startswith('#dimensions 0:'):
+            dimensions = tuple(int(value) for value in line.split(':', 1)[1].strip().split('x'))
+        elif line and not line.startswith('#'):
+            fields = [field.strip() for field in line.split(',')]
+            # framecrc only prints flags when they are not just "keyframe"; bit 0 is the key flag
+            flags = next((int(field[2:], 16) for field in fields[6:] if field.startswith('F=')), 1)
+            dts, pts = int(fields[1]), int(fields[2])
+            packets.append((dts if pts == NO_PTS else pts, int(fields[3]), bool(flags & 1)))
+    if time_base is None:
+        raise RuntimeError(f"No video stream in {video_path}")
+    return {'time_base': time_base, 'dimensions': dimensions, 'packets': packets}
+
+def build_index(video_path: str, ffmpeg_path: str = 'ffmpeg') -> VideoIndex:
+    """Probe a video once: fps from the container, exact frame count and keyframes from its packets"""
+    probe = probe_packets(video_path, ffmpeg_path)
+    packets = sorted(probe['packets'])  # presentation order
+    keyframes = [frame_number for frame_number, (_, _, is_key) in enumerate(packets) if is_key]
+
+    cap = cv2.VideoCapture(str(video_path))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+
+    if packets:
+        first_pts, last = packets[0][0], packets[-1]
+        duration = (last[0] + last[1] - first_pts) * probe['time_base']
+    else:
+        duration = 0.0
+    if not fps and duration:
+        fps = len(packets) / duration
+
+    stat = os.stat(video_path)
+    width, height = probe['dimensions']
+    return VideoIndex(fps, len(packets), duration, width, height, keyframes or [0], stat.st_size, stat.st_mtime)
+
+def load_index(video_path: str, build: bool = False, ffmpeg_path: str = 'ffmpeg') -> Optional[VideoIndex]:
+    """The video's index from its sidecar file, if one exists and is up to date.
+
+    With `build`, a missing or stale index is probed and written next to the
+    video (a full pass over its packets). Returns None when there is no
+    usable index and none was built; callers then query the video directly.
+    """
+    path = index_path(video_path)
+    stat = os.stat(video_path)
+    key = (str(video_path), stat.st_size, stat.st_mtime)
+    if key in _loaded:
+        return _loaded[key]
+    if path.exists():
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if (data.get('version') == INDEX_VERSION and data.get('size') == stat.st_size
+                    and data.get('mtime') == stat.st_mtime):
+                _loaded[key] = VideoIndex.from_dict(data)
+                return _loaded[key]
+        except (OSError, ValueError, KeyError):
+            pass  # Unreadable or from an older layout: rebuild
+
+    if not build or not shutil.which(ffmpeg_path):
+        return None
+    index = build_index(video_path, ffmpeg_path)
+    try:
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index.to_dict(), f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # A read-only video directory only costs a re-probe next time
+        print(f"Warning: could not write video index {path}: {e}")
+    _loaded[key] = index
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the metadata and keyframe index of videos")
+    parser.add_argument("video_paths", nargs="+", help="Video files to index")
+    parser.add_argument("--rebuild", action="store_true",
+                      help="Probe again even if an up-to-date index exists")
+    args = parser.parse_args()
+
+    for video_path in args.video_paths:
+        if not Path(video_path).exists():
+            print(f"Error: Video file not found: {video_path}")
+            continue
+        try:
+            if args.rebuild:
+                index_path(video_path).unlink(missing_ok=True)
+                _loaded.clear()
+            index = load_index(video_path, build=True)
+            if index is None:
+                print(f"Error: ffmpeg not found, cannot index {video_path}")
+                continue
+            print(f"{video_path}: {index.frame_count} frames at {index.fps:.3f} fps, {index.duration:.2f}s, "
+                  f"{index.width}x{index.height}, {len(index.keyframes)} keyframes -> {index_path(video_path)}")
+        except Exception as e:
+            print(f"Error indexing {video_path}: {e}")
+
+if __name__ == "__main__":
+    main()